@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import json
+
+from collections import Counter, deque
+from typing import Deque, Optional, Tuple
+
+import constants
+
+from exceptions import (
+    CircuitBreakerOpen, ResponseIsNotJSON, ResponseStatusIsNotOK,
+)
+from lazy import lazy_import
+
+requests = lazy_import('requests')
+
+ERROR_CATEGORIES = {
+    'status': 'статус ответа API не 200',
+    'timeout': 'таймаут запроса к API',
+    'network': 'эндпоинт недоступен',
+    'json': 'ответ API не JSON',
+    'response': 'неверный ответ API',
+    'breaker': 'опрос приостановлен после серии сбоев',
+    'request': 'ошибка запроса к API',
+}
+
+
+def error_category(error: BaseException) -> str:
+    """Категория сбоя для группировки в сводке.
+    Ошибки одной категории с разным текстом, например с разными
+    статус кодами, считаются одной и той же ошибкой.
+    """
+    if isinstance(error, ResponseStatusIsNotOK):
+        return 'status'
+    if isinstance(error, CircuitBreakerOpen):
+        return 'breaker'
+    if isinstance(error, requests.exceptions.Timeout):
+        return 'timeout'
+    if isinstance(error, (requests.exceptions.ConnectionError,
+                          ConnectionError)):
+        return 'network'
+    if isinstance(error, (ResponseIsNotJSON, json.JSONDecodeError)):
+        return 'json'
+    if isinstance(error, requests.exceptions.RequestException):
+        return 'request'
+    if isinstance(error, (KeyError, TypeError)):
+        return 'response'
+    return type(error).__name__
+
+
+def format_duration(seconds: float) -> str:
+    """Длительность в минутах или часах."""
+    if seconds < 3600:
+        return f'{max(round(seconds / 60), 1)} мин'
+    return f'{seconds / 3600:.1f} ч'
+
+
+class ErrorDigest:
+    """Сводка сбоев опроса одной подписки.
+    О первом сбое сообщается сразу, дальше — сводкой по категориям за
+    скользящее окно `window` не чаще раза в `interval` секунд, а после
+    восстановления — одним сообщением. Сбой, начавшийся меньше чем через
+    `interval` после предыдущего сообщения, попадает в следующую сводку,
+    так что чередование ошибок и успешных опросов не засыпает чат. По
+    умолчанию окно и интервал берутся из текущих настроек.
+    """
+
+    __slots__ = (
+        'window', 'interval', 'events', 'counts', 'started', 'total',
+        'last_error', 'last_sent', 'notified',
+    )
+
+    def __init__(
+        self,
+        window: Optional[float] = None,
+        interval: Optional[float] = None,
+    ) -> None:
+        self.window = constants.ERROR_WINDOW if window is None else window
+        self.interval = (
+            constants.ERROR_DIGEST_INTERVAL if interval is None else interval
+        )
+        self.events: Deque[Tuple[float, str]] = deque()
+        self.counts: Counter = Counter()
+        self.started: Optional[float] = None
+        self.total = 0
+        self.last_error = ''
+        self.last_sent: Optional[float] = None
+        self.notified = False
+
+    def _expire(self, now: float) -> None:
+        while self.events and self.events[0][0] <= now - self.window:
+            _, category = self.events.popleft()
+            self.counts[category] -= 1
+            if not self.counts[category]:
+                del self.counts[category]
+
+    def record(self, error: BaseException, now: float) -> Optional[str]:
+        """Учитывает сбой; возвращает текст уведомления, если пора."""
+        category = error_category(error)
+        self._expire(now)
+        self.events.append((now, category))
+        self.counts[category] += 1
+        self.total += 1
+        self.last_error = str(error)
+        if self.started is None:
+            self.started = now
+        if self.last_sent is not None and now - self.last_sent < self.interval:
+            return None
+        self.last_sent = now
+        if not self.notified:
+            self.notified = True
+            return f'Сбой в работе программы: {error}'
+        return self.summary(now)
+
+    def summary(self, now: float) -> str:
+        """Сводка текущего сбоя."""
+        self._expire(now)
+        counts = ', '.join(
+            f'{ERROR_CATEGORIES.get(category, category)} ×{count}'
+            for category, count in self.counts.most_common()
+        )
+        return (
+            f'Сбой продолжается {format_duration(now - self.started)}, '
+            f'за последние {format_duration(self.window)}: {counts}. '
+            f'Последняя ошибка: {self.last_error}'
+        )
+
+    def recover(self, now: float) -> Optional[str]:
+        """Закрывает сбой после успешного опроса.
+        Возвращает сообщение о восстановлении, если о сбое сообщали.
+        """
+        if self.started is None:
+            return None
+        message = None
+        if self.notified:
+            message = (
+                f'Работа восстановлена после сбоя длительностью '
+                f'{format_duration(now - self.started)}, '
+                f'ошибок: {self.total}'
+            )
+            self.last_sent = now
+        self.events.clear()
+        self.counts.clear()
+        self.started = None
+        self.total = 0
+        self.notified = False
+        return message
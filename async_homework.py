@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import constants
+import homework
+
+from botapi import make_bot
+from clock import get_clock
+from exceptions import MissingEnvironmentVariable
+from lazy import lazy_import
+from lifecycle import install_signal_handlers
+from policy import FixedPollingPolicy, PollingPolicy
+from scheduler import poll_offset
+from sinks import FanOut, build_notifier
+from subscriptions import Subscription, SubscriptionRegistry
+
+telegram = lazy_import('telegram')
+
+logger = homework.logger
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Пул потоков, в котором выполняются блокирующие запросы."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=constants.IO_THREADS, thread_name_prefix='io'
+        )
+    return _executor
+
+
+async def run_blocking(func: Callable[..., Any], *args: Any) -> Any:
+    """Выполняет блокирующую функцию, не останавливая цикл событий."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_executor(), functools.partial(func, *args)
+    )
+
+
+async def get_api_answer(
+    current_timestamp: int
+) -> Dict[str, Union[list, int]]:
+    """Асинхронный вариант `homework.get_api_answer`."""
+    return await run_blocking(homework.get_api_answer, current_timestamp)
+
+
+async def request_homework_statuses(
+    token: str, current_timestamp: int
+) -> Dict[str, Union[list, int]]:
+    """Асинхронный вариант `homework.request_homework_statuses`."""
+    return await run_blocking(
+        homework.request_homework_statuses, token, current_timestamp
+    )
+
+
+async def send_message(bot: telegram.Bot, message: str) -> None:
+    """Асинхронный вариант `homework.send_message`."""
+    await run_blocking(homework.send_message, bot, message)
+
+
+async def send_chat_message(
+    bot: telegram.Bot, chat_id: Union[str, int], message: str
+) -> bool:
+    """Асинхронный вариант `homework.send_chat_message`."""
+    return await run_blocking(
+        homework.send_chat_message, bot, chat_id, message
+    )
+
+
+async def poll_subscription(
+    bot: telegram.Bot, subscription: Subscription
+) -> None:
+    """Асинхронный вариант `homework.poll_subscription`.
+    Опрос целиком, вместе с записью в хранилище состояния и полями
+    подписки в логе, выполняется в пуле потоков.
+    """
+    await run_blocking(homework.poll_subscription, bot, subscription)
+
+
+class AsyncPoller:
+    """Опрашивает подписки реестра задачами одного цикла событий.
+    Повторяет ту часть `PollingScheduler`, на которую опираются
+    `homework.reload_config` и `homework.shutdown`: новые подписки
+    добавляются через `add`, удалённые из реестра перестают опрашиваться
+    сами, `interval` и `policy` читаются перед каждой задержкой.
+    """
+
+    def __init__(
+        self,
+        bot: telegram.Bot,
+        registry: SubscriptionRegistry,
+        interval: float,
+        policy: Optional[PollingPolicy] = None,
+    ) -> None:
+        self.bot = bot
+        self.registry = registry
+        self.interval = interval
+        self.policy = policy or FixedPollingPolicy(interval)
+        self._tasks: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._stopped: Optional[asyncio.Event] = None
+
+    def add(self, subscription: Subscription) -> None:
+        """Запускает опрос подписки; прежний опрос того же ключа отменяет."""
+        task = self._tasks.pop(subscription.key, None)
+        if task is not None:
+            task.cancel()
+        self._tasks[subscription.key] = asyncio.ensure_future(
+            self.watch(subscription)
+        )
+
+    async def watch(self, subscription: Subscription) -> None:
+        """Опрашивает подписку, пока она есть в реестре."""
+        loop = asyncio.get_running_loop()
+        await asyncio.sleep(poll_offset(subscription, self.interval))
+        while self.registry.get(subscription.key) is subscription:
+            started = loop.time()
+            try:
+                await poll_subscription(self.bot, subscription)
+            except Exception as error:
+                logger.exception(f'Сбой опроса {subscription}: {error}')
+            delay = self.policy.next_delay(subscription, get_clock().time())
+            await asyncio.sleep(max(0.0, delay - (loop.time() - started)))
+
+    async def run(self) -> None:
+        """Опрашивает все подписки реестра до `stop`."""
+        self._stopped = asyncio.Event()
+        for subscription in self.registry:
+            self.add(subscription)
+        await self._stopped.wait()
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stop(self) -> None:
+        """Завершает `run`; вызывается из цикла событий."""
+        if self._stopped is not None:
+            self._stopped.set()
+
+    def close(self) -> None:
+        """Дожидается опросов, начатых в пуле потоков."""
+        global _executor
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+async def run_polling(
+    bot: telegram.Bot,
+    registry: SubscriptionRegistry,
+    interval: float,
+    policy: Optional[PollingPolicy] = None,
+) -> None:
+    """Опрашивает все подписки реестра конкурентно в одном цикле событий."""
+    await AsyncPoller(bot, registry, interval, policy).run()
+
+
+async def serve(poller: AsyncPoller, notifier: FanOut) -> None:
+    """Опрашивает подписки до SIGTERM; по SIGHUP перечитывает настройки.
+    Обработчики сигналов только передают работу в цикл событий.
+    """
+    loop = asyncio.get_running_loop()
+    install_signal_handlers(
+        on_stop=lambda: loop.call_soon_threadsafe(poller.stop),
+        on_reload=lambda: loop.call_soon_threadsafe(
+            homework.reload_config, poller.registry, poller, notifier
+        ),
+    )
+    await poller.run()
+
+
+def main() -> None:
+    """Основная логика работы бота в асинхронном режиме."""
+    if not homework.check_tokens():
+        logger.critical(
+            'Отсутствуют обязательные переменные окружения. '
+            'Программа принудительно остановлена.')
+        raise MissingEnvironmentVariable
+
+    logger.info('Программа работает в асинхронном режиме')
+
+    notifier = build_notifier(make_bot()).start()
+    registry = homework.load_registry(int(get_clock().time()))
+    logger.info(f'Подписок в работе: {len(registry)}')
+    poller = AsyncPoller(
+        notifier, registry, constants.RETRY_TIME,
+        homework.get_polling_policy(),
+    )
+    try:
+        asyncio.run(serve(poller, notifier))
+    finally:
+        homework.shutdown(notifier, poller)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import json
+import logging
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import constants
+
+from exceptions import BotApiUnavailable, TelegramAPIError, TelegramRetryAfter
+from lazy import lazy_import
+from outbox import ChatId, fold_messages
+
+urllib3 = lazy_import('urllib3')
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = 'https://api.telegram.org/bot'
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+
+def make_pool(url: str, size: int, timeout: Tuple[float, float]) -> Any:
+    """Пул соединений к `url` с учётом `HTTPS_PROXY`/`NO_PROXY`.
+    Повторы выключены: ими занимается `Outbox`.
+    """
+    import urllib.request
+
+    options = dict(
+        maxsize=size, retries=False, block=False,
+        timeout=urllib3.Timeout(connect=timeout[0], read=timeout[1]),
+    )
+    parts = urlsplit(url)
+    proxy = urllib.request.getproxies().get(parts.scheme)
+    if proxy and not urllib.request.proxy_bypass(parts.hostname):
+        return urllib3.ProxyManager(proxy, **options)
+    return urllib3.PoolManager(**options)
+
+
+class BotApiClient:
+    """Лёгкий клиент Bot API для отправки сообщений.
+    Вызывает `sendMessage` напрямую через пул keep-alive соединений
+    `urllib3`, без объектной модели python-telegram-bot и без обхода
+    окружения перед каждым запросом, как у `requests.Session`: прокси
+    из окружения выбирается один раз при создании. `send_message`
+    совместим с `telegram.Bot.send_message`, поэтому клиент можно
+    передавать везде, где ожидается бот. Ответ с кодом 429 выбрасывается
+    как `TelegramRetryAfter`, остальные ошибки Bot API — как
+    `TelegramAPIError`. Если соединение с Bot API не установилось и
+    запрос точно не ушёл, сообщение отправляет запасной бот из `fallback`
+    (создаётся при первой такой ошибке). Сбои после отправки запроса,
+    например таймаут ответа, выбрасываются как `TelegramAPIError` и
+    повторяются очередью: сообщение могло дойти, и запасной бот его бы
+    продублировал.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        base_url: Optional[str] = None,
+        pool_size: int = 10,
+        timeout: Tuple[float, float] = (5.0, 30.0),
+        pool: Any = None,
+        fallback: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        self.url = f'{base_url or DEFAULT_BASE_URL}{token}/'
+        self._owns_pool = pool is None
+        self.pool = pool or make_pool(self.url, pool_size, timeout)
+        self.fallback = fallback
+        self._fallback_bot: Any = None
+
+    def call(self, method: str, payload: Dict[str, Any]) -> Any:
+        """Вызывает метод Bot API и возвращает поле `result` ответа."""
+        try:
+            response = self.pool.request(
+                'POST', self.url + method,
+                body=json.dumps(payload).encode(), headers=JSON_HEADERS,
+            )
+        except (
+            urllib3.exceptions.NewConnectionError,
+            urllib3.exceptions.ConnectTimeoutError,
+            urllib3.exceptions.ProxyError,
+        ) as error:
+            raise BotApiUnavailable(
+                f'Нет связи с Bot API: {error}'
+            ) from error
+        except urllib3.exceptions.HTTPError as error:
+            raise TelegramAPIError(
+                f'Запрос к Bot API не завершён: {error}'
+            ) from error
+        try:
+            data = json.loads(response.data)
+        except ValueError as error:
+            raise TelegramAPIError(
+                f'Bot API вернул не JSON, статус {response.status}'
+            ) from error
+        if data.get('ok'):
+            return data.get('result')
+        description = data.get('description', 'неизвестная ошибка')
+        code = data.get('error_code', response.status)
+        retry_after = (data.get('parameters') or {}).get('retry_after')
+        if code == 429 and retry_after is not None:
+            raise TelegramRetryAfter(description, float(retry_after))
+        raise TelegramAPIError(f'{code}: {description}')
+
+    def send_message(
+        self,
+        chat_id: ChatId = None,
+        text: str = None,
+        parse_mode: Optional[str] = None,
+        disable_web_page_preview: Optional[bool] = None,
+        disable_notification: Optional[bool] = None,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """Отправляет сообщение; возвращает объект Message в виде словаря."""
+        options = {
+            name: value for name, value in (
+                ('parse_mode', parse_mode),
+                ('disable_web_page_preview', disable_web_page_preview),
+                ('disable_notification', disable_notification),
+            ) if value is not None
+        }
+        try:
+            return self.call(
+                'sendMessage', {'chat_id': chat_id, 'text': text, **options}
+            )
+        except BotApiUnavailable as error:
+            if self.fallback is None:
+                raise
+            logger.warning(
+                f'Лёгкий клиент Bot API не отправил сообщение ({error}), '
+                'отправляю через запасной клиент'
+            )
+            if self._fallback_bot is None:
+                self._fallback_bot = self.fallback()
+            return self._fallback_bot.send_message(
+                chat_id=chat_id, text=text, **options, **kwargs
+            )
+
+    def send_messages(
+        self,
+        messages: Iterable[Tuple[ChatId, str]],
+        parse_mode: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Отправляет пачку уведомлений `(chat_id, text)`.
+        Уведомления одного чата склеиваются в как можно меньшее число
+        сообщений в пределах лимита длины Telegram, порядок сохраняется.
+        """
+        by_chat: Dict[ChatId, List[str]] = {}
+        for chat_id, text in messages:
+            by_chat.setdefault(chat_id, []).append(text)
+        return [
+            self.send_message(chat_id, text, parse_mode=parse_mode)
+            for chat_id, texts in by_chat.items()
+            for text in fold_messages(texts)
+        ]
+
+    def close(self) -> None:
+        """Закрывает соединения пула."""
+        if self._owns_pool:
+            self.pool.clear()
+
+
+def make_ptb_bot() -> Any:
+    """`telegram.Bot` из python-telegram-bot."""
+    import telegram
+
+    return telegram.Bot(
+        token=constants.TELEGRAM_TOKEN, base_url=constants.TELEGRAM_API_URL
+    )
+
+
+def make_bot() -> Any:
+    """Клиент Telegram по настройке `TELEGRAM_CLIENT`.
+    `raw` — `BotApiClient`, который при сбое соединения отправляет через
+    `telegram.Bot`; `ptb` — сразу `telegram.Bot` из python-telegram-bot.
+    """
+    if constants.TELEGRAM_CLIENT == 'ptb':
+        return make_ptb_bot()
+    return BotApiClient(
+        constants.TELEGRAM_TOKEN, base_url=constants.TELEGRAM_API_URL,
+        fallback=make_ptb_bot,
+    )
@@ -0,0 +1,181 @@
+import email.utils
+import hashlib
+import logging
+import random
+import threading
+import time
+
+from typing import Callable, Dict, Optional
+
+import constants
+
+from clock import get_clock
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+def parse_retry_after(
+    value: Optional[str], now: Optional[float] = None
+) -> Optional[float]:
+    """Разбирает заголовок `Retry-After`: секунды или HTTP-дата."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date is None:
+        return None
+    return max(0.0, date.timestamp() - (time.time() if now is None else now))
+
+
+class CircuitBreaker:
+    """Автомат защиты эндпоинта от запросов во время сбоя.
+    После `failure_threshold` сбоев подряд размыкается (`open`) и не
+    пропускает запросы; время размыкания растёт экспоненциально с каждым
+    повторным размыканием, со случайным разбросом `jitter`, и не меньше
+    `Retry-After` от сервера. По истечении пропускает один пробный запрос
+    (`half-open`): успех замыкает автомат, сбой снова размыкает.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = constants.BREAKER_FAILURES,
+        base_delay: float = constants.BREAKER_BASE_DELAY,
+        max_delay: float = constants.BREAKER_MAX_DELAY,
+        jitter: float = 0.1,
+        clock: Callable[[], float] = time.monotonic,
+        random: Callable[[], float] = random.random,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.clock = clock
+        self.random = random
+        self.state: str = CLOSED
+        self.failures: int = 0
+        self.opened: int = 0
+        self.open_until: float = 0.0
+        self._probing: bool = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            self.state = state
+            logger.info(f'Автомат {self.name}: {state}')
+
+    def allow(self) -> bool:
+        """Можно ли сейчас делать запрос."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self.clock() >= self.open_until:
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def retry_in(self) -> float:
+        """Сколько секунд осталось до пробного запроса."""
+        return max(0.0, self.open_until - self.clock())
+
+    def record_success(self) -> None:
+        """Учитывает успешный запрос."""
+        with self._lock:
+            self.failures = 0
+            self.opened = 0
+            self._probing = False
+            self._set_state(CLOSED)
+
+    def record_failure(self, retry_after: Optional[float] = None) -> None:
+        """Учитывает сбой; `retry_after` — пауза, запрошенная сервером."""
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if (
+                self.state == CLOSED
+                and self.failures < self.failure_threshold
+                and retry_after is None
+            ):
+                return
+            delay = min(self.max_delay, self.base_delay * 2 ** self.opened)
+            delay *= 1 + self.jitter * (2 * self.random() - 1)
+            self.opened += 1
+            delay = max(delay, retry_after or 0)
+            self.open_until = self.clock() + delay
+            self.state = OPEN
+            logger.warning(
+                f'Автомат {self.name}: {OPEN} на {delay:.0f} с '
+                f'после {self.failures} сбоев подряд'
+            )
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_token_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+# Источник разброса для автоматов `get_breaker`; для воспроизводимых
+# прогонов задаётся `set_breaker_random`
+_random: Callable[[], float] = random.random
+
+
+def set_breaker_random(function: Callable[[], float]) -> None:
+    """Задаёт источник разброса для автоматов, создаваемых `get_breaker`.
+    Например, `random.Random(seed).random` делает паузы автоматов
+    воспроизводимыми.
+    """
+    global _random
+    _random = function
+
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    """Общий для всех подписок автомат эндпоинта."""
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = _breakers[endpoint] = CircuitBreaker(
+                endpoint, clock=get_clock().monotonic, random=_random
+            )
+        return breaker
+
+
+def token_breaker_key(endpoint: str, token: str) -> str:
+    """Имя автомата токена; сам токен в имя и логи не попадает."""
+    digest = hashlib.blake2b(token.encode(), digest_size=8).hexdigest()
+    return f'{endpoint}#{digest}'
+
+
+def get_token_breaker(
+    endpoint: str, token: str, create: bool = False
+) -> Optional[CircuitBreaker]:
+    """Автомат лимита запросов одного токена.
+    Ответ 429 — лимит токена, а не сбой эндпоинта, поэтому он
+    приостанавливает запросы только этого токена. Автомат размыкается
+    с первого 429 и создаётся только с `create`, так что токены без
+    ограничений места не занимают.
+    """
+    key = token_breaker_key(endpoint, token)
+    with _breakers_lock:
+        breaker = _token_breakers.get(key)
+        if breaker is None and create:
+            breaker = _token_breakers[key] = CircuitBreaker(
+                key, failure_threshold=1, clock=get_clock().monotonic,
+                random=_random,
+            )
+        return breaker
+
+
+def drop_token_breaker(endpoint: str, token: str) -> None:
+    """Убирает автомат токена после успешного запроса."""
+    with _breakers_lock:
+        _token_breakers.pop(token_breaker_key(endpoint, token), None)
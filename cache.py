@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+import time
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from lazy import lazy_import
+
+requests = lazy_import('requests')
+
+# Поле `current_date` в теле ответа; внутри строк JSON кавычки
+# экранированы, поэтому совпадения там невозможны.
+CURRENT_DATE = re.compile(rb'"current_date"\s*:\s*(-?\d+)')
+
+
+class ResponseData(dict):
+    """Разобранный ответ API из кеша.
+    Рядом с ответом хранится результат его проверки
+    (`validation.validate_response`), так что при попаданиях в кеш один
+    и тот же ответ не проверяется заново.
+    """
+
+    __slots__ = ('validated',)
+
+
+class CacheEntry:
+    """Последний ответ API для одного токена."""
+
+    __slots__ = (
+        'from_date', 'etag', 'last_modified', 'expires', 'digest', 'data',
+    )
+
+    def __init__(self, from_date: int, digest: bytes, data: Any) -> None:
+        self.from_date = from_date
+        self.digest = digest
+        self.data = data
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.expires: float = 0.0
+
+
+def split_current_date(content: bytes) -> Tuple[bytes, Optional[int]]:
+    """Тело ответа без `current_date` и само значение.
+    Если поле встречается не ровно один раз, тело возвращается целиком.
+    """
+    matches = list(CURRENT_DATE.finditer(content))
+    if len(matches) != 1:
+        return content, None
+    match = matches[0]
+    return (
+        content[:match.start(1)] + content[match.end(1):],
+        int(match.group(1)),
+    )
+
+
+def parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    """Разбирает заголовок `Cache-Control` в словарь директив."""
+    directives: Dict[str, Optional[str]] = {}
+    for part in value.split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+class ResponseCache:
+    """HTTP-кеш ответов API Практикум.Домашка.
+    Хранит по одной записи на токен. При обычном опросе курсор каждый
+    раз сдвигается на `current_date` прошлого ответа, а `current_date`
+    меняется в каждом ответе, поэтому окупается в основном сравнение
+    тел: json не разбирается повторно, если тело совпадает с предыдущим
+    во всём, кроме `current_date` — в разобранный ответ подставляется
+    только новое значение. `Cache-Control: max-age`, `no-cache`,
+    `no-store` и условные заголовки по `ETag` и `Last-Modified`
+    относятся к тому же курсору, то есть срабатывают лишь на повторных
+    запросах без сдвига курсора (после сбоя или пустого ответа).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 100_000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.fresh: int = 0
+        self.not_modified: int = 0
+        self.identical: int = 0
+
+    def _entry(self, token: str, from_date: int) -> Optional[CacheEntry]:
+        entry = self._entries.get(token)
+        if entry is None or entry.from_date != from_date:
+            return None
+        return entry
+
+    def get_fresh(self, token: str, from_date: int) -> Optional[Any]:
+        """Возвращает ответ, если он ещё свеж по `max-age`."""
+        with self._lock:
+            entry = self._entry(token, from_date)
+            if entry is None or entry.expires <= self.clock():
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            self.fresh += 1
+            return entry.data
+
+    def request_headers(self, token: str, from_date: int) -> Dict[str, str]:
+        """Условные заголовки для запроса."""
+        headers: Dict[str, str] = {}
+        with self._lock:
+            entry = self._entry(token, from_date)
+            if entry is not None:
+                if entry.etag:
+                    headers['If-None-Match'] = entry.etag
+                if entry.last_modified:
+                    headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def not_modified_response(
+        self, token: str, from_date: int, response: requests.Response
+    ) -> Any:
+        """Ответ из кеша на `304 Not Modified`.
+        Если запись успели вытеснить, выбрасывает `KeyError`: ответ нужно
+        запросить заново без условных заголовков.
+        """
+        directives = parse_cache_control(
+            response.headers.get('Cache-Control', '')
+        )
+        with self._lock:
+            entry = self._entry(token, from_date)
+            if entry is None:
+                raise KeyError(f'Нет закешированного ответа для {from_date}')
+            self._entries.move_to_end(token)
+            self._refresh(entry, directives)
+            self.hits += 1
+            self.not_modified += 1
+            return entry.data
+
+    def store(
+        self, token: str, from_date: int, response: requests.Response
+    ) -> Any:
+        """Разбирает ответ 200 и кеширует его.
+        Если тело совпадает с предыдущим ответом этого токена без учёта
+        `current_date`, json не разбирается повторно.
+        """
+        body, current_date = split_current_date(response.content)
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        directives = parse_cache_control(
+            response.headers.get('Cache-Control', '')
+        )
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry.digest == digest:
+                self.hits += 1
+                self.identical += 1
+                data = entry.data
+            else:
+                self.misses += 1
+                data = None
+        if data is None:
+            data = response.json()
+            if isinstance(data, dict):
+                data = ResponseData(data)
+        elif isinstance(data, dict) and current_date is not None and (
+            data.get('current_date') != current_date
+        ):
+            data = ResponseData(data, current_date=current_date)
+        if 'no-store' in directives:
+            with self._lock:
+                self._entries.pop(token, None)
+            return data
+        entry = CacheEntry(from_date, digest, data)
+        entry.etag = response.headers.get('ETag')
+        entry.last_modified = response.headers.get('Last-Modified')
+        self._refresh(entry, directives)
+        with self._lock:
+            self._entries[token] = entry
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return data
+
+    def _refresh(
+        self, entry: CacheEntry, directives: Dict[str, Optional[str]]
+    ) -> None:
+        entry.expires = 0.0
+        max_age = directives.get('max-age')
+        if 'no-cache' not in directives and max_age and max_age.isdigit():
+            entry.expires = self.clock() + int(max_age)
+
+    def stats(self) -> Dict[str, int]:
+        """Счётчики попаданий и промахов."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'fresh': self.fresh,
+            'not_modified': self.not_modified,
+            'identical': self.identical,
+            'entries': len(self._entries),
+        }
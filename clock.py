@@ -0,0 +1,79 @@
+import threading
+import time
+
+from typing import Optional
+
+from exceptions import SimulationFinished
+
+
+class Clock:
+    """Источник времени и ожидания процесса.
+    `time` — время Unix для курсоров API, `monotonic` — для интервалов,
+    `sleep` — ожидание цикла опроса.
+    """
+
+    def time(self) -> float:
+        """Время Unix в секундах."""
+        return time.time()
+
+    def monotonic(self) -> float:
+        """Монотонное время для интервалов."""
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        """Ждёт `seconds` секунд."""
+        time.sleep(seconds)
+
+
+class VirtualClock(Clock):
+    """Виртуальное время: `sleep` не ждёт, а сдвигает часы.
+    Позволяет прогнать сутки опроса за секунды. Если задан `stop_at`,
+    `sleep` выбрасывает `SimulationFinished`, когда виртуальное время
+    дошло до него, — так останавливается бесконечный цикл.
+    """
+
+    def __init__(
+        self, start: float = 0.0, stop_at: Optional[float] = None
+    ) -> None:
+        self.start = start
+        self.stop_at = stop_at
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def time(self) -> float:
+        """Виртуальное время Unix."""
+        return self.start + self.elapsed
+
+    def monotonic(self) -> float:
+        """Виртуальные секунды с начала симуляции."""
+        return self.elapsed
+
+    def advance(self, seconds: float) -> None:
+        """Сдвигает виртуальное время вперёд."""
+        with self._lock:
+            self.elapsed += max(seconds, 0.0)
+
+    def sleep(self, seconds: float) -> None:
+        """Сдвигает часы; в конце симуляции выбрасывает исключение."""
+        self.advance(seconds)
+        if self.stop_at is not None and self.time() >= self.stop_at:
+            raise SimulationFinished(
+                f'Виртуальное время дошло до {self.stop_at}'
+            )
+
+
+_clock: Clock = Clock()
+
+
+def get_clock() -> Clock:
+    """Общий для процесса источник времени."""
+    return _clock
+
+
+def set_clock(clock: Clock) -> None:
+    """Подменяет источник времени процесса.
+    Вызывается до создания клиента API и автоматов защиты: они запоминают
+    функции часов при создании.
+    """
+    global _clock
+    _clock = clock
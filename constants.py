@@ -2,6 +2,8 @@ import os
 
 from dotenv import load_dotenv
 
+# Переменные окружения процесса; `.env` их не перекрывает и при SIGHUP
+PROCESS_ENVIRON = frozenset(os.environ)
 load_dotenv()
 
 
@@ -10,11 +12,83 @@ TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
 TIMEZONE = os.getenv('TIMEZONE')
+# Формат логов: `text` или `json` (строка JSON на запись)
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
 
-RETRY_TIME = 600
-ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+# Файл со списком подписок `PRACTICUM_TOKEN TELEGRAM_CHAT_ID` по строке
+SUBSCRIPTIONS_FILE = os.getenv('SUBSCRIPTIONS_FILE')
+POLLING_WORKERS = int(os.getenv('POLLING_WORKERS', 1))
+# Номер процесса-шарда и число шардов; подписки делятся по токену
+SHARD_INDEX = int(os.getenv('SHARD_INDEX', 0))
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', 1))
+# Сколько чатов догонять параллельно командой `backfill`
+BACKFILL_WORKERS = int(os.getenv('BACKFILL_WORKERS', 4))
+# Интервал опроса: `fixed` — всегда RETRY_TIME, `adaptive` — по статусу
+POLLING_POLICY = os.getenv('POLLING_POLICY', 'fixed')
+# Опрос API можно отключить, если статусы приходят только через webhook
+POLLING_ENABLED = os.getenv('POLLING_ENABLED', '1') != '0'
+# Приём статусов, присланных в webhook; без порта webhook выключен
+WEBHOOK_PORT = os.getenv('WEBHOOK_PORT')
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/homework_statuses')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+# Выдача метрик Prometheus на `/metrics` (без METRICS_PORT выключена)
+METRICS_PORT = os.getenv('METRICS_PORT')
+METRICS_HOST = os.getenv('METRICS_HOST', '0.0.0.0')
+# Сколько секунд после SIGTERM ждать отправки очереди уведомлений
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', 25))
+# Потоки для блокирующих запросов в асинхронном режиме
+IO_THREADS = int(os.getenv('IO_THREADS', 32))
+
+RETRY_TIME = float(os.getenv('RETRY_TIME', 600))
+ENDPOINT = os.getenv(
+    'PRACTICUM_ENDPOINT',
+    'https://practicum.yandex.ru/api/user_api/homework_statuses/',
+)
+# Адрес Bot API, если он не стандартный (например, локальный Bot API)
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL')
+# Клиент Telegram: `raw` — лёгкий клиент Bot API с запасным telegram.Bot,
+# `ptb` — только telegram.Bot
+TELEGRAM_CLIENT = os.getenv('TELEGRAM_CLIENT', 'raw')
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+# Пул соединений и таймауты (в секундах) запросов к API
+API_POOL_SIZE = int(os.getenv('API_POOL_SIZE', 10))
+API_CONNECT_TIMEOUT = float(os.getenv('API_CONNECT_TIMEOUT', 5))
+API_READ_TIMEOUT = float(os.getenv('API_READ_TIMEOUT', 30))
+API_CACHE = os.getenv('API_CACHE', '1') != '0'
+# Сколько секунд отдавать ответ API на тот же токен и курсор без запроса
+API_DEDUP_TTL = float(os.getenv('API_DEDUP_TTL', 5))
+# Автомат защиты API: сбоев подряд до размыкания и пауза (секунды)
+BREAKER_FAILURES = int(os.getenv('BREAKER_FAILURES', 3))
+BREAKER_BASE_DELAY = float(os.getenv('BREAKER_BASE_DELAY', 60))
+BREAKER_MAX_DELAY = float(os.getenv('BREAKER_MAX_DELAY', 3600))
+
+# Окно, за которое сводка сбоев считает ошибки, и интервал между
+# сводками (секунды)
+ERROR_WINDOW = float(os.getenv('ERROR_WINDOW', 3600))
+ERROR_DIGEST_INTERVAL = float(os.getenv('ERROR_DIGEST_INTERVAL', 3600))
+
+# База SQLite с курсорами опроса и отправленными уведомлениями
+STATE_DB = os.getenv('STATE_DB', 'homework_bot.sqlite3')
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+# Лимиты Telegram: сообщений в секунду всего и в один чат
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
 
+# Куда отправлять уведомления: telegram, webhook, smtp, file через запятую
+NOTIFY_SINKS = os.getenv('NOTIFY_SINKS', 'telegram')
+# Лимит уведомлений в секунду для каждого получателя, кроме Telegram
+SINK_RATE = float(os.getenv('SINK_RATE', 10))
+# Потоки, которые отправляют уведомления получателям, кроме Telegram
+SINK_WORKERS = int(os.getenv('SINK_WORKERS', 8))
+NOTIFY_WEBHOOK_URL = os.getenv('NOTIFY_WEBHOOK_URL')
+SMTP_HOST = os.getenv('SMTP_HOST', 'localhost')
+SMTP_PORT = int(os.getenv('SMTP_PORT', 25))
+SMTP_FROM = os.getenv('SMTP_FROM', 'homework-bot@localhost')
+SMTP_TO = os.getenv('SMTP_TO', '')
+# Файл для получателя file; `-` — stdout
+NOTIFY_FILE = os.getenv('NOTIFY_FILE', '-')
 
 HOMEWORK_STATUSES = {
     'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
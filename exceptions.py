@@ -2,5 +2,41 @@ class ResponseStatusIsNotOK(Exception):
     """Статус ответа сервера отличный от `OК`."""
 
 
+class ResponseIsNotJSON(ValueError):
+    """Ответ сервера не удалось декодировать в json."""
+
+
+class CircuitBreakerOpen(Exception):
+    """Запросы к API временно приостановлены после серии сбоев."""
+
+
+class UnknownSubscription(Exception):
+    """Нет подписки на присланный токен."""
+
+
+class ShardUnavailable(Exception):
+    """Шард, которому принадлежит токен, не принял пересланный статус."""
+
+
 class MissingEnvironmentVariable(Exception):
     """Отсутствует переменная окружения."""
+
+
+class SimulationFinished(Exception):
+    """Виртуальное время симуляции закончилось."""
+
+
+class TelegramAPIError(Exception):
+    """Bot API ответил ошибкой."""
+
+
+class TelegramRetryAfter(TelegramAPIError):
+    """Bot API просит повторить запрос через `retry_after` секунд."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class BotApiUnavailable(TelegramAPIError):
+    """Запрос к Bot API не ушёл: соединение не установлено."""
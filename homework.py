@@ -1,122 +1,249 @@
+from __future__ import annotations
+
+import argparse
 import datetime
 import logging
+import os
 import sys
+import threading
 import time
 
+from concurrent.futures import ThreadPoolExecutor
 from logging import StreamHandler
-from typing import Dict, List, Optional, Union
-
-import pytz
-import requests
-import telegram
-
-from requests import exceptions
+from logging.handlers import QueueListener
+from typing import (
+    ContextManager, Dict, Hashable, List, Optional, Tuple, Union,
+)
 
 import constants
+import metrics
 
-from exceptions import MissingEnvironmentVariable, ResponseStatusIsNotOK
+from alerts import error_category
+from botapi import make_bot
+from clock import Clock, get_clock
+from exceptions import (
+    MissingEnvironmentVariable, ResponseIsNotJSON, ResponseStatusIsNotOK,
+    ShardUnavailable, UnknownSubscription,
+)
+from lazy import lazy_import
+from lifecycle import (
+    BOT_SETTINGS, CLIENT_SETTINGS, RESTART_REQUIRED, apply_settings,
+    install_signal_handlers, read_settings,
+)
+from logs import attach_queue_handler, log_context, make_formatter
+from metrics import MetricsServer
+from outbox import Outbox, Receipt, fold_messages
+from policy import AdaptivePollingPolicy, FixedPollingPolicy, PollingPolicy
+from practicum import (
+    PracticumClient, get_client, get_flight, reset_client,
+)
+from scheduler import PollingScheduler
+from shards import Supervisor, select_shard, shard_index
+from sinks import FanOut, build_notifier
+from storage import SentKey, get_store, sent_key, subscription_id
+from streaming import HomeworkStream, iter_body
+from subscriptions import (
+    Subscription, SubscriptionRegistry, read_subscriptions,
+)
+from transitions import homework_key, homework_time
+from validation import (
+    Homework, check_shape, homework_message, parse_homework, parse_homeworks,
+)
+from webhook import PLACEHOLDER_SECRETS, WebhookServer
+
+pytz = lazy_import('pytz')
+requests = lazy_import('requests')
+telegram = lazy_import('telegram')
 
 
 def get_logger():
-    """Возвращает настроенный логгер."""
+    """Возвращает настроенный логгер.
+    Записи форматирует и выводит в stdout отдельный поток, чтобы вывод
+    не задерживал опрос. С `LOG_FORMAT=json` записи выводятся строками
+    JSON вместе с полями подписки. Очередь подключается к корневому
+    логгеру, поэтому так же выводятся записи логгеров остальных модулей
+    (`breaker`, `outbox`, `sinks` и других) с уровня INFO.
+    """
+    global _log_handler, _log_listener
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
     logger = logging.getLogger(__name__)
     logger.setLevel(logging.DEBUG)
-    handler = StreamHandler(sys.stdout)
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    )
-    logging.Formatter.converter = (
-        lambda *args: datetime.datetime.now(
-            tz=pytz.timezone(constants.TIMEZONE)
-        ).timetuple()
-    )
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+    _log_handler = StreamHandler(sys.stdout)
+    _log_handler.setFormatter(make_log_formatter())
+    _log_listener = attach_queue_handler(root, _log_handler)
     return logger
 
 
+def make_log_formatter() -> logging.Formatter:
+    """Форматтер логов по настройкам `LOG_FORMAT` и `TIMEZONE`."""
+    return make_formatter(
+        json_lines=constants.LOG_FORMAT == 'json',
+        timezone=constants.TIMEZONE,
+    )
+
+
+_log_handler: Optional[logging.Handler] = None
+_log_listener: Optional[QueueListener] = None
+
+
 logger = get_logger()
 
 
 def send_message(bot: telegram.Bot, message: str) -> None:
     """Отправляет сообщение в телеграм чат."""
+    send_chat_message(bot, constants.TELEGRAM_CHAT_ID, message)
+
+
+def send_chat_message(
+    bot: telegram.Bot,
+    chat_id: Union[str, int],
+    message: str,
+    receipt: Optional[Receipt] = None,
+) -> bool:
+    """Отправляет сообщение в указанный телеграм чат.
+    Возвращает True, если сообщение отправлено или поставлено в очередь.
+    Отправки через очереди (`Outbox`, `FanOut`) только ставятся в
+    очередь: о доставке очередь сообщит в `receipt`, её метрики учитывает
+    сама очередь. При прямой отправке `receipt` подтверждается сразу.
+    """
+    queued = isinstance(bot, (Outbox, FanOut))
+    started = time.monotonic()
     try:
-        bot.send_message(chat_id=constants.TELEGRAM_CHAT_ID, text=message)
-        logger.info('Сообщение отправлено в чат')
+        if queued:
+            bot.send_message(chat_id=chat_id, text=message, receipt=receipt)
+        else:
+            bot.send_message(chat_id=chat_id, text=message)
     except Exception as e:
+        if not queued:
+            metrics.TELEGRAM_SEND_FAILURES.inc()
         logger.error(f'Неудалось отправить сообщение, ошибка: {e}')
+        if receipt is not None:
+            receipt.failed()
+        return False
+    if not queued:
+        metrics.TELEGRAM_SEND_SECONDS.observe(time.monotonic() - started)
+        if receipt is not None:
+            receipt.delivered()
+    logger.info('Сообщение отправлено в чат')
+    return True
 
 
 def get_api_answer(current_timestamp: int) -> Dict[str, Union[list, int]]:
-    """Делает запрос к API сервиса Практикум.Домашка."""
-    timestamp: int = current_timestamp or int(time.time())
-    params = {'from_date': timestamp}
+    """Делает запрос к API сервиса Практикум.Домашка.
+    Разовый запрос через `requests.get`, без пула соединений.
+    """
+    return request_homework_statuses(
+        constants.PRACTICUM_TOKEN, current_timestamp,
+        client=PracticumClient(session=requests),
+    )
+
+
+def fetch_response(
+    client: PracticumClient,
+    token: str,
+    timestamp: int,
+    headers: Optional[Dict[str, str]] = None,
+    stream: bool = False,
+) -> requests.Response:
+    """Выполняет запрос к API и проверяет статус код ответа.
+    Ответ 304 допускается только на условный запрос с `headers`.
+    """
     try:
-        hw_status = requests.get(
-            constants.ENDPOINT,
-            headers=constants.HEADERS,
-            params=params
+        hw_status = client.get(
+            token, timestamp, headers=headers, stream=stream
         )
-        if hw_status.status_code != 200:
-            raise ResponseStatusIsNotOK(
-                f'Статус код ответа от API {hw_status.status_code}'
-            )
-        return hw_status.json()
-    except ResponseStatusIsNotOK:
+    except requests.exceptions.RequestException as error:
+        logger.error(f'Эндпоинт недоступен, ошибка: {error}')
+        raise type(error)(
+            f'Эндпоинт недоступен, ошибка: {error}'
+        ) from error
+    if hw_status.status_code == 304 and headers:
+        return hw_status
+    if hw_status.status_code != 200:
+        hw_status.close()
         logger.error(f'Статус код ответа от API {hw_status.status_code}')
         raise ResponseStatusIsNotOK(
             f'Статус код ответа от API {hw_status.status_code}'
         )
-    except exceptions.JSONDecodeError:
+    return hw_status
+
+
+def request_homework_statuses(
+    token: str,
+    current_timestamp: int,
+    client: Optional[PracticumClient] = None,
+) -> Dict[str, Union[list, int]]:
+    """Делает запрос к API сервиса Практикум.Домашка от имени токена.
+    По умолчанию запрос идёт через общий пул соединений, а одновременные
+    запросы с тем же токеном и курсором — например, от нескольких чатов,
+    подписанных на один токен, — объединяются в один (см. `get_flight`).
+    """
+    timestamp: int = current_timestamp or int(get_clock().time())
+    if client is not None:
+        return fetch_homework_statuses(token, timestamp, client)
+    return get_flight().do(
+        (token, timestamp),
+        lambda: fetch_homework_statuses(token, timestamp, get_client()),
+    )
+
+
+def fetch_homework_statuses(
+    token: str, timestamp: int, client: PracticumClient
+) -> Dict[str, Union[list, int]]:
+    """Запрашивает статусы работ через `client` с учётом его кеша."""
+    cache = client.cache
+    if cache is not None:
+        cached = cache.get_fresh(token, timestamp)
+        if cached is not None:
+            return cached
+    hw_status = fetch_response(
+        client, token, timestamp,
+        headers=cache.request_headers(token, timestamp) if cache else None,
+    )
+    if hw_status.status_code == 304:
+        try:
+            return cache.not_modified_response(token, timestamp, hw_status)
+        except KeyError:
+            logger.debug('Ответ вытеснен из кеша, запрашиваем его заново')
+            hw_status = fetch_response(client, token, timestamp)
+    try:
+        if cache is not None:
+            return cache.store(token, timestamp, hw_status)
+        return hw_status.json()
+    except ValueError as error:
         logger.error('Не удалось декодировать в json.')
-        raise exceptions.JSONDecodeError('Не удалось декодировать в json.')
-    except requests.exceptions.HTTPError as HTTPError:
-        status_code = hw_status.status_code
-        logger.error(f'Эндпоинт недоступен, ошибка: {HTTPError} {status_code}')
-        raise HTTPError(
-            f'Эндпоинт недоступен, ошибка: {HTTPError} {status_code}'
-        )
-    except exceptions.ConnectionError as ConnectionError:
-        logger.error(f'Эндпоинт недоступен, ошибка: {ConnectionError}')
-        raise ConnectionError(
-            f'Эндпоинт недоступен, ошибка: {ConnectionError}'
-        )
-    except exceptions.RequestException as RequestException:
-        logger.error(f'Эндпоинт недоступен, ошибка: {RequestException}')
-        raise RequestException(
-            f'Эндпоинт недоступен, ошибка: {RequestException}'
-        )
+        raise ResponseIsNotJSON('Не удалось декодировать в json.') from error
+
+
+def stream_homework_statuses(
+    token: str,
+    current_timestamp: int,
+    client: Optional[PracticumClient] = None,
+) -> HomeworkStream:
+    """Запрашивает статусы работ токена в потоковом режиме.
+    Тело ответа читается по мере обхода возвращённого потока, поэтому
+    расход памяти не зависит от длины истории. Кэш ответов не
+    используется.
+    """
+    timestamp: int = current_timestamp or int(get_clock().time())
+    hw_status = fetch_response(
+        client or get_client(), token, timestamp, stream=True
+    )
+    return HomeworkStream(iter_body(hw_status))
 
 
 def check_response(
     response: Dict[str, Union[list, int]]
 ) -> List[Dict[str, Union[list, int]]]:
     """Проверяет ответ API на корректность."""
-    if not response or not isinstance(response, dict):
-        raise TypeError('В ответе API ничего нет или это не словарь')
-    homeworks: Optional(list) = response.get('homeworks')
-    current_date: Optional(int) = response.get('current_date')
-    if homeworks is None or current_date is None:
-        raise TypeError('В ответе API нет ключей `homeworks` и `current_date`')
-    if not isinstance(homeworks, list) or not isinstance(current_date, int):
-        raise TypeError(
-            'В ответе API не ожидаемые типы значений '
-            'ключей `homeworks` и `current_date`'
-        )
+    homeworks, _ = check_shape(response)
     return homeworks
 
 
 def parse_status(homework: Dict[str, Union[list, int]]) -> str:
     """Извлекает из информации(homework: dict) статус работы."""
-    homework_name: Optional(str) = homework.get('homework_name')
-    homework_status: Optional(str) = homework.get('status')
-    if homework_status not in constants.HOMEWORK_STATUSES:
-        raise KeyError(
-            f'{homework_status} - недокументированный или отсутствует '
-            'статус домашней работы '
-        )
-    verdict: Optional(str) = constants.HOMEWORK_STATUSES.get(homework_status)
-    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+    return homework_message(homework)
 
 
 def check_tokens() -> bool:
@@ -136,6 +263,542 @@ def check_tokens() -> bool:
     return all(variables.values())
 
 
+def handle_response(
+    subscription: Subscription, response: Dict[str, Union[list, int]]
+) -> List[str]:
+    """Разбирает ответ API для подписки.
+    Возвращает уведомления обо всех работах, чей статус изменился и ещё не
+    отправлялся, в порядке `date_updated`, склеенные в одно сообщение.
+    Повторы и записи старше известного состояния работы отсеивает таблица
+    статусов подписки; если до этого был сбой, первым идёт сообщение о
+    восстановлении.
+    Работы с недокументированным статусом пропускаются; если других нет,
+    выбрасывается ошибка разбора первой из них. Разбираются только ещё не
+    отправленные записи, уже отправленные отсеиваются по ключу.
+    """
+    items, _ = check_shape(response)
+    store = get_store()
+    new_homeworks: List[Homework] = []
+    errors: List[KeyError] = []
+    for item in items:
+        if isinstance(item, dict):
+            key = sent_key(item)
+            if key in subscription.in_flight or store.is_sent(
+                subscription, key
+            ):
+                continue
+        try:
+            homework = parse_homework(item)
+        except KeyError as error:
+            errors.append(error)
+            continue
+        if is_status_change(subscription, homework):
+            new_homeworks.append(homework)
+    new_homeworks.sort(key=lambda homework: homework.date_updated)
+    for error in errors:
+        logger.error(f'Не удалось разобрать статус работы: {error}')
+    if errors and not new_homeworks:
+        raise errors[0]
+    if not new_homeworks:
+        logger.debug('Статус не обновился')
+    statuses: List[str] = [homework.message for homework in new_homeworks]
+    recovered = subscription.digest.recover(get_clock().time())
+    subscription.errors = 0
+    return ([recovered] if recovered else []) + fold_messages(statuses)
+
+
+def is_status_change(subscription: Subscription, homework: Homework) -> bool:
+    """Меняет ли запись состояние работы; пропуски статусов пишет в лог."""
+    transition = subscription.statuses.diff(
+        homework_key(homework.raw), homework.status,
+        homework_time(homework.raw),
+    )
+    if transition is None:
+        logger.debug(f'Статус работы {homework.homework_name} не изменился')
+        return False
+    if transition.skipped:
+        logger.warning(
+            f'Работа {homework.homework_name}: пропущен статус '
+            f'{", ".join(transition.skipped)} между {transition.old} '
+            f'и {transition.new}'
+        )
+    return True
+
+
+def commit_response(
+    subscription: Subscription, response: Dict[str, Union[list, int]]
+) -> None:
+    """Отмечает работы из ответа обработанными и сдвигает курсор.
+    Переходы статусов записываются в таблицу статусов подписки.
+    """
+    store = get_store()
+    for homework in response['homeworks']:
+        store.mark_sent(subscription, sent_key(homework))
+    subscription.statuses.update(response['homeworks'])
+    if response['homeworks']:
+        subscription.last_status = max(
+            response['homeworks'],
+            key=lambda homework: str(homework.get('date_updated', '')),
+        ).get('status')
+    subscription.current_date = response['current_date']
+    store.save_cursor(subscription)
+
+
+def handle_error(
+    subscription: Subscription, error: Exception
+) -> Optional[str]:
+    """Логирует сбой опроса подписки и учитывает его в сводке сбоев.
+    Возвращает текст уведомления, если пора сообщить о сбое: о первом
+    сразу, дальше — сводкой не чаще раза в `ERROR_DIGEST_INTERVAL`.
+    """
+    logger.error(f'Сбой в работе программы: {error}')
+    metrics.POLL_ERRORS.inc(category=error_category(error))
+    subscription.errors += 1
+    return subscription.digest.record(error, get_clock().time())
+
+
+def subscription_context(subscription: Subscription) -> ContextManager[None]:
+    """Поля подписки для записей лога; токен в лог не попадает."""
+    return log_context(
+        subscription=subscription_id(subscription),
+        chat_id=subscription.chat_id,
+    )
+
+
+def deliver_response(
+    bot: telegram.Bot,
+    subscription: Subscription,
+    response: Dict[str, Union[list, int]],
+    messages: List[str],
+) -> None:
+    """Отправляет уведомления по ответу API и фиксирует ответ после доставки.
+    Курсор сдвигается и работы отмечаются отправленными, только когда
+    доставлены все уведомления: сразу при прямой отправке, а через очередь —
+    по её подтверждению. Пока уведомления в пути, их ключи лежат в
+    `subscription.in_flight`, и повторный опрос их не дублирует; при
+    неудаче ключи освобождаются, и ответ будет обработан повторно.
+    """
+    keys = {
+        sent_key(homework) for homework in response['homeworks']
+        if isinstance(homework, dict)
+    }
+
+    def delivered() -> None:
+        with subscription.lock:
+            subscription.in_flight -= keys
+            commit_response(subscription, response)
+
+    def failed() -> None:
+        with subscription.lock:
+            subscription.in_flight -= keys
+
+    if not messages:
+        # Ответ с уведомлениями в пути зафиксирует подтверждение их доставки
+        if not keys & subscription.in_flight:
+            delivered()
+        return
+    subscription.in_flight |= keys
+    receipt = Receipt(len(messages), delivered, failed)
+    for message in messages:
+        if not send_chat_message(bot, subscription.chat_id, message, receipt):
+            return
+
+
+def poll_subscription(bot: telegram.Bot, subscription: Subscription) -> None:
+    """Опрашивает API для одной подписки и уведомляет её чат.
+    Курсор сдвигается только после доставки уведомлений, так что при сбое
+    отправки ответ будет запрошен и обработан повторно.
+    """
+    with subscription_context(subscription):
+        try:
+            response = request_homework_statuses(
+                subscription.token, subscription.current_date
+            )
+            with subscription.lock:
+                messages = handle_response(subscription, response)
+                metrics.mark_success()
+                deliver_response(bot, subscription, response, messages)
+        except Exception as error:
+            message = handle_error(subscription, error)
+            if message:
+                send_chat_message(bot, subscription.chat_id, message)
+
+
+def ingest_push(
+    bot: telegram.Bot,
+    registry: SubscriptionRegistry,
+    token: str,
+    response: Dict[str, Union[list, int]],
+) -> int:
+    """Обрабатывает присланный в webhook ответ API, как ответ на опрос.
+    Каждая подписка обрабатывается под её блокировкой, так что push не
+    пересекается с опросом той же подписки, а курсор подписки push только
+    сдвигает вперёд.
+    Возвращает число подписок, которым отправлены уведомления.
+    """
+    check_response(response)
+    subscriptions = registry.by_token(token)
+    if not subscriptions:
+        raise UnknownSubscription('Нет подписки на этот токен')
+    notified = 0
+    for subscription in subscriptions:
+        with subscription_context(subscription), subscription.lock:
+            pushed = dict(response, current_date=max(
+                subscription.current_date, response['current_date']
+            ))
+            messages = handle_response(subscription, pushed)
+            deliver_response(bot, subscription, pushed, messages)
+            notified += bool(messages)
+    return notified
+
+
+BackfillEntry = Tuple[str, str, SentKey, str, Hashable, int]
+
+
+def collect_backfill(
+    subscription: Subscription, stream: HomeworkStream
+) -> List[BackfillEntry]:
+    """Отбирает из потока ещё не отправленные подписке уведомления.
+    Из каждой записи сохраняются только `(date_updated, текст, ключ,
+    статус, ключ в таблице статусов, время обновления)`, сами записи
+    ответа в памяти не накапливаются.
+    """
+    store = get_store()
+    pending: List[BackfillEntry] = []
+    for homework in parse_homeworks(
+        stream,
+        on_invalid=lambda item, error: logger.error(
+            f'Не удалось разобрать статус работы: {error}'
+        ),
+    ):
+        key = homework.sent_key
+        if not store.is_sent(subscription, key):
+            pending.append((
+                homework.date_updated, homework.message, key, homework.status,
+                homework_key(homework.raw), homework_time(homework.raw),
+            ))
+    return pending
+
+
+def backfill_chat(
+    bot: telegram.Bot,
+    subscriptions: List[Subscription],
+    from_date: int,
+    client: Optional[PracticumClient] = None,
+) -> int:
+    """Догоняет историю всех подписок одного чата начиная с `from_date`.
+    Уведомления по всем подпискам чата склеиваются и отправляются одной
+    пачкой; после их доставки курсоры сдвигаются, а переходы статусов
+    записываются в таблицы статусов подписок, как в `commit_response`.
+    Возвращает число отправленных уведомлений.
+    """
+    batches = []
+    for subscription in subscriptions:
+        try:
+            with subscription_context(subscription):
+                stream = stream_homework_statuses(
+                    subscription.token, from_date, client=client
+                )
+                pending = collect_backfill(subscription, stream)
+        except Exception as error:
+            logger.error(
+                f'Не удалось загрузить историю {subscription!r}: {error}'
+            )
+            continue
+        batches.append((subscription, stream.current_date, pending))
+    entries = sorted(
+        (entry for _, _, pending in batches for entry in pending),
+        key=lambda entry: entry[:2],
+    )
+
+    def delivered() -> None:
+        store = get_store()
+        for subscription, current_date, pending in batches:
+            with subscription.lock:
+                for entry in sorted(pending, key=lambda entry: entry[0]):
+                    _, _, key, status, table_key, updated = entry
+                    store.mark_sent(subscription, key)
+                    subscription.statuses.observe(table_key, status, updated)
+                    subscription.last_status = status
+                subscription.current_date = max(
+                    subscription.current_date, current_date
+                )
+                store.save_cursor(subscription)
+
+    messages = fold_messages([entry[1] for entry in entries])
+    if not messages:
+        delivered()
+        return 0
+    receipt = Receipt(len(messages), delivered)
+    if not all(
+        send_chat_message(bot, subscriptions[0].chat_id, message, receipt)
+        for message in messages
+    ):
+        return 0
+    return len(entries)
+
+
+def backfill(
+    bot: telegram.Bot,
+    registry: SubscriptionRegistry,
+    from_date: int,
+    workers: int = 1,
+    client: Optional[PracticumClient] = None,
+) -> int:
+    """Догоняет историю уведомлений всех подписок с `from_date`.
+    API отдаёт историю одним ответом начиная с `from_date`, поэтому
+    каждый токен запрашивается один раз в потоковом режиме. Чаты
+    обрабатываются параллельно, не больше `workers` одновременно.
+    Возвращает общее число отправленных уведомлений.
+    """
+    chats: Dict[str, List[Subscription]] = {}
+    for subscription in registry:
+        chats.setdefault(str(subscription.chat_id), []).append(subscription)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(
+            lambda subscriptions: backfill_chat(
+                bot, subscriptions, from_date, client=client
+            ),
+            chats.values(),
+        ))
+
+
+def shard_port(port: str, index: Optional[int] = None) -> int:
+    """Порт сервера шарда: шарды слушают соседние порты по номеру.
+    Без `index` — порт своего шарда.
+    """
+    if index is None:
+        index = constants.SHARD_INDEX
+    return int(port) + index
+
+
+def route_push(
+    bot: telegram.Bot,
+    registry: SubscriptionRegistry,
+    token: str,
+    response: Dict[str, Union[list, int]],
+) -> int:
+    """Обрабатывает push своего шарда, а чужой пересылает шарду-владельцу.
+    Шарды одного `supervise` слушают соседние порты на одном хосте, поэтому
+    push можно присылать в webhook любого шарда.
+    """
+    owner = shard_index(token, constants.SHARD_COUNT)
+    if owner == constants.SHARD_INDEX:
+        return ingest_push(bot, registry, token, response)
+    host = constants.WEBHOOK_HOST
+    if host in ('', '0.0.0.0', '::'):
+        host = '127.0.0.1'
+    url = (
+        f'http://{host}:{shard_port(constants.WEBHOOK_PORT, owner)}'
+        f'{constants.WEBHOOK_PATH}'
+    )
+    try:
+        reply = requests.post(
+            url,
+            json=response,
+            headers={
+                'Authorization': f'OAuth {token}',
+                'X-Webhook-Secret': constants.WEBHOOK_SECRET,
+            },
+            timeout=(
+                constants.API_CONNECT_TIMEOUT, constants.API_READ_TIMEOUT
+            ),
+        )
+        payload = reply.json()
+    except (requests.exceptions.RequestException, ValueError) as error:
+        raise ShardUnavailable(f'Шард {owner} недоступен: {error}') from error
+    if reply.status_code == 404:
+        raise UnknownSubscription(payload.get('error'))
+    if reply.status_code == 400:
+        raise ValueError(payload.get('error'))
+    if reply.status_code != 200:
+        raise ShardUnavailable(
+            f'Шард {owner} ответил {reply.status_code}: {payload.get("error")}'
+        )
+    return payload['notified']
+
+
+def start_webhook(
+    bot: telegram.Bot, registry: SubscriptionRegistry
+) -> WebhookServer:
+    """Запускает приём статусов через webhook.
+    Без секрета или с секретом-заглушкой из примера настроек webhook не
+    запускается.
+    """
+    if not constants.WEBHOOK_SECRET:
+        logger.critical(
+            'Для webhook нужна переменная окружения: WEBHOOK_SECRET')
+        raise MissingEnvironmentVariable
+    if constants.WEBHOOK_SECRET in PLACEHOLDER_SECRETS:
+        logger.critical(
+            'WEBHOOK_SECRET совпадает с примером из .env.tamplate, '
+            'задайте свой секрет')
+        raise MissingEnvironmentVariable
+    return WebhookServer(
+        (constants.WEBHOOK_HOST, shard_port(constants.WEBHOOK_PORT)),
+        ingest=lambda token, response: route_push(
+            bot, registry, token, response
+        ),
+        secret=constants.WEBHOOK_SECRET,
+        path=constants.WEBHOOK_PATH,
+    ).start()
+
+
+def subscription_pairs() -> List[Tuple[str, str]]:
+    """Подписки `(token, chat_id)` из окружения и файла подписок.
+    Отсутствующий файл подписок означает, что дополнительных подписок нет.
+    При `SHARD_COUNT > 1` остаются только подписки своего шарда.
+    """
+    pairs = [(constants.PRACTICUM_TOKEN, constants.TELEGRAM_CHAT_ID)]
+    if constants.SUBSCRIPTIONS_FILE:
+        try:
+            pairs.extend(read_subscriptions(constants.SUBSCRIPTIONS_FILE))
+        except FileNotFoundError:
+            logger.warning(
+                f'Файл подписок {constants.SUBSCRIPTIONS_FILE} не найден, '
+                f'дополнительных подписок нет'
+            )
+    return select_shard(pairs, constants.SHARD_INDEX, constants.SHARD_COUNT)
+
+
+def restore_cursor(subscription: Subscription, current_timestamp: int) -> None:
+    """Восстанавливает курсор подписки из хранилища состояния."""
+    subscription.current_date = (
+        get_store().load_cursor(subscription) or current_timestamp
+    )
+
+
+def load_registry(current_timestamp: int) -> SubscriptionRegistry:
+    """Собирает реестр подписок из окружения и файла подписок.
+    Курсор подписки восстанавливается из хранилища состояния.
+    """
+    registry = SubscriptionRegistry()
+    for subscription in registry.sync(
+        subscription_pairs(), current_timestamp
+    )[0]:
+        restore_cursor(subscription, current_timestamp)
+    return registry
+
+
+def get_polling_policy() -> PollingPolicy:
+    """Политика интервала опроса по настройке `POLLING_POLICY`."""
+    if constants.POLLING_POLICY == 'adaptive':
+        return AdaptivePollingPolicy(constants.RETRY_TIME)
+    return FixedPollingPolicy(constants.RETRY_TIME)
+
+
+def build_scheduler(
+    bot: telegram.Bot,
+    registry: SubscriptionRegistry,
+    clock: Optional[Clock] = None,
+) -> PollingScheduler:
+    """Планировщик опроса подписок реестра.
+    Время и ожидание берутся из `clock`, по умолчанию из общего
+    источника времени процесса (см. `clock.set_clock`).
+    """
+    clock = clock or get_clock()
+    return PollingScheduler(
+        registry,
+        poll=lambda subscription: poll_subscription(bot, subscription),
+        interval=constants.RETRY_TIME,
+        workers=constants.POLLING_WORKERS,
+        policy=get_polling_policy(),
+        clock=clock.time,
+        sleep=clock.sleep,
+    )
+
+
+def reload_config(
+    registry: SubscriptionRegistry,
+    scheduler: PollingScheduler,
+    notifier: Optional[FanOut] = None,
+) -> None:
+    """Перечитывает настройки и список подписок без остановки цикла.
+    Настройки подменяются разом; если подписки прочитать не удалось,
+    прежние настройки возвращаются. Оставшиеся подписки сохраняют курсор
+    и состояние ошибок, новые восстанавливают курсор из хранилища.
+    Клиент API пересоздаётся при смене его настроек, бот в очереди
+    `notifier` — при смене настроек Telegram; настройки, которые читаются
+    только при запуске, пишутся в лог как требующие перезапуска.
+    """
+    previous = apply_settings(read_settings())
+    try:
+        pairs = subscription_pairs()
+    except (OSError, ValueError) as error:
+        apply_settings(previous)
+        logger.error(f'Настройки не перезагружены: {error}')
+        return
+    now = int(get_clock().time())
+    added, removed = registry.sync(pairs, now)
+    for subscription in added:
+        restore_cursor(subscription, now)
+        scheduler.add(subscription)
+    scheduler.interval = constants.RETRY_TIME
+    scheduler.policy = get_polling_policy()
+    for subscription in registry:
+        subscription.digest.window = constants.ERROR_WINDOW
+        subscription.digest.interval = constants.ERROR_DIGEST_INTERVAL
+    if _log_handler is not None:
+        _log_handler.setFormatter(make_log_formatter())
+    if previous.keys() & CLIENT_SETTINGS:
+        reset_client()
+    restart = previous.keys() & RESTART_REQUIRED
+    if previous.keys() & BOT_SETTINGS:
+        if notifier is None:
+            restart |= previous.keys() & BOT_SETTINGS
+        else:
+            replace_bot(notifier)
+    applied = previous.keys() - restart
+    logger.info(
+        f'Настройки перезагружены, изменились: '
+        f'{", ".join(sorted(applied)) or "нет"}; подписок добавлено '
+        f'{len(added)}, удалено {len(removed)}'
+    )
+    if restart:
+        logger.warning(
+            f'Изменения вступят в силу после перезапуска: '
+            f'{", ".join(sorted(restart))}'
+        )
+
+
+def replace_bot(notifier: FanOut) -> None:
+    """Подставляет в очередь Telegram бота по новым настройкам.
+    Сообщения, которые уже отправляются, уходят через прежнего бота.
+    """
+    for destination in notifier.destinations:
+        if isinstance(destination, Outbox):
+            destination.bot = make_bot()
+
+
+def shutdown(notifier: FanOut, scheduler: PollingScheduler) -> None:
+    """Дожидается начатых опросов и очереди уведомлений, сохраняет курсоры.
+    Очередь уведомлений ждём не дольше `SHUTDOWN_TIMEOUT` секунд.
+    """
+    scheduler.close()
+    notifier.stop(constants.SHUTDOWN_TIMEOUT)
+    get_store().flush()
+    logger.info('Программа остановлена')
+
+
+def run_polling(notifier: FanOut, registry: SubscriptionRegistry) -> None:
+    """Опрашивает подписки до SIGTERM; по SIGHUP перечитывает настройки."""
+    scheduler = build_scheduler(notifier, registry)
+    reload_requested = threading.Event()
+
+    def on_idle() -> None:
+        if reload_requested.is_set():
+            reload_requested.clear()
+            reload_config(registry, scheduler, notifier)
+
+    install_signal_handlers(
+        on_stop=scheduler.stop, on_reload=reload_requested.set
+    )
+    try:
+        scheduler.run_forever(on_idle=on_idle)
+    finally:
+        shutdown(notifier, scheduler)
+
+
 def main() -> None:
     """Основная логика работы бота."""
     if not check_tokens():
@@ -146,33 +809,120 @@ def main() -> None:
 
     logger.info('Программа работает')
 
-    bot = telegram.Bot(token=constants.TELEGRAM_TOKEN)
-    current_timestamp: int = int(time.time())
-    submitted_error: str = ''
-    while True:
+    notifier = build_notifier(make_bot()).start()
+    registry = load_registry(int(get_clock().time()))
+    logger.info(f'Подписок в работе: {len(registry)}')
+    if constants.METRICS_PORT:
+        MetricsServer(
+            (constants.METRICS_HOST, shard_port(constants.METRICS_PORT))
+        ).start()
+    if constants.WEBHOOK_PORT:
+        webhook = start_webhook(notifier, registry)
+        if not constants.POLLING_ENABLED:
+            install_signal_handlers(
+                on_stop=webhook.shutdown, on_reload=lambda: None
+            )
+            webhook.thread.join()
+            notifier.stop(constants.SHUTDOWN_TIMEOUT)
+            return
+    run_polling(notifier, registry)
+
+
+def parse_timestamp(value: str) -> int:
+    """Разбирает метку времени Unix или дату в формате ISO 8601.
+    Дата без пояса считается в поясе `TIMEZONE`, а без него — в местном
+    времени, как и время в логах.
+    """
+    if value.isdigit():
+        return int(value)
+    try:
+        moment = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f'Ожидается метка времени или дата ISO 8601: {value}'
+        )
+    if moment.tzinfo is None and constants.TIMEZONE:
         try:
-            type_response = Dict[str, Union[list, int]]
-            response: type_response = get_api_answer(current_timestamp)
-            current_homeworks: list = check_response(response=response)
-
-            if current_homeworks:
-                homework_status: str = parse_status(current_homeworks[0])
-            if current_homeworks:
-                send_message(bot=bot, message=homework_status)
-            else:
-                logger.debug('Статус не обновился')
-            current_timestamp = response['current_date']
-            submitted_error = ''
+            timezone = pytz.timezone(constants.TIMEZONE)
+        except pytz.UnknownTimeZoneError:
+            raise argparse.ArgumentTypeError(
+                f'Неизвестный часовой пояс TIMEZONE: {constants.TIMEZONE}'
+            )
+        moment = timezone.localize(moment)
+    return int(moment.timestamp())
 
-        except Exception as error:
-            message: str = f'Сбой в работе программы: {error}'
-            logger.error(message)
-            if message != submitted_error:
-                send_message(bot=bot, message=message)
-                submitted_error = message
-        finally:
-            time.sleep(constants.RETRY_TIME)
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Разбирает аргументы командной строки."""
+    parser = argparse.ArgumentParser(
+        description='Бот уведомлений о статусах домашних работ.'
+    )
+    parser.add_argument(
+        '--check', action='store_true',
+        help='только проверить переменные окружения и выйти',
+    )
+    commands = parser.add_subparsers(dest='command')
+    backfill_parser = commands.add_parser(
+        'backfill', help='разослать уведомления за прошедший период'
+    )
+    backfill_parser.add_argument(
+        '--from-date', type=parse_timestamp, required=True,
+        help='начало периода: метка времени Unix или дата ISO 8601',
+    )
+    backfill_parser.add_argument(
+        '--workers', type=int, default=constants.BACKFILL_WORKERS,
+        help='сколько чатов обрабатывать параллельно',
+    )
+    supervise_parser = commands.add_parser(
+        'supervise', help='запустить бота в нескольких процессах-шардах'
+    )
+    supervise_parser.add_argument(
+        '--workers', type=int, default=os.cpu_count() or 1,
+        help='число процессов; подписки делятся между ними по токену',
+    )
+    return parser.parse_args(argv)
+
+
+def backfill_main(from_date: int, workers: int) -> None:
+    """Рассылает уведомления за период с `from_date` и завершается."""
+    if not check_tokens():
+        logger.critical(
+            'Отсутствуют обязательные переменные окружения. '
+            'Программа принудительно остановлена.')
+        raise MissingEnvironmentVariable
+    notifier = build_notifier(make_bot()).start()
+    registry = load_registry(int(get_clock().time()))
+    try:
+        sent = backfill(notifier, registry, from_date, workers=workers)
+    finally:
+        notifier.stop()
+    logger.info(f'Догрузка истории завершена, уведомлений: {sent}')
+
+
+def supervise_main(workers: int) -> None:
+    """Запускает `workers` процессов бота и следит за ними.
+    SIGTERM останавливает шарды, SIGHUP пересылается им.
+    """
+    if not constants.STATE_DB:
+        logger.critical('Для шардов нужна общая база состояния: STATE_DB')
+        raise MissingEnvironmentVariable
+    logger.info(f'Запуск шардов: {workers}')
+    supervisor = Supervisor(
+        workers, [sys.executable, os.path.abspath(__file__)]
+    )
+    install_signal_handlers(
+        on_stop=supervisor.interrupt, on_reload=supervisor.send_signal
+    )
+    supervisor.run_forever()
 
 
 if __name__ == '__main__':
-    main()
+    args = parse_args()
+    if args.check:
+        sys.exit(0 if check_tokens() else 1)
+    if args.command == 'backfill':
+        backfill_main(args.from_date, args.workers)
+    elif args.command == 'supervise':
+        supervise_main(args.workers)
+    else:
+        main()
@@ -0,0 +1,25 @@
+import importlib.util
+import sys
+
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Модуль верхнего уровня, который загрузится при первом обращении.
+    До первого обращения к атрибуту в `sys.modules` лежит пустая обёртка,
+    поэтому тяжёлые зависимости (`telegram`, `requests`, `pytz`) не
+    замедляют запуск, если до них не дошло дело. Уже загруженный модуль
+    возвращается как есть.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f'No module named {name!r}', name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,93 @@
+import importlib.util
+import logging
+import os
+import signal
+
+from typing import Any, Callable, Dict, Set
+
+from dotenv import dotenv_values, find_dotenv
+
+import constants
+
+logger = logging.getLogger(__name__)
+
+# Настройки, которые читаются только при запуске: серверы, шарды, хранилище
+# и получатели уведомлений создаются один раз
+RESTART_REQUIRED = frozenset({
+    'SHARD_INDEX', 'SHARD_COUNT', 'POLLING_WORKERS', 'POLLING_ENABLED',
+    'WEBHOOK_PORT', 'WEBHOOK_HOST', 'WEBHOOK_PATH', 'WEBHOOK_SECRET',
+    'METRICS_PORT', 'METRICS_HOST', 'IO_THREADS', 'STATE_DB',
+    'BREAKER_FAILURES', 'BREAKER_BASE_DELAY', 'BREAKER_MAX_DELAY',
+    'TELEGRAM_GLOBAL_RATE', 'TELEGRAM_CHAT_RATE', 'NOTIFY_SINKS',
+    'SINK_RATE', 'SINK_WORKERS', 'NOTIFY_WEBHOOK_URL', 'SMTP_HOST',
+    'SMTP_PORT', 'SMTP_FROM', 'SMTP_TO', 'NOTIFY_FILE',
+})
+# Настройки клиента API Практикума и клиента Telegram: при их смене
+# клиенты создаются заново
+CLIENT_SETTINGS = frozenset({
+    'ENDPOINT', 'API_POOL_SIZE', 'API_CONNECT_TIMEOUT', 'API_READ_TIMEOUT',
+    'API_CACHE', 'API_DEDUP_TTL', 'RETRY_TIME',
+})
+BOT_SETTINGS = frozenset({
+    'TELEGRAM_TOKEN', 'TELEGRAM_API_URL', 'TELEGRAM_CLIENT',
+})
+
+# Переменные, попавшие в окружение из `.env`, а не заданные процессу
+_dotenv_keys: Set[str] = set(os.environ) - constants.PROCESS_ENVIRON
+
+
+def read_settings() -> Dict[str, Any]:
+    """Заново вычисляет настройки `constants` из окружения и `.env`.
+    Как и при запуске, значения из `.env` не перекрывают переменные
+    окружения, заданные процессу при старте; переменные, убранные из
+    `.env`, убираются и из окружения. `constants` не меняется.
+    """
+    global _dotenv_keys
+    values = {
+        key: value for key, value in dotenv_values(find_dotenv()).items()
+        if key not in constants.PROCESS_ENVIRON and value is not None
+    }
+    for key in _dotenv_keys - set(values):
+        os.environ.pop(key, None)
+    _dotenv_keys = set(values)
+    os.environ.update(values)
+    spec = importlib.util.find_spec('constants')
+    fresh = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(fresh)
+    return {
+        name: value for name, value in vars(fresh).items()
+        if name.isupper() and name != 'PROCESS_ENVIRON'
+    }
+
+
+def apply_settings(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Подставляет настройки в `constants` одним обновлением.
+    Возвращает прежние значения изменившихся настроек, так что
+    `apply_settings(previous)` откатывает изменение.
+    """
+    previous = {
+        name: getattr(constants, name) for name, value in settings.items()
+        if getattr(constants, name, value) != value
+    }
+    vars(constants).update({name: settings[name] for name in previous})
+    return previous
+
+
+def install_signal_handlers(
+    on_stop: Callable[[], None], on_reload: Callable[[], None]
+) -> None:
+    """SIGTERM вызывает `on_stop`, SIGHUP — `on_reload`.
+    Обработчики выполняются в главном потоке между операциями, поэтому
+    им стоит только выставлять флаги, а работу делать в основном цикле.
+    """
+    def stop(signum: int, frame: Any) -> None:
+        logger.info('Получен SIGTERM, завершаем работу')
+        on_stop()
+
+    def reload(signum: int, frame: Any) -> None:
+        logger.info('Получен SIGHUP, перечитываем настройки')
+        on_reload()
+
+    signal.signal(signal.SIGTERM, stop)
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, reload)
@@ -0,0 +1,150 @@
+import atexit
+import contextlib
+import contextvars
+import datetime
+import json
+import logging
+import queue
+import time
+
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Iterator, Optional
+
+from lazy import lazy_import
+
+pytz = lazy_import('pytz')
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_context: 'contextvars.ContextVar[Dict[str, Any]]' = contextvars.ContextVar(
+    'log_context', default={}
+)
+
+
+@contextlib.contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """Добавляет поля ко всем записям лога внутри блока."""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Переносит поля `log_context` в запись для обработчиков без очереди.
+    Контекст у каждого потока свой, поэтому поля нужно снимать в потоке,
+    который пишет запись.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Добавляет к записи поля текущего контекста."""
+        record.context = _context.get()
+        return True
+
+
+class ContextQueueHandler(QueueHandler):
+    """Кладёт записи в очередь вместе с полями `log_context`.
+    В вызывающем потоке только подставляются аргументы сообщения и
+    форматируется трассировка исключения; время, формат и вывод остаются
+    потоку `QueueListener`.
+    """
+
+    exception_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Готовит запись к передаче в поток вывода."""
+        record.context = _context.get()
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self.exception_formatter.formatException(
+                record.exc_info
+            )
+            record.exc_info = None
+        return record
+
+
+class TimezoneFormatter(logging.Formatter):
+    """Форматирует время записей в заданном часовом поясе.
+    Объект часового пояса создаётся один раз; без пояса время локальное.
+    """
+
+    def __init__(
+        self, fmt: Optional[str] = None, timezone: Optional[str] = None
+    ) -> None:
+        super().__init__(fmt)
+        self.tz = pytz.timezone(timezone) if timezone else None
+        self._second: Optional[int] = None
+        self._struct: Optional[time.struct_time] = None
+
+    def converter(self, seconds: float) -> time.struct_time:
+        """Время записи; пересчитывается не чаще раза в секунду."""
+        second = int(seconds)
+        if second != self._second:
+            if self.tz is None:
+                self._struct = time.localtime(second)
+            else:
+                self._struct = datetime.datetime.fromtimestamp(
+                    second, tz=self.tz
+                ).timetuple()
+            self._second = second
+        return self._struct
+
+
+class JsonFormatter(TimezoneFormatter):
+    """Пишет записи строками JSON с полями контекста."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Форматирует запись строкой JSON."""
+        entry: Dict[str, Any] = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'context', {}))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def make_formatter(
+    json_lines: bool = False, timezone: Optional[str] = None
+) -> logging.Formatter:
+    """Форматтер текстовых или JSON записей."""
+    if json_lines:
+        return JsonFormatter(timezone=timezone)
+    return TimezoneFormatter(TEXT_FORMAT, timezone=timezone)
+
+
+def attach_queue_handler(
+    logger: logging.Logger, handler: logging.Handler
+) -> QueueListener:
+    """Подключает `handler` к логгеру через очередь.
+    Вызывающий поток только кладёт запись в очередь, а форматирование и
+    запись выполняет поток `QueueListener`. Очередь дописывается при
+    выходе из программы.
+    """
+    records: Any = queue.SimpleQueue()
+    queue_handler = ContextQueueHandler(records)
+    logger.addHandler(queue_handler)
+    listener = QueueListener(records, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+def detach_queue_handler(
+    logger: logging.Logger, listener: QueueListener
+) -> None:
+    """Дописывает очередь и отключает обработчики `attach_queue_handler`."""
+    atexit.unregister(listener.stop)
+    listener.stop()
+    for handler in list(logger.handlers):
+        if isinstance(handler, QueueHandler) and (
+            handler.queue is listener.queue
+        ):
+            logger.removeHandler(handler)
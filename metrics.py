@@ -0,0 +1,363 @@
+import bisect
+import logging
+import math
+import threading
+
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import (
+    Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar,
+)
+
+from clock import get_clock
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+def format_value(value: float) -> str:
+    """Число в формате текстовой выдачи Prometheus."""
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def escape_label(value: str) -> str:
+    """Экранирует значение метки."""
+    return (
+        value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+    )
+
+
+def format_labels(names: Tuple[str, ...], values: LabelValues) -> str:
+    """Метки в фигурных скобках, пустая строка без меток."""
+    if not names:
+        return ''
+    pairs = ','.join(
+        f'{name}="{escape_label(value)}"'
+        for name, value in zip(names, values)
+    )
+    return '{' + pairs + '}'
+
+
+class Metric:
+    """Базовая метрика с набором меток.
+    Значения хранятся по кортежу значений меток в порядке `labelnames`.
+    """
+
+    kind = 'untyped'
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f'Метрика {self.name} ожидает метки {self.labelnames}'
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """Строки выдачи: `(суффикс имени, метки, значение)`."""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        """Строки метрики в текстовом формате Prometheus."""
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        lines.extend(
+            f'{self.name}{suffix}{labels} {format_value(value)}'
+            for suffix, labels, value in self.samples()
+        )
+        return lines
+
+
+class Counter(Metric):
+    """Монотонно растущий счётчик."""
+
+    kind = 'counter'
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        """Увеличивает счётчик."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        """Текущее значение счётчика."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """Значения счётчика по меткам."""
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield '_total', format_labels(self.labelnames, key), value
+
+
+class Gauge(Metric):
+    """Текущее значение; может вычисляться в момент выдачи."""
+
+    kind = 'gauge'
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], Optional[float]]] = None
+
+    def set(self, value: float, **labels: Any) -> None:
+        """Задаёт значение."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function: Callable[[], Optional[float]]) -> None:
+        """Значение без меток берётся из `function` при каждой выдаче.
+        Если функция вернула None, метрика не выдаётся.
+        """
+        self._function = function
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """Значения по меткам."""
+        if self._function is not None:
+            value = self._function()
+            if value is not None:
+                yield '', '', value
+            return
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield '', format_labels(self.labelnames, key), value
+
+
+class Histogram(Metric):
+    """Распределение значений по корзинам."""
+
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """Учитывает наблюдение."""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    def count(self, **labels: Any) -> int:
+        """Число наблюдений."""
+        with self._lock:
+            return sum(self._counts.get(self._key(labels), ()))
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """Корзины, сумма и число наблюдений по меткам."""
+        with self._lock:
+            series = sorted(
+                (key, list(counts), self._sums[key])
+                for key, counts in self._counts.items()
+            )
+        names = self.labelnames + ('le',)
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = format_labels(names, key + (format_value(bound),))
+                yield '_bucket', labels, cumulative
+            labels = format_labels(self.labelnames, key)
+            yield '_sum', labels, total
+            yield '_count', labels, cumulative
+
+
+MetricType = TypeVar('MetricType', bound=Metric)
+
+
+class MetricsRegistry:
+    """Набор метрик процесса."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: MetricType) -> MetricType:
+        """Добавляет метрику в реестр и возвращает её."""
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'Метрика {metric.name} уже есть')
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Текстовая выдача всех метрик в формате Prometheus."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+API_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'homework_api_request_seconds',
+    'Длительность запросов к API Практикум.Домашка',
+))
+API_RESPONSES = REGISTRY.register(Counter(
+    'homework_api_responses',
+    'Ответы API Практикум.Домашка по статус коду; error — без ответа',
+    ('status',),
+))
+RESPONSE_INVALID = REGISTRY.register(Counter(
+    'homework_response_invalid',
+    'Ответы API, не прошедшие проверку формы',
+))
+UNKNOWN_STATUSES = REGISTRY.register(Counter(
+    'homework_unknown_status',
+    'Записи о работах с недокументированным статусом',
+))
+MISSING_NAMES = REGISTRY.register(Counter(
+    'homework_missing_name',
+    'Записи о работах без названия',
+))
+TELEGRAM_SEND_SECONDS = REGISTRY.register(Histogram(
+    'homework_telegram_send_seconds',
+    'Длительность отправки сообщений в Telegram',
+))
+TELEGRAM_SEND_FAILURES = REGISTRY.register(Counter(
+    'homework_telegram_send_failures',
+    'Неудачные попытки отправки сообщений в Telegram',
+))
+OUTBOX_DEPTH = REGISTRY.register(Gauge(
+    'homework_outbox_depth',
+    'Сообщения в очереди Telegram, ожидающие отправки',
+))
+OUTBOX_LATENCY = REGISTRY.register(Histogram(
+    'homework_outbox_latency_seconds',
+    'Время от постановки сообщения в очередь Telegram до его отправки',
+    buckets=DEFAULT_BUCKETS + (60.0, 300.0),
+))
+POLL_ERRORS = REGISTRY.register(Counter(
+    'homework_poll_errors',
+    'Сбои опроса подписок по категории ошибки',
+    ('category',),
+))
+LOOP_SECONDS = REGISTRY.register(Histogram(
+    'homework_poll_loop_seconds',
+    'Длительность одной итерации цикла опроса',
+    buckets=DEFAULT_BUCKETS + (60.0, 300.0),
+))
+LAST_SUCCESS = REGISTRY.register(Gauge(
+    'homework_last_success_timestamp_seconds',
+    'Время последнего успешного опроса API',
+))
+SINCE_LAST_SUCCESS = REGISTRY.register(Gauge(
+    'homework_seconds_since_last_success',
+    'Сколько секунд прошло с последнего успешного опроса API',
+))
+
+_last_success: Optional[float] = None
+
+
+def mark_success(clock: Optional[Callable[[], float]] = None) -> None:
+    """Отмечает успешный опрос API; время по умолчанию из `get_clock()`."""
+    global _last_success
+    _last_success = (clock or get_clock().time)()
+    LAST_SUCCESS.set(_last_success)
+
+
+SINCE_LAST_SUCCESS.set_function(
+    lambda: (
+        None if _last_success is None
+        else get_clock().time() - _last_success
+    )
+)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Отдаёт метрики по `GET /metrics`."""
+
+    server: 'MetricsServer'
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self) -> None:
+        """Отдаёт метрики на `/metrics`."""
+        if self.path.split('?')[0] != '/metrics':
+            status, body, content_type = (
+                HTTPStatus.NOT_FOUND, b'not found\n', 'text/plain'
+            )
+        else:
+            status, body, content_type = (
+                HTTPStatus.OK, self.server.registry.render().encode(),
+                CONTENT_TYPE,
+            )
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Запросы к метрикам пишутся в лог бота на уровне DEBUG."""
+        logger.debug(format % args)
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """HTTP-сервер выдачи метрик."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        registry: MetricsRegistry = REGISTRY,
+    ) -> None:
+        super().__init__(address, MetricsHandler)
+        self.registry = registry
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self, poll_interval: float = 0.5) -> 'MetricsServer':
+        """Запускает сервер в фоновом потоке."""
+        self.thread = threading.Thread(
+            target=self.serve_forever, args=(poll_interval,),
+            name='metrics', daemon=True,
+        )
+        self.thread.start()
+        host, port = self.server_address[:2]
+        logger.info(f'Метрики доступны на {host}:{port}/metrics')
+        return self
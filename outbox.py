@@ -0,0 +1,351 @@
+import heapq
+import logging
+import threading
+import time
+
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+import constants
+import metrics
+
+from clock import get_clock
+
+logger = logging.getLogger(__name__)
+
+ChatId = Union[str, int]
+
+
+def fold_messages(
+    messages: List[str], limit: int = constants.TELEGRAM_MESSAGE_LIMIT
+) -> List[str]:
+    """Склеивает сообщения в как можно меньшее число сообщений Telegram."""
+    folded: List[str] = []
+    for message in messages:
+        if folded and len(folded[-1]) + 2 + len(message) <= limit:
+            folded[-1] = f'{folded[-1]}\n\n{message}'
+        else:
+            folded.append(message)
+    return folded
+
+
+def leading_fit(
+    messages: List[str], limit: int = constants.TELEGRAM_MESSAGE_LIMIT
+) -> int:
+    """Сколько первых сообщений помещается в одно сообщение Telegram."""
+    length = len(messages[0])
+    count = 1
+    for message in messages[1:]:
+        length += 2 + len(message)
+        if length > limit:
+            break
+        count += 1
+    return count
+
+
+class Receipt:
+    """Подтверждение доставки пачки из `count` уведомлений.
+    `on_delivered` вызывается, когда доставлены все уведомления пачки,
+    `on_failed` — при первой окончательной неудаче; после неё
+    подтверждения доставки уже ничего не меняют. Ошибки обработчиков
+    пишутся в лог и не прерывают поток очереди.
+    """
+
+    def __init__(
+        self,
+        count: int,
+        on_delivered: Optional[Callable[[], None]] = None,
+        on_failed: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.remaining = count
+        self.on_delivered = on_delivered
+        self.on_failed = on_failed
+        self.done = False
+        self._lock = threading.Lock()
+
+    def split(self, count: int) -> 'Receipt':
+        """Подтверждение одного уведомления, отправляемого `count` раз."""
+        return Receipt(count, self.delivered, self.failed)
+
+    def delivered(self) -> None:
+        """Отмечает доставку одного уведомления пачки."""
+        with self._lock:
+            if self.done:
+                return
+            self.remaining -= 1
+            if self.remaining > 0:
+                return
+            self.done = True
+        self._call(self.on_delivered)
+
+    def failed(self) -> None:
+        """Отмечает, что уведомление пачки не будет доставлено."""
+        with self._lock:
+            if self.done:
+                return
+            self.done = True
+        self._call(self.on_failed)
+
+    @staticmethod
+    def _call(callback: Optional[Callable[[], None]]) -> None:
+        if callback is None:
+            return
+        try:
+            callback()
+        except Exception as error:
+            logger.error(f'Сбой обработки подтверждения доставки: {error}')
+
+
+Pending = Tuple[str, float, Optional[Receipt]]
+
+
+class TokenBucket:
+    """Ограничитель частоты: `rate` событий в секунду, запас `capacity`.
+    Потокобезопасен: `delay` и `take` можно вызывать из разных потоков.
+    Время по умолчанию берётся из `clock.get_clock()`.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Optional[Callable[[], float]] = None,
+    ) -> None:
+        clock = clock or get_clock().monotonic
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def delay(self) -> float:
+        """Сколько секунд ждать до появления свободного токена."""
+        with self._lock:
+            self._refill()
+            return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        """Забирает токен."""
+        with self._lock:
+            self._refill()
+            self.tokens -= 1
+
+
+class Outbox:
+    """Фоновая очередь исходящих сообщений Telegram.
+    Соблюдает общий лимит `global_rate` сообщений в секунду и лимит
+    `chat_rate` на чат, повторяет отправку после ошибок с `retry_after`
+    и склеивает накопившиеся сообщения одного чата в одно. Метод
+    `send_message` совместим с `telegram.Bot`, поэтому очередь можно
+    передавать вместо бота.
+    Сообщения не теряются: после `max_retries` неудач отправка
+    повторяется с задержкой не больше `max_retry_delay`, пока очередь
+    работает. Сообщения, не отправленные к `stop`, отмечаются
+    неудачными в их `Receipt`, чтобы отправитель не счёл их доставленными.
+    Лимиты, паузы и задержка очереди считаются по `clock`, по умолчанию —
+    по `clock.get_clock()`.
+    """
+
+    def __init__(
+        self,
+        bot: Any,
+        global_rate: float = constants.TELEGRAM_GLOBAL_RATE,
+        chat_rate: float = constants.TELEGRAM_CHAT_RATE,
+        max_retries: int = 5,
+        retry_delay: float = 1.0,
+        max_retry_delay: float = 300.0,
+        clock: Optional[Callable[[], float]] = None,
+    ) -> None:
+        clock = clock or get_clock().monotonic
+        self.bot = bot
+        self.chat_interval = 1 / chat_rate
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.clock = clock
+        self.bucket = TokenBucket(global_rate, clock=clock)
+        self._pending: Dict[ChatId, List[Pending]] = {}
+        self._attempts: Dict[ChatId, int] = {}
+        self._next_send: Dict[ChatId, float] = {}
+        self._queue: List[Tuple[float, int, ChatId]] = []
+        self._counter = 0
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.coalesced = 0
+        self.latencies: Deque[float] = deque(maxlen=1000)
+
+    def send_message(
+        self,
+        chat_id: ChatId = None,
+        text: str = None,
+        receipt: Optional[Receipt] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Ставит сообщение в очередь на отправку.
+        О доставке или окончательной неудаче сообщается в `receipt`.
+        """
+        with self._condition:
+            pending = self._pending.setdefault(chat_id, [])
+            if not pending:
+                self._schedule(
+                    chat_id, max(self.clock(), self._next_send.get(chat_id, 0))
+                )
+            pending.append((text, self.clock(), receipt))
+            self._condition.notify()
+
+    def _schedule(self, chat_id: ChatId, when: float) -> None:
+        self._counter += 1
+        heapq.heappush(self._queue, (when, self._counter, chat_id))
+
+    @property
+    def depth(self) -> int:
+        """Число сообщений, ожидающих отправки."""
+        with self._condition:
+            return sum(len(pending) for pending in self._pending.values())
+
+    def _next_batch(self) -> Optional[Tuple[ChatId, List[Pending]]]:
+        with self._condition:
+            while self._running or self._queue:
+                if not self._queue:
+                    self._condition.wait()
+                    continue
+                when, _, chat_id = self._queue[0]
+                delay = max(when - self.clock(), self.bucket.delay())
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                heapq.heappop(self._queue)
+                self.bucket.take()
+                return chat_id, self._pending.pop(chat_id)
+            return None
+
+    def _send(self, chat_id: ChatId, batch: List[Pending]) -> None:
+        texts = [text for text, _, _ in batch]
+        included = leading_fit(texts)
+        retry_at: Optional[float] = None
+        started = time.monotonic()
+        try:
+            self.bot.send_message(
+                chat_id=chat_id, text='\n\n'.join(texts[:included])
+            )
+        except Exception as error:
+            metrics.TELEGRAM_SEND_FAILURES.inc()
+            retry_after = getattr(error, 'retry_after', None)
+            attempts = self._attempts.get(chat_id, 0) + 1
+            if retry_after is not None:
+                retry_at = self.clock() + retry_after
+                self.retried += 1
+                included = 0
+            elif attempts > self.max_retries and not self._running:
+                logger.error(f'Неудалось отправить сообщение, ошибка: {error}')
+                self._attempts.pop(chat_id, None)
+                self._abandon(batch[:included])
+            else:
+                if attempts == self.max_retries + 1:
+                    logger.error(
+                        f'Неудалось отправить сообщение, ошибка: {error}; '
+                        f'отправка будет повторяться'
+                    )
+                retry_at = self.clock() + min(
+                    self.retry_delay * 2 ** attempts, self.max_retry_delay
+                )
+                self._attempts[chat_id] = attempts
+                self.retried += 1
+                included = 0
+        else:
+            metrics.TELEGRAM_SEND_SECONDS.observe(time.monotonic() - started)
+            now = self.clock()
+            self.sent += 1
+            self.coalesced += included - 1
+            for _, queued, receipt in batch[:included]:
+                self.latencies.append(now - queued)
+                metrics.OUTBOX_LATENCY.observe(now - queued)
+                if receipt is not None:
+                    receipt.delivered()
+            self._attempts.pop(chat_id, None)
+            logger.info('Сообщение отправлено в чат')
+        self._requeue(chat_id, batch[included:], retry_at)
+
+    def _abandon(self, batch: List[Pending]) -> None:
+        self.failed += len(batch)
+        for _, _, receipt in batch:
+            if receipt is not None:
+                receipt.failed()
+
+    def _requeue(
+        self,
+        chat_id: ChatId,
+        rest: List[Pending],
+        retry_at: Optional[float],
+    ) -> None:
+        with self._condition:
+            if retry_at is None:
+                next_send = self.clock() + self.chat_interval
+            else:
+                next_send = retry_at
+            self._next_send[chat_id] = next_send
+            if rest:
+                pending = self._pending.setdefault(chat_id, [])
+                if not pending:
+                    self._schedule(chat_id, next_send)
+                pending[:0] = rest
+            elif chat_id in self._pending:
+                self._schedule(chat_id, next_send)
+            if len(self._next_send) > 10_000:
+                now = self.clock()
+                self._next_send = {
+                    chat: when for chat, when in self._next_send.items()
+                    if when > now
+                }
+            self._condition.notify_all()
+
+    def run(self) -> None:
+        """Цикл отправки; работает до `stop` и опустошения очереди."""
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._send(*batch)
+
+    def start(self) -> 'Outbox':
+        """Запускает отправку в фоновом потоке."""
+        self._running = True
+        metrics.OUTBOX_DEPTH.set_function(lambda: self.depth)
+        self._thread = threading.Thread(
+            target=self.run, name='outbox', daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Дожидается отправки очереди и останавливает поток."""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, float]:
+        """Метрики очереди: глубина, отправки и задержка отправки."""
+        latencies = sorted(self.latencies)
+        return {
+            'depth': self.depth,
+            'sent': self.sent,
+            'failed': self.failed,
+            'retried': self.retried,
+            'coalesced': self.coalesced,
+            'latency_p50': latencies[len(latencies) // 2] if latencies else 0,
+            'latency_max': latencies[-1] if latencies else 0,
+        }
@@ -0,0 +1,92 @@
+import datetime
+import random
+
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional, Tuple
+
+import constants
+
+from lazy import lazy_import
+from subscriptions import Subscription
+
+pytz = lazy_import('pytz')
+
+
+class PollingPolicy(ABC):
+    """Выбирает задержку до следующего опроса подписки."""
+
+    @abstractmethod
+    def next_delay(self, subscription: Subscription, now: float) -> float:
+        """Через сколько секунд опросить подписку снова."""
+
+
+class FixedPollingPolicy(PollingPolicy):
+    """Опрос с постоянным интервалом."""
+
+    def __init__(self, interval: float = constants.RETRY_TIME) -> None:
+        self.interval = interval
+
+    def next_delay(self, subscription: Subscription, now: float) -> float:
+        """Постоянный интервал опроса."""
+        return self.interval
+
+
+class AdaptivePollingPolicy(PollingPolicy):
+    """Интервал опроса по последнему статусу, времени суток и ошибкам.
+    Пока работа на ревью, подписка опрашивается чаще, когда всё принято —
+    реже. Ночью (`quiet_hours` по `constants.TIMEZONE`) интервал
+    увеличивается, после ошибок растёт экспоненциально. Случайный разброс
+    `jitter` не даёт подпискам опрашивать API одновременно.
+    """
+
+    STATUS_FACTORS: Dict[Optional[str], float] = {
+        'reviewing': 0.5,
+        'rejected': 1.0,
+        'approved': 3.0,
+    }
+
+    def __init__(
+        self,
+        interval: float = constants.RETRY_TIME,
+        status_factors: Optional[Dict[Optional[str], float]] = None,
+        quiet_hours: Tuple[int, int] = (1, 8),
+        quiet_factor: float = 2.0,
+        max_delay: float = 3600.0,
+        jitter: float = 0.1,
+        timezone: Optional[str] = None,
+        random: Callable[[], float] = random.random,
+    ) -> None:
+        self.interval = interval
+        self.status_factors = (
+            self.STATUS_FACTORS if status_factors is None else status_factors
+        )
+        self.quiet_hours = quiet_hours
+        self.quiet_factor = quiet_factor
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.timezone = pytz.timezone(
+            timezone or constants.TIMEZONE or 'UTC'
+        )
+        self.random = random
+
+    def is_quiet(self, now: float) -> bool:
+        """Попадает ли момент `now` в ночные часы."""
+        hour = datetime.datetime.fromtimestamp(now, tz=self.timezone).hour
+        start, end = self.quiet_hours
+        if start <= end:
+            return start <= hour < end
+        return hour >= start or hour < end
+
+    def next_delay(self, subscription: Subscription, now: float) -> float:
+        """Интервал по статусу, тихим часам и числу сбоев подписки."""
+        delay = self.interval * self.status_factors.get(
+            subscription.last_status, 1.0
+        )
+        if self.is_quiet(now):
+            delay *= self.quiet_factor
+        if subscription.errors:
+            delay = max(delay, self.interval) * 2 ** min(
+                subscription.errors, 10
+            )
+        delay = min(delay, self.max_delay)
+        return delay * (1 + self.jitter * (2 * self.random() - 1))
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import time
+
+from typing import Any, Dict, Optional, Tuple
+
+import constants
+import metrics
+
+from breaker import (
+    drop_token_breaker, get_breaker, get_token_breaker, parse_retry_after,
+)
+from cache import ResponseCache
+from clock import get_clock
+from exceptions import CircuitBreakerOpen
+from lazy import lazy_import
+from singleflight import SingleFlight
+
+requests = lazy_import('requests')
+
+
+class PracticumClient:
+    """Клиент API Практикум.Домашка.
+    Держит `requests.Session` с пулом keep-alive соединений, который
+    переиспользуется между опросами и подписками, и задаёт таймауты на
+    подключение и чтение для каждого запроса. Если передан `cache`,
+    `request_homework_statuses` использует его для условных запросов.
+    Сбои эндпоинта (ошибки соединения и 5xx) учитываются общим для
+    эндпоинта автоматом защиты `breaker.CircuitBreaker`, а 429 — автоматом
+    токена (`breaker.get_token_breaker`): лимит одного токена не
+    останавливает опрос остальных.
+    """
+
+    def __init__(
+        self,
+        endpoint: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        timeout: Optional[Tuple[float, float]] = None,
+        session: Any = None,
+        cache: Optional[ResponseCache] = None,
+    ) -> None:
+        self.endpoint = endpoint
+        self.cache = cache
+        self.timeout = timeout or (
+            constants.API_CONNECT_TIMEOUT, constants.API_READ_TIMEOUT
+        )
+        self._owns_session = session is None
+        if session is None:
+            size = pool_size or constants.API_POOL_SIZE
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        self.session = session
+
+    def get(
+        self,
+        token: str,
+        from_date: int,
+        headers: Optional[Dict[str, str]] = None,
+        stream: bool = False,
+    ) -> requests.Response:
+        """Запрашивает статусы работ токена начиная с `from_date`.
+        С `stream=True` тело ответа не читается заранее, его нужно
+        дочитать или закрыть ответ, чтобы соединение вернулось в пул.
+        """
+        endpoint = self.endpoint or constants.ENDPOINT
+        limit = get_token_breaker(endpoint, token)
+        if limit is not None and limit.retry_in() > 0:
+            raise CircuitBreakerOpen(
+                'Лимит запросов токена, запросы временно приостановлены'
+            )
+        breaker = get_breaker(endpoint)
+        if not breaker.allow():
+            raise CircuitBreakerOpen(
+                'API недоступно, запросы временно приостановлены'
+            )
+        started = time.monotonic()
+        try:
+            response = self.session.get(
+                endpoint,
+                headers={
+                    'Authorization': f'OAuth {token}', **(headers or {}),
+                },
+                params={'from_date': from_date},
+                timeout=self.timeout,
+                stream=stream,
+            )
+        except requests.exceptions.RequestException:
+            metrics.API_REQUEST_SECONDS.observe(time.monotonic() - started)
+            metrics.API_RESPONSES.inc(status='error')
+            breaker.record_failure()
+            raise
+        metrics.API_REQUEST_SECONDS.observe(time.monotonic() - started)
+        metrics.API_RESPONSES.inc(status=response.status_code)
+        if response.status_code == 429:
+            breaker.record_success()
+            get_token_breaker(endpoint, token, create=True).record_failure(
+                parse_retry_after(response.headers.get('Retry-After'))
+            )
+        elif response.status_code == 503:
+            breaker.record_failure(
+                parse_retry_after(response.headers.get('Retry-After'))
+            )
+        elif response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+            if limit is not None:
+                drop_token_breaker(endpoint, token)
+        return response
+
+    def close(self) -> None:
+        """Закрывает соединения пула."""
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self) -> 'PracticumClient':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+_client: Optional[PracticumClient] = None
+
+
+def get_client() -> PracticumClient:
+    """Общий для всего процесса клиент с пулом соединений."""
+    global _client
+    if _client is None:
+        _client = PracticumClient(
+            cache=(
+                ResponseCache(clock=get_clock().time)
+                if constants.API_CACHE else None
+            )
+        )
+    return _client
+
+
+def reset_client() -> None:
+    """Пересоздаёт общий клиент и объединение запросов по новым настройкам.
+    Старый пул соединений закрывается; начатые на нём запросы доходят.
+    """
+    global _client, _flight
+    client, _client, _flight = _client, None, None
+    if client is not None:
+        client.close()
+
+
+_flight: Optional[SingleFlight] = None
+
+
+def get_flight() -> SingleFlight:
+    """Общее для процесса объединение одинаковых запросов к API.
+    Ответ запоминается не дольше половины интервала опроса, чтобы
+    следующий опрос того же курсора всегда шёл в API.
+    """
+    global _flight
+    if _flight is None:
+        _flight = SingleFlight(
+            ttl=min(constants.API_DEDUP_TTL, constants.RETRY_TIME / 2),
+            clock=get_clock().monotonic,
+        )
+    return _flight
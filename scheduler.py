@@ -0,0 +1,157 @@
+import heapq
+import logging
+import threading
+import time
+import zlib
+
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+import metrics
+
+from policy import FixedPollingPolicy, PollingPolicy
+from subscriptions import Subscription, SubscriptionRegistry
+
+logger = logging.getLogger(__name__)
+
+
+def poll_offset(subscription: Subscription, interval: float) -> float:
+    """Смещение опросов подписки внутри окна опроса.
+    Определяется хешем токена, поэтому стабильно между перезапусками
+    и равномерно распределено по окну. Подписки одного токена опрашиваются
+    одновременно, и их одинаковые запросы объединяются в один.
+    """
+    digest = zlib.crc32(subscription.token.encode())
+    return digest / 2 ** 32 * interval
+
+
+class PollingScheduler:
+    """Опрашивает все подписки реестра из одного процесса.
+    Первые опросы подписок равномерно распределены по окну `interval` (см.
+    `poll_offset`), дальше задержку выбирает `policy` — по умолчанию тот же
+    постоянный `interval`. Действует только последняя запись подписки в
+    очереди: если подписку удалили и снова добавили, пока её прежняя
+    запись ждала срока, прежняя запись пропускается.
+    Цикл спит не дольше `tick` секунд, чтобы быстро заметить `stop`.
+    """
+
+    def __init__(
+        self,
+        registry: SubscriptionRegistry,
+        poll: Callable[[Subscription], None],
+        interval: float,
+        workers: int = 1,
+        policy: Optional[PollingPolicy] = None,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+        tick: float = 1.0,
+    ) -> None:
+        self.registry = registry
+        self.poll = poll
+        self.interval = interval
+        self.workers = workers
+        self.policy = policy or FixedPollingPolicy(interval)
+        self.clock = clock
+        self.sleep = sleep
+        self.tick = tick
+        self._stopped = threading.Event()
+        self._queue: List[Tuple[float, int, Tuple[str, str]]] = []
+        self._counter: int = 0
+        self._latest: Dict[Tuple[str, str], int] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if workers > 1:
+            self._executor = ThreadPoolExecutor(max_workers=workers)
+
+    def offset(self, subscription: Subscription) -> float:
+        """Смещение первого опроса подписки внутри окна опроса."""
+        return poll_offset(subscription, self.interval)
+
+    def schedule(self, subscription: Subscription, due: float) -> None:
+        """Ставит подписку в очередь на опрос в момент `due`."""
+        self._counter += 1
+        self._latest[subscription.key] = self._counter
+        heapq.heappush(self._queue, (due, self._counter, subscription.key))
+
+    def add(
+        self, subscription: Subscription, now: Optional[float] = None
+    ) -> None:
+        """Планирует первый опрос подписки."""
+        start = self.clock() if now is None else now
+        self.schedule(subscription, start + self.offset(subscription))
+
+    def start(self) -> None:
+        """Планирует опрос всех подписок реестра."""
+        now = self.clock()
+        for subscription in self.registry:
+            self.add(subscription, now)
+
+    def next_delay(self) -> Optional[float]:
+        """Сколько секунд осталось до ближайшего опроса."""
+        if not self._queue:
+            return None
+        return max(0.0, self._queue[0][0] - self.clock())
+
+    def _pop_due(self, now: float) -> List[Tuple[float, Subscription]]:
+        due: List[Tuple[float, Subscription]] = []
+        while self._queue and self._queue[0][0] <= now:
+            when, number, key = heapq.heappop(self._queue)
+            if self._latest.get(key) != number:
+                continue
+            subscription = self.registry.get(key)
+            if subscription is None:
+                del self._latest[key]
+            else:
+                due.append((when, subscription))
+        return due
+
+    def _poll(self, subscription: Subscription) -> None:
+        try:
+            self.poll(subscription)
+        except Exception as error:
+            logger.exception(f'Сбой опроса {subscription}: {error}')
+
+    def run_pending(self) -> int:
+        """Опрашивает подписки, чей срок наступил. Возвращает их число."""
+        started = time.monotonic()
+        now = self.clock()
+        due = self._pop_due(now)
+        if self._executor is None:
+            for _, subscription in due:
+                self._poll(subscription)
+        else:
+            wait([
+                self._executor.submit(self._poll, subscription)
+                for _, subscription in due
+            ])
+        for when, subscription in due:
+            delay = self.policy.next_delay(subscription, now)
+            self.schedule(subscription, max(when + delay, now))
+        if due:
+            metrics.LOOP_SECONDS.observe(time.monotonic() - started)
+        return len(due)
+
+    def run_forever(
+        self, on_idle: Optional[Callable[[], None]] = None
+    ) -> None:
+        """Основной цикл планировщика; работает до `stop`.
+        `on_idle` вызывается между итерациями, когда опросы не идут.
+        """
+        self.start()
+        while not self._stopped.is_set():
+            self.run_pending()
+            if on_idle is not None:
+                on_idle()
+            delay = self.next_delay()
+            if not self._stopped.is_set():
+                self.sleep(min(
+                    self.interval if delay is None else delay, self.tick
+                ))
+
+    def stop(self) -> None:
+        """Завершает цикл после текущей итерации; безопасно из сигнала."""
+        self._stopped.set()
+
+    def close(self) -> None:
+        """Дожидается начатых опросов и освобождает потоки."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
@@ -0,0 +1,190 @@
+import bisect
+import hashlib
+import logging
+import os
+import signal
+import subprocess
+import time
+
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import constants
+
+logger = logging.getLogger(__name__)
+
+
+def ring_hash(value: str) -> int:
+    """Стабильный между процессами и запусками хеш строки."""
+    return int.from_bytes(
+        hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big'
+    )
+
+
+def shard_name(index: int) -> str:
+    """Имя шарда на кольце."""
+    return f'shard-{index}'
+
+
+class HashRing:
+    """Консистентное хеширование подписок по шардам.
+    У каждого шарда `replicas` точек на кольце; ключ достаётся шарду
+    ближайшей по часовой стрелке точки. При добавлении шарда к нему
+    переходит примерно `1 / (N + 1)` ключей, остальные остаются на месте.
+    """
+
+    def __init__(self, shards: Iterable[str], replicas: int = 160) -> None:
+        points = sorted(
+            (ring_hash(f'{shard}#{replica}'), shard)
+            for shard in shards
+            for replica in range(replicas)
+        )
+        if not points:
+            raise ValueError('Нужен хотя бы один шард')
+        self._hashes = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard_for(self, key: str) -> str:
+        """Шард, которому принадлежит ключ."""
+        index = bisect.bisect(self._hashes, ring_hash(key))
+        return self._shards[index % len(self._shards)]
+
+
+def make_ring(count: int) -> HashRing:
+    """Кольцо из `count` шардов `shard-0` … `shard-{count - 1}`."""
+    return HashRing(shard_name(index) for index in range(count))
+
+
+def select_shard(
+    pairs: Iterable[Tuple[str, str]], index: int, count: int
+) -> List[Tuple[str, str]]:
+    """Подписки `(token, chat_id)`, которые опрашивает шард `index`.
+    Шард выбирается по токену, так что все чаты одного токена опрашивает
+    один процесс.
+    """
+    if count <= 1:
+        return list(pairs)
+    ring = make_ring(count)
+    name = shard_name(index)
+    return [pair for pair in pairs if ring.shard_for(pair[0]) == name]
+
+
+def shard_index(token: str, count: int) -> int:
+    """Номер шарда, который опрашивает подписки токена."""
+    if count <= 1:
+        return 0
+    return int(make_ring(count).shard_for(token).rpartition('-')[2])
+
+
+class Supervisor:
+    """Запускает процессы-шарды и перезапускает упавшие.
+    Каждому процессу передаются `SHARD_INDEX` и `SHARD_COUNT`; подписки
+    процесс берёт из общего файла подписок, курсоры — из общей базы
+    состояния, поэтому после перебалансировки шард продолжает с того же
+    места. Перезапуски шарда откладываются с удвоением задержки; если
+    шард проработал дольше `max_restart_delay`, задержка сбрасывается.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        command: List[str],
+        env: Optional[Dict[str, str]] = None,
+        restart_delay: float = 1.0,
+        max_restart_delay: float = 60.0,
+        popen: Callable[..., subprocess.Popen] = subprocess.Popen,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if workers < 1:
+            raise ValueError('Нужен хотя бы один процесс')
+        self.workers = workers
+        self.command = command
+        self.env = dict(os.environ if env is None else env)
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.popen = popen
+        self.clock = clock
+        self.sleep = sleep
+        self.processes: Dict[int, subprocess.Popen] = {}
+        self.restarts: Dict[int, int] = {}
+        self._started: Dict[int, float] = {}
+        self._restart_at: Dict[int, float] = {}
+        self._running = False
+
+    def spawn(self, index: int) -> subprocess.Popen:
+        """Запускает процесс шарда `index`."""
+        env = dict(
+            self.env, SHARD_INDEX=str(index), SHARD_COUNT=str(self.workers)
+        )
+        process = self.popen(self.command, env=env)
+        self.processes[index] = process
+        self._started[index] = self.clock()
+        logger.info(f'Запущен {shard_name(index)}, pid {process.pid}')
+        return process
+
+    def start(self) -> 'Supervisor':
+        """Запускает все шарды."""
+        self._running = True
+        for index in range(self.workers):
+            self.spawn(index)
+        return self
+
+    def check(self) -> None:
+        """Перезапускает завершившиеся шарды, когда подошёл их срок."""
+        now = self.clock()
+        for index, process in list(self.processes.items()):
+            code = process.poll()
+            if code is None:
+                continue
+            if index not in self._restart_at:
+                if now - self._started[index] > self.max_restart_delay:
+                    self.restarts[index] = 0
+                restarts = self.restarts.get(index, 0)
+                delay = min(
+                    self.restart_delay * 2 ** restarts, self.max_restart_delay
+                )
+                self._restart_at[index] = now + delay
+                logger.error(
+                    f'{shard_name(index)} завершился с кодом {code}, '
+                    f'перезапуск через {delay:.0f} с'
+                )
+            if now >= self._restart_at[index]:
+                del self._restart_at[index]
+                self.restarts[index] = self.restarts.get(index, 0) + 1
+                self.spawn(index)
+
+    def send_signal(self, signum: int = signal.SIGHUP) -> None:
+        """Пересылает сигнал работающим шардам."""
+        for process in self.processes.values():
+            if process.poll() is None:
+                process.send_signal(signum)
+
+    def interrupt(self) -> None:
+        """Завершает `run_forever`; безопасно вызывать из сигнала."""
+        self._running = False
+
+    def stop(self, timeout: float = constants.SHUTDOWN_TIMEOUT + 5) -> None:
+        """Останавливает шарды: SIGTERM, а по истечении `timeout` — SIGKILL.
+        Запас к `SHUTDOWN_TIMEOUT` нужен шардам, чтобы дописать очередь.
+        """
+        self._running = False
+        for process in self.processes.values():
+            if process.poll() is None:
+                process.terminate()
+        deadline = self.clock() + timeout
+        for process in self.processes.values():
+            try:
+                process.wait(max(deadline - self.clock(), 0))
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+    def run_forever(self, poll_interval: float = 1.0) -> None:
+        """Следит за шардами до остановки."""
+        self.start()
+        try:
+            while self._running:
+                self.check()
+                self.sleep(poll_interval)
+        finally:
+            self.stop()
@@ -0,0 +1,74 @@
+import threading
+import time
+
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+
+class Flight:
+    """Один выполняющийся или недавно выполненный вызов."""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Объединяет одновременные вызовы с одинаковым ключом в один.
+    Первый вызов с ключом выполняет функцию, остальные ждут его и получают
+    тот же результат или то же исключение. Успешный результат ещё `ttl`
+    секунд отдаётся без вызова; ошибки не запоминаются.
+    """
+
+    def __init__(
+        self, ttl: float = 0.0, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.ttl = ttl
+        self.clock = clock
+        self._flights: Dict[Hashable, Flight] = {}
+        self._expiry: Deque[Tuple[float, Hashable, Flight]] = deque()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+
+    def _expire(self) -> None:
+        now = self.clock()
+        while self._expiry and self._expiry[0][0] <= now:
+            _, key, flight = self._expiry.popleft()
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """Результат `function()`, общий для всех вызовов с `key`."""
+        with self._lock:
+            self._expire()
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight()
+                self.calls += 1
+            else:
+                self.shared += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = function()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                if flight.error is None and self.ttl > 0:
+                    self._expiry.append(
+                        (self.clock() + self.ttl, key, flight)
+                    )
+                elif self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+        return flight.result
@@ -0,0 +1,453 @@
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import sys
+import threading
+import time
+
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, TextIO, Tuple
+
+import constants
+
+from clock import get_clock
+from lazy import lazy_import
+from outbox import ChatId, Outbox, Receipt, TokenBucket
+
+requests = lazy_import('requests')
+
+logger = logging.getLogger(__name__)
+
+
+class Sink(ABC):
+    """Получатель уведомлений.
+    `send` отправляет одно уведомление синхронно и выбрасывает исключение
+    при сбое; очередь, частоту и повторы обеспечивают `SinkQueue` и
+    `SinkPool`.
+    """
+
+    name = 'sink'
+
+    @abstractmethod
+    def send(self, chat_id: ChatId, text: str) -> None:
+        """Отправляет уведомление."""
+
+    def close(self) -> None:
+        """Освобождает ресурсы получателя."""
+
+
+class WebhookSink(Sink):
+    """`POST` уведомления в формате JSON `{"chat_id": …, "text": …}`."""
+
+    name = 'webhook'
+
+    def __init__(
+        self,
+        url: str,
+        timeout: float = 10.0,
+        session: Optional[requests.Session] = None,
+    ) -> None:
+        self.url = url
+        self.timeout = timeout
+        self.session = session or requests.Session()
+
+    def send(self, chat_id: ChatId, text: str) -> None:
+        """Отправляет уведомление POST-запросом."""
+        response = self.session.post(
+            self.url, json={'chat_id': chat_id, 'text': text},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+    def close(self) -> None:
+        """Закрывает сессию."""
+        self.session.close()
+
+
+def parse_recipients(
+    value: str, default_chat: Optional[ChatId] = None
+) -> Dict[str, List[str]]:
+    """Адреса `SMTP_TO` по чатам: `chat_id:address` через запятую.
+    Адрес без чата относится к `default_chat` — основному чату из
+    `TELEGRAM_CHAT_ID`.
+    """
+    recipients: Dict[str, List[str]] = {}
+    for entry in value.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        chat_id, _, address = entry.rpartition(':')
+        if not chat_id:
+            if default_chat is None:
+                raise ValueError(f'Для адреса {address} не указан чат')
+            chat_id = str(default_chat)
+        recipients.setdefault(chat_id.strip(), []).append(address.strip())
+    return recipients
+
+
+class SmtpSink(Sink):
+    """Письмо через SMTP-сервер, по умолчанию локальный.
+    Письмо уходит на адреса чата подписки из `recipients`; уведомления
+    чатов без адреса почтой не отправляются.
+    """
+
+    name = 'smtp'
+
+    def __init__(
+        self,
+        sender: str,
+        recipients: Dict[str, List[str]],
+        host: str = 'localhost',
+        port: int = 25,
+        subject: str = 'Статус домашней работы',
+        timeout: float = 10.0,
+    ) -> None:
+        self.sender = sender
+        self.recipients = recipients
+        self.host = host
+        self.port = port
+        self.subject = subject
+        self.timeout = timeout
+
+    def send(self, chat_id: ChatId, text: str) -> None:
+        """Отправляет уведомление письмом на адреса чата."""
+        import smtplib
+
+        from email.message import EmailMessage
+
+        recipients = self.recipients.get(str(chat_id))
+        if not recipients:
+            logger.debug(f'Для чата {chat_id} нет адреса SMTP_TO')
+            return
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = ', '.join(recipients)
+        message['Subject'] = self.subject
+        message.set_content(text)
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            smtp.send_message(message)
+
+
+class FileSink(Sink):
+    """Строки JSON `{"chat_id": …, "text": …}` в файл; `-` — stdout."""
+
+    name = 'file'
+
+    def __init__(self, path: str = '-') -> None:
+        self.path = path
+        self._stream: TextIO = (
+            sys.stdout if path == '-' else open(path, 'a', encoding='utf-8')
+        )
+
+    def send(self, chat_id: ChatId, text: str) -> None:
+        """Дописывает уведомление строкой JSON."""
+        self._stream.write(json.dumps(
+            {'chat_id': chat_id, 'text': text}, ensure_ascii=False
+        ) + '\n')
+        self._stream.flush()
+
+    def close(self) -> None:
+        """Закрывает файл, если это не stdout."""
+        if self._stream is not sys.stdout:
+            self._stream.close()
+
+
+class Deadline:
+    """Общий срок для нескольких ожиданий подряд; None — без срока."""
+
+    def __init__(
+        self,
+        timeout: Optional[float],
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.clock = clock
+        self.expires = None if timeout is None else clock() + timeout
+
+    def remaining(self) -> Optional[float]:
+        """Сколько секунд осталось до срока, не меньше нуля."""
+        if self.expires is None:
+            return None
+        return max(0.0, self.expires - self.clock())
+
+
+class SinkQueue:
+    """Очередь уведомлений одного получателя со своим лимитом частоты.
+    Отправкой занимается `SinkPool`; при переполнении очереди самое старое
+    уведомление отбрасывается. Неудачная отправка повторяется до
+    `max_retries` раз с удвоением паузы, не занимая поток пула.
+    Отброшенные и неотправленные уведомления отмечаются неудачными в их
+    `Receipt`.
+    """
+
+    def __init__(
+        self,
+        sink: Sink,
+        rate: float = constants.SINK_RATE,
+        max_queue: int = 10_000,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+        clock: Optional[Callable[[], float]] = None,
+    ) -> None:
+        clock = clock or get_clock().monotonic
+        self.sink = sink
+        self.bucket = TokenBucket(rate, clock=clock)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.clock = clock
+        self.items: Deque[Tuple[ChatId, str, Optional[Receipt]]] = deque(
+            maxlen=max_queue
+        )
+        self.scheduled = False
+        self.attempts = 0
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def push(
+        self, chat_id: ChatId, text: str, receipt: Optional[Receipt] = None
+    ) -> None:
+        """Добавляет уведомление в конец очереди."""
+        if len(self.items) == self.items.maxlen:
+            self.dropped += 1
+            dropped = self.items.popleft()[2]
+            if dropped is not None:
+                dropped.failed()
+        self.items.append((chat_id, text, receipt))
+
+    def deliver(self) -> Optional[float]:
+        """Отправляет первое уведомление очереди.
+        Возвращает время повтора, если отправку нужно повторить.
+        """
+        chat_id, text, receipt = self.items.popleft()
+        self.bucket.take()
+        try:
+            self.sink.send(chat_id, text)
+        except Exception as error:
+            self.attempts += 1
+            if self.attempts <= self.max_retries:
+                self.items.appendleft((chat_id, text, receipt))
+                return (
+                    self.clock() + self.retry_delay * 2 ** (self.attempts - 1)
+                )
+            self.failed += 1
+            logger.error(
+                f'Не удалось отправить уведомление в '
+                f'{self.sink.name}: {error}'
+            )
+            if receipt is not None:
+                receipt.failed()
+        else:
+            self.sent += 1
+            if receipt is not None:
+                receipt.delivered()
+        self.attempts = 0
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        """Счётчики очереди получателя."""
+        return {
+            'depth': len(self.items),
+            'sent': self.sent,
+            'failed': self.failed,
+            'dropped': self.dropped,
+        }
+
+
+class SinkPool:
+    """Общий пул потоков, который разбирает очереди получателей.
+    Очереди ждут своей очереди в куче по времени, когда их лимит
+    частоты позволит следующую отправку; одновременно у получателя
+    отправляется не больше одного уведомления, порядок сохраняется.
+    `send_message` совместим с `telegram.Bot` и не ждёт отправки.
+    """
+
+    def __init__(
+        self,
+        queues: List[SinkQueue],
+        workers: int = constants.SINK_WORKERS,
+        clock: Optional[Callable[[], float]] = None,
+    ) -> None:
+        clock = clock or get_clock().monotonic
+        self.queues = queues
+        self.workers = workers
+        self.clock = clock
+        self._heap: List[Tuple[float, int, int]] = []
+        self._counter = 0
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._running = False
+
+    def _schedule(self, index: int, when: float) -> None:
+        self._counter += 1
+        heapq.heappush(self._heap, (when, self._counter, index))
+        self.queues[index].scheduled = True
+
+    def send_message(
+        self,
+        chat_id: ChatId = None,
+        text: str = None,
+        receipt: Optional[Receipt] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Ставит уведомление в очереди всех получателей пула.
+        `receipt` подтверждается, когда уведомление доставят все получатели.
+        """
+        part = receipt and receipt.split(len(self.queues))
+        with self._condition:
+            now = self.clock()
+            for index, queue in enumerate(self.queues):
+                queue.push(chat_id, text, part)
+                if not queue.scheduled:
+                    self._schedule(index, now + queue.bucket.delay())
+            self._condition.notify_all()
+
+    @property
+    def depth(self) -> int:
+        """Число уведомлений, ожидающих отправки во всех очередях."""
+        with self._condition:
+            return sum(len(queue.items) for queue in self.queues)
+
+    def _next(self) -> Optional[int]:
+        with self._condition:
+            while self._running or self._heap:
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                delay = self._heap[0][0] - self.clock()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                return heapq.heappop(self._heap)[2]
+            return None
+
+    def run(self) -> None:
+        """Цикл потока пула; работает до `stop` и опустошения очередей."""
+        while True:
+            index = self._next()
+            if index is None:
+                return
+            queue = self.queues[index]
+            retry_at = queue.deliver()
+            with self._condition:
+                if queue.items:
+                    self._schedule(index, retry_at or (
+                        self.clock() + queue.bucket.delay()
+                    ))
+                    self._condition.notify()
+                else:
+                    queue.scheduled = False
+                    if not self._heap:
+                        self._condition.notify_all()
+
+    def start(self) -> 'SinkPool':
+        """Запускает потоки пула."""
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self.run, name=f'sinks-{number}',
+                             daemon=True)
+            for number in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Дожидается отправки очередей, останавливает пул и получателей.
+        `timeout` — общий срок для всех потоков пула.
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        deadline = Deadline(timeout)
+        for thread in self._threads:
+            thread.join(deadline.remaining())
+        for queue in self.queues:
+            queue.sink.close()
+
+    def stats(self) -> Dict[str, int]:
+        """Сумма счётчиков всех очередей."""
+        totals = {'depth': 0, 'sent': 0, 'failed': 0, 'dropped': 0}
+        for queue in self.queues:
+            for name, value in queue.stats().items():
+                totals[name] += value
+        return totals
+
+
+class FanOut:
+    """Рассылает каждое уведомление всем получателям.
+    Получатели — объекты с `send_message`, совместимым с `telegram.Bot`,
+    обычно `Outbox` и `SinkPool`; у каждого получателя своя очередь,
+    поэтому медленный получатель не задерживает ни опрос, ни остальных.
+    """
+
+    def __init__(self, destinations: List[Any]) -> None:
+        self.destinations = destinations
+
+    def send_message(
+        self,
+        chat_id: ChatId = None,
+        text: str = None,
+        receipt: Optional[Receipt] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Ставит уведомление в очереди всех получателей.
+        `receipt` подтверждается, когда уведомление доставят все получатели.
+        """
+        if receipt is not None and not self.destinations:
+            receipt.delivered()
+        part = receipt and receipt.split(len(self.destinations))
+        for destination in self.destinations:
+            destination.send_message(chat_id=chat_id, text=text, receipt=part)
+
+    def start(self) -> 'FanOut':
+        """Запускает очереди получателей."""
+        for destination in self.destinations:
+            destination.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Дожидается отправки всех очередей.
+        `timeout` — общий срок для всех получателей, а не для каждого.
+        """
+        deadline = Deadline(timeout)
+        for destination in self.destinations:
+            destination.stop(deadline.remaining())
+
+
+def build_sinks(names: List[str]) -> List[Sink]:
+    """Получатели по именам из `NOTIFY_SINKS`, кроме `telegram`."""
+    factories: Dict[str, Callable[[], Sink]] = {
+        'webhook': lambda: WebhookSink(constants.NOTIFY_WEBHOOK_URL),
+        'smtp': lambda: SmtpSink(
+            constants.SMTP_FROM,
+            parse_recipients(constants.SMTP_TO, constants.TELEGRAM_CHAT_ID),
+            host=constants.SMTP_HOST,
+            port=constants.SMTP_PORT,
+        ),
+        'file': lambda: FileSink(constants.NOTIFY_FILE),
+    }
+    unknown = set(names) - set(factories) - {'telegram'}
+    if unknown:
+        raise ValueError(f'Неизвестные получатели: {", ".join(unknown)}')
+    return [factories[name]() for name in names if name != 'telegram']
+
+
+def build_notifier(bot: Any) -> FanOut:
+    """Очереди всех получателей из `NOTIFY_SINKS`, ещё не запущенные.
+    Telegram идёт через `Outbox` с лимитами Telegram, остальные — через
+    свою `SinkQueue` в общем `SinkPool`.
+    """
+    names = [
+        name.strip() for name in constants.NOTIFY_SINKS.split(',')
+        if name.strip()
+    ]
+    destinations: List[Any] = []
+    if 'telegram' in names:
+        destinations.append(Outbox(bot))
+    sinks = build_sinks(names)
+    if sinks:
+        destinations.append(SinkPool([SinkQueue(sink) for sink in sinks]))
+    return FanOut(destinations)
@@ -0,0 +1,220 @@
+import atexit
+import hashlib
+import sqlite3
+import threading
+
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional, Set, Tuple
+
+import constants
+
+from clock import get_clock
+from subscriptions import Subscription
+
+SentKey = Tuple[str, str, str]
+
+
+def subscription_id(subscription: Subscription) -> str:
+    """Идентификатор подписки для хранилища, не раскрывающий токен."""
+    return hashlib.sha256(
+        f'{subscription.token}:{subscription.chat_id}'.encode()
+    ).hexdigest()[:32]
+
+
+def sent_key(homework: dict) -> SentKey:
+    """Ключ отправленного уведомления о статусе работы."""
+    return (
+        str(homework.get('homework_name')),
+        str(homework.get('status')),
+        str(homework.get('date_updated', '')),
+    )
+
+
+class StateStore(ABC):
+    """Хранилище курсоров опроса и уже отправленных уведомлений."""
+
+    @abstractmethod
+    def load_cursor(self, subscription: Subscription) -> Optional[int]:
+        """Последний сохранённый `current_date` подписки."""
+
+    @abstractmethod
+    def save_cursor(self, subscription: Subscription) -> None:
+        """Сохраняет `current_date` подписки."""
+
+    @abstractmethod
+    def is_sent(self, subscription: Subscription, key: SentKey) -> bool:
+        """Отправлялось ли уже уведомление `key` в чат подписки."""
+
+    @abstractmethod
+    def mark_sent(self, subscription: Subscription, key: SentKey) -> None:
+        """Запоминает, что уведомление `key` отправлено."""
+
+    def flush(self) -> None:
+        """Сбрасывает накопленные изменения на диск."""
+
+    def close(self) -> None:
+        """Закрывает хранилище."""
+
+
+class MemoryStateStore(StateStore):
+    """Хранилище в памяти процесса, для тестов и разовых запусков."""
+
+    def __init__(self) -> None:
+        self.cursors: Dict[str, int] = {}
+        self.sent: Dict[str, Set[SentKey]] = {}
+
+    def load_cursor(self, subscription: Subscription) -> Optional[int]:
+        """Курсор подписки из памяти."""
+        return self.cursors.get(subscription_id(subscription))
+
+    def save_cursor(self, subscription: Subscription) -> None:
+        """Запоминает курсор подписки."""
+        self.cursors[subscription_id(subscription)] = (
+            subscription.current_date
+        )
+
+    def is_sent(self, subscription: Subscription, key: SentKey) -> bool:
+        """Есть ли уведомление среди отправленных."""
+        return key in self.sent.get(subscription_id(subscription), ())
+
+    def mark_sent(self, subscription: Subscription, key: SentKey) -> None:
+        """Добавляет уведомление к отправленным."""
+        self.sent.setdefault(subscription_id(subscription), set()).add(key)
+
+
+class SQLiteStateStore(StateStore):
+    """Хранилище в SQLite.
+    База открывается в режиме WAL, а изменения коммитятся пачкой не чаще
+    раза в `commit_interval` секунд, чтобы не платить за fsync на каждом
+    опросе. Пачка коммитится таймером, как только закрывается её окно,
+    поэтому транзакция с блокировкой записи не остаётся открытой между
+    опросами. Окно отсчитывается по `clock`, по умолчанию — по
+    `clock.get_clock()`. Другие процессы с той же базой ждут блокировку
+    до `busy_timeout` секунд. Незакоммиченное сбрасывается в `flush` и
+    `close`.
+    """
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS cursors (
+            subscription TEXT PRIMARY KEY,
+            from_date INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS sent (
+            subscription TEXT NOT NULL,
+            homework_name TEXT NOT NULL,
+            status TEXT NOT NULL,
+            date_updated TEXT NOT NULL,
+            PRIMARY KEY (subscription, homework_name, status, date_updated)
+        ) WITHOUT ROWID;
+    '''
+
+    def __init__(
+        self,
+        path: str,
+        commit_interval: float = 1.0,
+        clock: Optional[Callable[[], float]] = None,
+        busy_timeout: float = 10.0,
+    ) -> None:
+        self.path = path
+        self.commit_interval = commit_interval
+        self.clock = clock or get_clock().monotonic
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._connection = sqlite3.connect(
+            path, timeout=busy_timeout, check_same_thread=False
+        )
+        self._connection.execute(
+            f'PRAGMA busy_timeout={int(busy_timeout * 1000)}'
+        )
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(self.SCHEMA)
+        self._dirty = False
+        self._committed_at = self.clock()
+
+    def _write(self, sql: str, parameters: tuple) -> None:
+        with self._lock:
+            self._connection.execute(sql, parameters)
+            self._dirty = True
+            remaining = self._committed_at + self.commit_interval - (
+                self.clock()
+            )
+            if remaining <= 0:
+                self._commit()
+            elif self._timer is None:
+                self._timer = threading.Timer(
+                    min(remaining, self.commit_interval), self.flush
+                )
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _commit(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._dirty:
+            self._connection.commit()
+            self._dirty = False
+        self._committed_at = self.clock()
+
+    def load_cursor(self, subscription: Subscription) -> Optional[int]:
+        """Курсор подписки из базы."""
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT from_date FROM cursors WHERE subscription = ?',
+                (subscription_id(subscription),),
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def save_cursor(self, subscription: Subscription) -> None:
+        """Записывает курсор подписки в текущую пачку."""
+        self._write(
+            'INSERT OR REPLACE INTO cursors VALUES (?, ?)',
+            (subscription_id(subscription), subscription.current_date),
+        )
+
+    def is_sent(self, subscription: Subscription, key: SentKey) -> bool:
+        """Есть ли уведомление в базе."""
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT 1 FROM sent WHERE subscription = ? '
+                'AND homework_name = ? AND status = ? AND date_updated = ?',
+                (subscription_id(subscription), *key),
+            ).fetchone()
+        return row is not None
+
+    def mark_sent(self, subscription: Subscription, key: SentKey) -> None:
+        """Записывает уведомление в текущую пачку."""
+        self._write(
+            'INSERT OR IGNORE INTO sent VALUES (?, ?, ?, ?)',
+            (subscription_id(subscription), *key),
+        )
+
+    def flush(self) -> None:
+        """Коммитит текущую пачку."""
+        with self._lock:
+            self._commit()
+
+    def close(self) -> None:
+        """Коммитит пачку и закрывает соединение."""
+        with self._lock:
+            self._commit()
+            self._connection.close()
+
+
+_store: Optional[StateStore] = None
+
+
+def get_store() -> StateStore:
+    """Общее для процесса хранилище состояния.
+    Путь к базе SQLite задаётся `STATE_DB`; при пустом значении
+    состояние хранится только в памяти.
+    """
+    global _store
+    if _store is None:
+        if constants.STATE_DB:
+            _store = SQLiteStateStore(constants.STATE_DB)
+        else:
+            _store = MemoryStateStore()
+        atexit.register(_store.close)
+    return _store
@@ -0,0 +1,136 @@
+import codecs
+import json
+
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from exceptions import ResponseIsNotJSON
+
+WHITESPACE = ' \t\r\n'
+
+
+class HomeworkStream:
+    """Потоковый разбор ответа API Практикум.Домашка.
+    Читает тело ответа кусками и выдаёт записи из `homeworks` по одной,
+    не собирая весь ответ в памяти: в буфере держится только текущий кусок
+    и очередная запись. `current_date` и прочие ключи верхнего уровня
+    доступны после того, как поток прочитан до конца.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self._started = False
+        self.current_date: Optional[int] = None
+        self.extra: Dict[str, Any] = {}
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        if self._pos > 65536:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        for chunk in self._chunks:
+            if chunk:
+                self._buffer += self._decoder.decode(chunk)
+                return True
+        self._buffer += self._decoder.decode(b'', final=True)
+        self._eof = True
+        return False
+
+    def _peek(self) -> str:
+        while True:
+            buffer = self._buffer
+            while self._pos < len(buffer) and buffer[self._pos] in WHITESPACE:
+                self._pos += 1
+            if self._pos < len(buffer):
+                return buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def _next_char(self) -> str:
+        char = self._peek()
+        if not char:
+            raise ResponseIsNotJSON('Не удалось декодировать в json.')
+        self._pos += 1
+        return char
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise ResponseIsNotJSON('Не удалось декодировать в json.')
+                continue
+            if end < len(self._buffer) or not self._fill():
+                self._pos = end
+                return value
+
+    def _homeworks(self) -> Iterator[Any]:
+        if self._next_char() != '[':
+            raise TypeError(
+                'В ответе API не ожидаемые типы значений '
+                'ключей `homeworks` и `current_date`'
+            )
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            char = self._next_char()
+            if char == ']':
+                return
+            if char != ',':
+                raise ResponseIsNotJSON('Не удалось декодировать в json.')
+
+    def _fields(self) -> Iterator[Any]:
+        if self._peek() == '}':
+            self._pos += 1
+            return False
+        seen_homeworks = False
+        while True:
+            key = self._value()
+            if self._next_char() != ':':
+                raise ResponseIsNotJSON('Не удалось декодировать в json.')
+            if key == 'homeworks':
+                seen_homeworks = True
+                yield from self._homeworks()
+            elif key == 'current_date':
+                self.current_date = self._value()
+            else:
+                self.extra[key] = self._value()
+            char = self._next_char()
+            if char == '}':
+                return seen_homeworks
+            if char != ',':
+                raise ResponseIsNotJSON('Не удалось декодировать в json.')
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._started:
+            raise RuntimeError('Поток ответа уже прочитан')
+        self._started = True
+        if self._next_char() != '{':
+            raise TypeError('В ответе API ничего нет или это не словарь')
+        seen_homeworks = yield from self._fields()
+        if not seen_homeworks or self.current_date is None:
+            raise TypeError(
+                'В ответе API нет ключей `homeworks` и `current_date`'
+            )
+        if not isinstance(self.current_date, int):
+            raise TypeError(
+                'В ответе API не ожидаемые типы значений '
+                'ключей `homeworks` и `current_date`'
+            )
+
+
+def iter_body(response: Any, chunk_size: int = 65536) -> Iterator[bytes]:
+    """Читает тело потокового ответа кусками и закрывает ответ в конце."""
+    try:
+        yield from response.iter_content(chunk_size)
+    finally:
+        response.close()
@@ -0,0 +1,126 @@
+import threading
+
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from alerts import ErrorDigest
+from transitions import StatusTable
+
+
+class Subscription:
+    """Подписка чата Telegram на статусы работ одного токена Практикума."""
+
+    __slots__ = (
+        'token', 'chat_id', 'current_date', 'digest',
+        'last_status', 'errors', 'statuses', 'in_flight', 'lock',
+    )
+
+    def __init__(
+        self, token: str, chat_id: str, current_date: int = 0
+    ) -> None:
+        self.token: str = token
+        self.chat_id: str = chat_id
+        self.current_date: int = current_date
+        self.digest: ErrorDigest = ErrorDigest()
+        self.last_status: Optional[str] = None
+        self.errors: int = 0
+        self.statuses: StatusTable = StatusTable()
+        # Ключи уведомлений, поставленных в очередь, но ещё не доставленных
+        self.in_flight: Set[Tuple[str, str, str]] = set()
+        self.lock = threading.RLock()
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        """Ключ подписки в реестре."""
+        return self.token, self.chat_id
+
+    def __repr__(self) -> str:
+        return (
+            f'Subscription(token=...{self.token[-4:]}, '
+            f'chat_id={self.chat_id}, current_date={self.current_date})'
+        )
+
+
+class SubscriptionRegistry:
+    """Реестр подписок: токен Практикума → чат Telegram и курсор опроса."""
+
+    def __init__(self) -> None:
+        self._subscriptions: Dict[Tuple[str, str], Subscription] = {}
+        self._by_token: Dict[str, List[Subscription]] = {}
+
+    def add(
+        self, token: str, chat_id: str, current_date: int = 0
+    ) -> Subscription:
+        """Добавляет подписку. Повторное добавление возвращает имеющуюся."""
+        key = (token, str(chat_id))
+        subscription = self._subscriptions.get(key)
+        if subscription is None:
+            subscription = Subscription(token, str(chat_id), current_date)
+            self._subscriptions[key] = subscription
+            self._by_token.setdefault(token, []).append(subscription)
+        return subscription
+
+    def remove(self, token: str, chat_id: str) -> Optional[Subscription]:
+        """Удаляет подписку и возвращает её, если она была."""
+        subscription = self._subscriptions.pop((token, str(chat_id)), None)
+        if subscription is not None:
+            same_token = self._by_token[token]
+            same_token.remove(subscription)
+            if not same_token:
+                del self._by_token[token]
+        return subscription
+
+    def sync(
+        self, pairs: List[Tuple[str, str]], current_date: int = 0
+    ) -> Tuple[List[Subscription], List[Subscription]]:
+        """Приводит реестр к списку подписок `(token, chat_id)`.
+        Оставшиеся подписки сохраняют курсор и состояние ошибок.
+        Возвращает добавленные и удалённые подписки.
+        """
+        wanted = {(token, str(chat_id)) for token, chat_id in pairs}
+        removed = [
+            self.remove(*key) for key in list(self._subscriptions)
+            if key not in wanted
+        ]
+        added = [
+            self.add(token, chat_id, current_date)
+            for token, chat_id in sorted(wanted - set(self._subscriptions))
+        ]
+        return added, removed
+
+    def by_token(self, token: str) -> List[Subscription]:
+        """Все подписки на токен."""
+        return list(self._by_token.get(token, ()))
+
+    def get(self, key: Tuple[str, str]) -> Optional[Subscription]:
+        """Возвращает подписку по ключу `(token, chat_id)`."""
+        return self._subscriptions.get(key)
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self._subscriptions
+
+    def __iter__(self) -> Iterator[Subscription]:
+        return iter(list(self._subscriptions.values()))
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+
+def read_subscriptions(path: str) -> List[Tuple[str, str]]:
+    """Читает файл подписок.
+    Каждая непустая строка — `PRACTICUM_TOKEN TELEGRAM_CHAT_ID`,
+    строки, начинающиеся с `#`, пропускаются.
+    """
+    subscriptions: List[Tuple[str, str]] = []
+    with open(path, encoding='utf-8') as file:
+        for number, line in enumerate(file, start=1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split()
+            if len(parts) != 2:
+                raise ValueError(
+                    f'{path}:{number}: ожидается '
+                    '`PRACTICUM_TOKEN TELEGRAM_CHAT_ID`'
+                )
+            subscriptions.append((parts[0], parts[1]))
+    return subscriptions
@@ -0,0 +1,53 @@
+"""End-to-end load of the bot replaying status traces in accelerated time.
+
+Run explicitly: ``pytest tests/benchmarks/bench_load.py -s``
+(with pytest-benchmark installed the numbers also land in its report).
+
+Each scenario starts ``homework.py`` against local Practicum and Telegram
+stand-ins (see ``tests/replay.py``) and reports polls per second,
+notification latency percentiles in virtual seconds, CPU per poll and peak
+RSS per subscription. Set ``REPLAY_TRACE`` to replay a recorded trace
+instead of the synthetic one.
+
+Rate limits of ``Outbox`` run in real time, so at high speed-ups the
+Telegram limit of 30 messages per real second, not polling, bounds
+delivery in the ``many`` scenario.
+"""
+import os
+
+import pytest
+
+from replay import load_trace, run_replay, synthetic_trace
+
+SPEED = 300
+DURATION = 20
+
+SCENARIOS = {
+    'clean': dict(subscriptions=50),
+    'slow-flaky-heavy': dict(
+        subscriptions=50, latency=0.05, error_rate=0.05, payload_size=20_000,
+    ),
+    'many': dict(subscriptions=500),
+}
+
+
+@pytest.mark.parametrize('name', SCENARIOS)
+def test_replay_load(benchmark, name):
+    options = dict(SCENARIOS[name])
+    subscriptions = options.pop('subscriptions')
+    if os.getenv('REPLAY_TRACE'):
+        events = load_trace(os.environ['REPLAY_TRACE'])
+        tokens = sorted({event['token'] for event in events})
+    else:
+        tokens = [f'token-{number}' for number in range(subscriptions)]
+        events = synthetic_trace(
+            tokens, duration=SPEED * DURATION, start=SPEED * 4
+        )
+    report = benchmark.pedantic(
+        run_replay, args=(events, tokens),
+        kwargs=dict(options, speed=SPEED, duration=DURATION),
+        rounds=1, iterations=1,
+    )
+    benchmark.extra_info.update(report.as_dict())
+    print(f'\n{name}: {report.format()}')
+    assert report.polls
@@ -0,0 +1,70 @@
+"""Synchronous logging with a per-record timezone lookup vs the queue setup.
+
+Run explicitly: ``pytest tests/benchmarks/bench_logging.py -s``
+
+The caller-side rate is what the polling loop pays; the drained rate
+includes the time for the listener thread to write everything out.
+"""
+import datetime
+import logging
+import os
+import time
+
+import pytz
+
+from logs import (
+    attach_queue_handler, detach_queue_handler, log_context, make_formatter,
+)
+
+RECORDS = 50000
+TIMEZONE = 'Europe/Moscow'
+
+
+def legacy_logger(stream):
+    logger = logging.getLogger('bench.legacy')
+    handler = logging.StreamHandler(stream)
+    formatter = logging.Formatter(
+        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    )
+    formatter.converter = (
+        lambda *args: datetime.datetime.now(
+            tz=pytz.timezone(TIMEZONE)
+        ).timetuple()
+    )
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+    return logger, lambda: logger.removeHandler(handler)
+
+
+def queued_logger(stream, json_lines):
+    logger = logging.getLogger(f'bench.queued.{json_lines}')
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(make_formatter(json_lines, timezone=TIMEZONE))
+    listener = attach_queue_handler(logger, handler)
+    return logger, lambda: detach_queue_handler(logger, listener)
+
+
+def measure(factory, *args):
+    with open(os.devnull, 'w') as stream:
+        logger, close = factory(stream, *args)
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+        started = time.perf_counter()
+        with log_context(subscription='5f2c1a9b0d3e', chat_id='536634987'):
+            for number in range(RECORDS):
+                logger.info('Статус не обновился, опрос %d', number)
+        emitted = time.perf_counter() - started
+        close()
+        drained = time.perf_counter() - started
+    return RECORDS / emitted, RECORDS / drained
+
+
+def test_logging_benchmark():
+    rows = [
+        ('sync + pytz per record', measure(legacy_logger)),
+        ('queue, text', measure(queued_logger, False)),
+        ('queue, json lines', measure(queued_logger, True)),
+    ]
+    print(f'\n{"":24} {"caller":>14} {"drained":>14}  records/s')
+    for name, (emitted, drained) in rows:
+        print(f'{name:24} {emitted:14,.0f} {drained:14,.0f}')
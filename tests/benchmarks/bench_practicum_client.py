@@ -0,0 +1,38 @@
+"""Pooled vs unpooled requests to a local Practicum API stub.
+
+Run explicitly: ``pytest tests/benchmarks/bench_practicum_client.py -s``
+"""
+import time
+
+import requests
+
+from practicum import PracticumClient
+from stub_api import StubPracticumAPI
+
+REQUESTS = 500
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def measure(client):
+    latencies = []
+    started = time.perf_counter()
+    for number in range(REQUESTS):
+        request_started = time.perf_counter()
+        client.get(f'token-{number}', number)
+        latencies.append(time.perf_counter() - request_started)
+    elapsed = time.perf_counter() - started
+    return REQUESTS / elapsed, percentile(latencies, 0.99)
+
+
+def test_pooling_benchmark():
+    with StubPracticumAPI() as stub:
+        unpooled = measure(PracticumClient(endpoint=stub.url, session=requests))
+        with PracticumClient(endpoint=stub.url) as client:
+            pooled = measure(client)
+    for name, (rps, p99) in (('unpooled', unpooled), ('pooled', pooled)):
+        print(f'\n{name:>9}: {rps:8.1f} req/s, p99 {p99 * 1000:6.2f} ms')
+    assert pooled[0] > unpooled[0]
@@ -0,0 +1,84 @@
+"""Polls per second against a local API stub for 1, 2 and 4 shard processes.
+
+Run explicitly: ``pytest tests/benchmarks/bench_shards.py -s``
+
+Every shard polls its own subscriptions one after another, the way
+``main()`` does with ``POLLING_WORKERS=1``; the stub answers each
+request after ``DELAY`` seconds, so a single process is bound by the
+API round trip and throughput should grow with the number of shards.
+"""
+import multiprocessing
+import time
+
+from stub_api import StubPracticumAPI
+
+DELAY = 0.02
+DURATION = 3.0
+SUBSCRIPTIONS = [(f'token-{number}', str(number)) for number in range(400)]
+HOMEWORKS = [
+    {'homework_name': f'hw{number}.zip', 'status': 'approved',
+     'date_updated': '2022-01-02T10:00:00Z'}
+    for number in range(20)
+]
+
+
+def run_shard(url, index, count, start, results):
+    import homework
+    import storage
+
+    from practicum import PracticumClient
+    from shards import select_shard
+    from subscriptions import SubscriptionRegistry
+
+    storage._store = storage.MemoryStateStore()
+    homework.logger.disabled = True
+    registry = SubscriptionRegistry()
+    for token, chat_id in select_shard(SUBSCRIPTIONS, index, count):
+        registry.add(token, chat_id, 1)
+    subscriptions = list(registry)
+    client = PracticumClient(endpoint=url)
+    start.wait()
+    deadline = time.monotonic() + DURATION
+    polls = 0
+    while time.monotonic() < deadline:
+        subscription = subscriptions[polls % len(subscriptions)]
+        response = homework.request_homework_statuses(
+            subscription.token, subscription.current_date, client=client
+        )
+        homework.handle_response(subscription, response)
+        polls += 1
+    results.put(polls)
+
+
+def polls_per_second(url, count):
+    context = multiprocessing.get_context('spawn')
+    start = context.Event()
+    results = context.Queue()
+    processes = [
+        context.Process(
+            target=run_shard, args=(url, index, count, start, results)
+        )
+        for index in range(count)
+    ]
+    for process in processes:
+        process.start()
+    time.sleep(1.0)
+    start.set()
+    total = sum(results.get(timeout=DURATION + 30) for _ in processes)
+    for process in processes:
+        process.join()
+    return total / DURATION
+
+
+def test_shard_scaling_benchmark():
+    with StubPracticumAPI(delay=DELAY, homeworks=HOMEWORKS) as stub:
+        rates = {
+            count: polls_per_second(stub.url, count) for count in (1, 2, 4)
+        }
+    base = rates[1]
+    print()
+    for count, rate in rates.items():
+        print(
+            f'{count} shard(s): {rate:8.1f} polls/s '
+            f'({rate / base:.2f}x, {rate / base / count:.0%} of linear)'
+        )
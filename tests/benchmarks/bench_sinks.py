@@ -0,0 +1,58 @@
+"""Fan-out of notifications to hundreds of webhook sinks.
+
+Run explicitly: ``pytest tests/benchmarks/bench_sinks.py -s``
+
+Reports how long the poll loop is blocked handing notifications to
+``FanOut`` (every sink has its own queue, a shared pool of threads sends)
+and the end-to-end delivery rate to a local HTTP receiver answering after
+``LATENCY`` seconds, compared with calling every sink in turn.
+"""
+import time
+
+from sinks import FanOut, SinkPool, SinkQueue, WebhookSink
+from stub_sinks import StubWebhookReceiver
+
+SINKS = 200
+NOTIFICATIONS = 5
+LATENCY = 0.005
+
+
+def sequential(receiver):
+    sinks = [WebhookSink(receiver.url) for _ in range(SINKS)]
+    started = time.perf_counter()
+    for number in range(NOTIFICATIONS):
+        for sink in sinks:
+            sink.send(1, f'notification {number}')
+    elapsed = time.perf_counter() - started
+    for sink in sinks:
+        sink.close()
+    return elapsed, elapsed
+
+
+def fanned_out(receiver):
+    fanout = FanOut([SinkPool([
+        SinkQueue(WebhookSink(receiver.url), rate=1000)
+        for _ in range(SINKS)
+    ])]).start()
+    started = time.perf_counter()
+    for number in range(NOTIFICATIONS):
+        fanout.send_message(chat_id=1, text=f'notification {number}')
+    submitted = time.perf_counter() - started
+    fanout.stop()
+    return submitted, time.perf_counter() - started
+
+
+def test_fan_out_benchmark():
+    deliveries = SINKS * NOTIFICATIONS
+    rows = []
+    for name, run in (('sequential', sequential), ('fan-out', fanned_out)):
+        with StubWebhookReceiver(delay=LATENCY) as receiver:
+            submitted, delivered = run(receiver)
+            assert len(receiver.wait_for(deliveries)) == deliveries
+        rows.append((name, submitted, delivered))
+    print(f'\n{SINKS} sinks x {NOTIFICATIONS} notifications')
+    for name, submitted, delivered in rows:
+        print(
+            f'{name:11} poll loop blocked {submitted * 1000:9.1f} ms, '
+            f'{deliveries / delivered:8,.0f} deliveries/s'
+        )
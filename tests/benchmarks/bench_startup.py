@@ -0,0 +1,56 @@
+"""Cold start of the bot: import time and peak RSS.
+
+Run explicitly: ``pytest tests/benchmarks/bench_startup.py -s``
+
+Compares ``homework.py --check`` (heavy modules are imported lazily and
+never touched) with importing the module together with the Telegram
+stack, ``requests`` and ``pytz``, and lists the slowest imports. The
+regression gates on import time and peak RSS live here rather than in the
+default suite because both depend on machine load.
+"""
+from startup import HOMEWORK, measure_startup
+
+TOKENS = {
+    'PRACTICUM_TOKEN': 'token', 'TELEGRAM_TOKEN': '123:token',
+    'TELEGRAM_CHAT_ID': '1',
+}
+ROUNDS = 5
+# Пороги регрессии холодного старта `--check` относительно загрузки
+# модуля вместе с Telegram и requests в том же окружении
+IMPORT_TIME_RATIO = 0.8
+RSS_SAVING_KIB = 2 * 1024
+
+
+def best(args):
+    runs = [measure_startup(args, TOKENS) for _ in range(ROUNDS)]
+    return min(runs, key=lambda run: run['import_us'])
+
+
+def test_startup_benchmark():
+    rows = [
+        ('python -c pass', best(['-c', 'pass'])),
+        ('homework --check', best([HOMEWORK, '--check'])),
+        ('eager imports', best(
+            ['-c', 'import telegram, requests, pytz, homework']
+        )),
+    ]
+    print(f'\nbest of {ROUNDS} runs')
+    for name, run in rows:
+        print(
+            f'{name:17} imports {run["import_us"] / 1000:7.1f} ms, '
+            f'peak rss {run["peak_rss_kib"] / 1024:5.1f} MiB'
+        )
+    print('slowest imports of homework --check (cumulative):')
+    for own, cumulative, name in sorted(
+        rows[1][1]['slowest'], key=lambda row: -row[1]
+    ):
+        print(f'  {cumulative / 1000:7.1f} ms {name.strip()}')
+    check, eager = rows[1][1], rows[2][1]
+    assert check['import_us'] < eager['import_us'] * IMPORT_TIME_RATIO, (
+        f'Импорт при `--check` занял {check["import_us"]} мкс, '
+        f'с Telegram и requests — {eager["import_us"]} мкс'
+    )
+    assert check['peak_rss_kib'] < eager['peak_rss_kib'] - RSS_SAVING_KIB, (
+        f'Пиковая память при `--check` {check["peak_rss_kib"]} КиБ, '
+        f'с Telegram и requests — {eager["peak_rss_kib"]} КиБ'
+    )
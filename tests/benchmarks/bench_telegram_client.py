@@ -0,0 +1,54 @@
+"""Send throughput and memory of the Telegram clients.
+
+Run explicitly: ``pytest tests/benchmarks/bench_telegram_client.py -s``
+
+Sends ``MESSAGES`` messages one after another to a local Bot API
+stand-in with ``telegram.Bot`` and with ``botapi.BotApiClient`` and
+reports messages per second, the peak of traced memory during the run
+and the memory still held afterwards.  The stand-in server runs in this
+process, so the messages it recorded are dropped before measuring.
+"""
+import time
+import tracemalloc
+
+import telegram
+
+from botapi import BotApiClient
+from stub_telegram import StubTelegramAPI
+
+MESSAGES = 1000
+TOKEN = '123456:benchmark'
+
+
+def run(client, stub):
+    client.send_message(chat_id=1, text='warm-up')
+    tracemalloc.start()
+    started = time.perf_counter()
+    for number in range(MESSAGES):
+        client.send_message(chat_id=1, text=f'message {number}')
+    elapsed = time.perf_counter() - started
+    delivered = len(stub.received)
+    stub.received.clear()
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size for stat in snapshot.statistics('filename'))
+    assert delivered == MESSAGES + 1
+    return elapsed, peak, allocated
+
+
+def test_telegram_client_benchmark():
+    rows = []
+    with StubTelegramAPI() as stub:
+        for name, client in (
+            ('telegram.Bot', telegram.Bot(TOKEN, base_url=stub.base_url)),
+            ('BotApiClient', BotApiClient(TOKEN, base_url=stub.base_url)),
+        ):
+            rows.append((name, *run(client, stub)))
+    print(f'\n{MESSAGES} sequential sendMessage calls')
+    for name, elapsed, peak, allocated in rows:
+        print(
+            f'{name:13} {MESSAGES / elapsed:7,.0f} messages/s, '
+            f'peak traced {peak / 1024:7.1f} KiB, '
+            f'retained {allocated / 1024:7.1f} KiB'
+        )
@@ -0,0 +1,106 @@
+"""Per-event cost and footprint of the homework status table.
+
+Run explicitly: ``pytest tests/benchmarks/bench_transitions.py -s``
+
+Feeds ``EVENTS`` synthetic status records for ``HOMEWORKS`` homeworks to
+``transitions.StatusTable`` and to a plain dict-of-tuples table with list
+histories, and reports nanoseconds per record and the memory each keeps
+per homework and per transition.  About half of the records are repeats
+or stale, as when the same response is polled again.
+"""
+import random
+import sys
+import time
+
+from transitions import StatusTable
+
+EVENTS = 2_000_000
+HOMEWORKS = 100_000
+CHUNK = 100_000
+STATUSES = ('reviewing', 'rejected', 'reviewing', 'approved')
+
+
+class DictTable:
+    """The straightforward table the compact one is compared with."""
+
+    def __init__(self):
+        self.state = {}
+        self.histories = {}
+
+    def observe(self, key, status, date):
+        known = self.state.get(key)
+        if known is not None and (
+            date < known[1] or date == known[1] and status == known[0]
+        ):
+            return None
+        self.state[key] = (status, date)
+        transition = (known and known[0], status, date)
+        self.histories.setdefault(key, []).append(transition)
+        return transition
+
+    def footprint(self):
+        return (
+            sys.getsizeof(self.state) + sys.getsizeof(self.histories)
+            + sum(sys.getsizeof(state) for state in self.state.values())
+            + sum(
+                sys.getsizeof(history) + sum(map(sys.getsizeof, history))
+                for history in self.histories.values()
+            )
+        )
+
+
+def table_footprint(table):
+    return sum(
+        sys.getsizeof(getattr(table, name)) for name in StatusTable.__slots__
+    )
+
+
+def events(seed=0):
+    """Records in chunks; every homework walks its lifecycle in order."""
+    rng = random.Random(seed)
+    steps = [0] * HOMEWORKS
+    for start in range(0, EVENTS, CHUNK):
+        chunk = []
+        for number in range(start, start + CHUNK):
+            key = rng.randrange(HOMEWORKS)
+            if rng.random() < 0.5:
+                steps[key] += 1
+            step = steps[key]
+            chunk.append((
+                key, STATUSES[step % len(STATUSES)], step * 600,
+            ))
+        yield chunk
+
+
+def run(table):
+    elapsed = 0.0
+    changes = 0
+    observe = table.observe
+    for chunk in events():
+        started = time.perf_counter()
+        for key, status, date in chunk:
+            if observe(key, status, date) is not None:
+                changes += 1
+        elapsed += time.perf_counter() - started
+    return elapsed, changes
+
+
+def test_transitions_benchmark():
+    compact = StatusTable()
+    plain = DictTable()
+    rows = []
+    for name, table, footprint in (
+        ('StatusTable', compact, table_footprint),
+        ('dict + lists', plain, DictTable.footprint),
+    ):
+        elapsed, changes = run(table)
+        rows.append((name, elapsed, changes, footprint(table)))
+    assert rows[0][2] == rows[1][2] == compact.transitions
+    print(f'\n{EVENTS:,} records, {HOMEWORKS:,} homeworks, '
+          f'{compact.transitions:,} transitions')
+    for name, elapsed, changes, size in rows:
+        print(
+            f'{name:12} {elapsed * 1e9 / EVENTS:6.0f} ns/record, '
+            f'{size / 2 ** 20:6.1f} MiB, '
+            f'{size / changes:5.1f} B/transition'
+        )
@@ -0,0 +1,101 @@
+"""Compiled check_response/parse_status vs the original pair.
+
+The hot path formats messages straight from precomputed verdicts and must
+not be slower than the original functions. The single-pass validator that
+builds a typed record per homework is reported for reference: it is used
+only where the records are needed (streaming, backfill).
+
+Run explicitly: ``pytest tests/benchmarks/bench_validation.py -s``
+"""
+import random
+import time
+
+import constants
+from validation import check_shape, homework_message, validate_response
+
+HOMEWORKS = 5000
+ROUNDS = 20
+
+
+def legacy_check_response(response):
+    if not response or not isinstance(response, dict):
+        raise TypeError('В ответе API ничего нет или это не словарь')
+    homeworks = response.get('homeworks')
+    current_date = response.get('current_date')
+    if homeworks is None or current_date is None:
+        raise TypeError('В ответе API нет ключей `homeworks` и `current_date`')
+    if not isinstance(homeworks, list) or not isinstance(current_date, int):
+        raise TypeError('В ответе API не ожидаемые типы значений')
+    return homeworks
+
+
+def legacy_parse_status(homework):
+    homework_name = homework.get('homework_name')
+    homework_status = homework.get('status')
+    if homework_status not in constants.HOMEWORK_STATUSES:
+        raise KeyError(
+            f'{homework_status} - недокументированный или отсутствует '
+            'статус домашней работы '
+        )
+    verdict = constants.HOMEWORK_STATUSES.get(homework_status)
+    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+
+
+def legacy(response):
+    return [
+        legacy_parse_status(homework)
+        for homework in legacy_check_response(response)
+    ]
+
+
+def compiled(response):
+    homeworks, _ = check_shape(response)
+    return [homework_message(homework) for homework in homeworks]
+
+
+def validated(response):
+    return [
+        homework.message for homework in validate_response(response).homeworks
+    ]
+
+
+def synthetic_response(size):
+    statuses = list(constants.HOMEWORK_STATUSES)
+    return {
+        'homeworks': [
+            {
+                'id': number,
+                'homework_name': f'user__project_{number}.zip',
+                'status': random.choice(statuses),
+                'reviewer_comment': 'Комментарий ревьюера',
+                'date_updated': f'2022-01-{number % 28 + 1:02}T10:00:00Z',
+                'lesson_name': f'Урок {number}',
+            }
+            for number in range(size)
+        ],
+        'current_date': 1000198000,
+    }
+
+
+def throughput(function, response, repeats=5):
+    best = float('inf')
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(ROUNDS):
+            function(response)
+        best = min(best, time.perf_counter() - started)
+    return HOMEWORKS * ROUNDS / best
+
+
+def test_validation_benchmark():
+    response = synthetic_response(HOMEWORKS)
+    assert legacy(response) == compiled(response) == validated(response)
+    old = throughput(legacy, response)
+    new = throughput(compiled, response)
+    records = throughput(validated, response)
+    print(
+        f'\nlegacy:    {old:12,.0f} homeworks/s'
+        f'\ncompiled:  {new:12,.0f} homeworks/s ({new / old:.2f}x)'
+        f'\nvalidated: {records:12,.0f} homeworks/s ({records / old:.2f}x)'
+    )
+    assert new >= old
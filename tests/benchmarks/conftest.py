@@ -0,0 +1,32 @@
+import time
+
+import pytest
+
+try:
+    import pytest_benchmark  # noqa: F401
+except ImportError:
+    class Benchmark:
+        """Minimal stand-in for the pytest-benchmark fixture."""
+
+        def __init__(self):
+            self.extra_info = {}
+            self.stats = {}
+
+        def pedantic(self, target, args=(), kwargs=None, rounds=1,
+                     iterations=1, **options):
+            timings = []
+            for _ in range(rounds):
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    result = target(*args, **(kwargs or {}))
+                timings.append((time.perf_counter() - started) / iterations)
+            self.stats = {'min': min(timings), 'max': max(timings),
+                          'mean': sum(timings) / len(timings)}
+            return result
+
+        def __call__(self, target, *args, **kwargs):
+            return self.pedantic(target, args, kwargs)
+
+    @pytest.fixture
+    def benchmark():
+        return Benchmark()
@@ -1,9 +1,76 @@
 import sys
+import threading
 from os.path import abspath, dirname
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 
 pytest_plugins = [
     'tests.fixtures.fixture_data'
 ]
+
+
+class MockBot:
+    """Records sent messages as `(chat_id, text)`; raises while `fail`."""
+
+    def __init__(self):
+        self.fail = False
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.fail:
+            raise RuntimeError('telegram is down')
+        with self._lock:
+            self.sent.append((chat_id, text))
+
+
+@pytest.fixture
+def bot():
+    return MockBot()
+
+
+@pytest.fixture(autouse=True)
+def memory_state_store(monkeypatch):
+    import storage
+
+    store = storage.MemoryStateStore()
+    monkeypatch.setattr(storage, '_store', store)
+    return store
+
+
+@pytest.fixture(autouse=True)
+def reset_breakers(monkeypatch):
+    import breaker
+
+    monkeypatch.setattr(breaker, '_breakers', {})
+    monkeypatch.setattr(breaker, '_token_breakers', {})
+    monkeypatch.setattr(breaker, '_random', breaker._random)
+
+
+@pytest.fixture(autouse=True)
+def reset_flight(monkeypatch):
+    import practicum
+
+    monkeypatch.setattr(practicum, '_flight', None)
+
+
+@pytest.fixture
+def bot_log():
+    """Capture the bot log; the returned callable drains the queue first."""
+    import io
+
+    import homework
+
+    stream = io.StringIO()
+    previous = homework._log_handler.setStream(stream)
+
+    def read():
+        homework._log_listener.stop()
+        homework._log_listener.start()
+        return stream.getvalue()
+
+    yield read
+    homework._log_handler.setStream(previous)
@@ -0,0 +1,361 @@
+"""Record and replay of homework status traces against the real bot.
+
+A trace is a JSON lines file of status changes::
+
+    {"offset": 1800.0, "token": "token-0", "homework_name": "hw-0-0",
+     "status": "reviewing"}
+
+``offset`` is in seconds from the start of the trace.  ``run_replay``
+starts ``homework.py`` as a separate process against local stand-ins for
+the Practicum and Telegram APIs and plays the trace in accelerated time:
+``speed`` virtual seconds pass per real second, and the bot polls every
+``RETRY_TIME / speed`` real seconds, so a day of polling takes minutes.
+
+Record a trace from the real API (uses ``PRACTICUM_TOKEN``)::
+
+    python tests/replay.py record trace.jsonl --duration 86400
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from collections import defaultdict
+
+from stub_api import StubPracticumAPI
+from stub_telegram import StubTelegramAPI
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from validation import MESSAGE_PREFIX, VERDICTS  # noqa: E402
+
+HOMEWORK = os.path.join(ROOT, 'homework.py')
+RETRY_TIME = 600
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+
+def synthetic_trace(tokens, homeworks=2, duration=6 * 3600, start=0.0,
+                    seed=0):
+    """Every homework is taken for review and then approved or rejected."""
+    rng = random.Random(seed)
+    events = []
+    for token_number, token in enumerate(tokens):
+        for number in range(homeworks):
+            name = f'hw-{token_number}-{number}'
+            taken = start + rng.uniform(0, (duration - start) * 0.5)
+            checked = taken + rng.uniform(
+                RETRY_TIME, (duration - taken) * 0.9
+            )
+            verdict = rng.choice(('approved', 'rejected'))
+            events.append(make_event(taken, token, name, 'reviewing'))
+            events.append(make_event(checked, token, name, verdict))
+    return sorted(events, key=lambda event: event['offset'])
+
+
+def make_event(offset, token, homework_name, status):
+    return {'offset': round(offset, 3), 'token': token,
+            'homework_name': homework_name, 'status': status}
+
+
+def save_trace(events, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        for event in events:
+            file.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+
+def load_trace(path):
+    with open(path, encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def parse_date(value):
+    return datetime.datetime.strptime(
+        value, '%Y-%m-%dT%H:%M:%SZ'
+    ).replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+def format_date(seconds):
+    return datetime.datetime.fromtimestamp(
+        seconds, datetime.timezone.utc
+    ).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class TraceRecorder:
+    """Turns successive API responses of one token into trace events.
+
+    Events are stored under ``label`` so that traces carry no secrets.
+    """
+
+    def __init__(self, token, label='token-0', started=None):
+        self.token = token
+        self.label = label
+        self.started = started
+        self.events = []
+        self._seen = {}
+
+    def observe(self, response):
+        for homework in response.get('homeworks', []):
+            name = homework['homework_name']
+            state = (homework['status'], homework['date_updated'])
+            if self._seen.get(name) == state:
+                continue
+            self._seen[name] = state
+            moment = parse_date(homework['date_updated'])
+            if self.started is None:
+                self.started = moment
+            self.events.append(make_event(
+                max(moment - self.started, 0), self.label, name,
+                homework['status'],
+            ))
+
+    def record(self, client, from_date, duration, interval, sleep=time.sleep):
+        deadline = time.monotonic() + duration
+        while True:
+            response = client.get(self.token, from_date)
+            response.raise_for_status()
+            data = response.json()
+            self.observe(data)
+            from_date = data.get('current_date', from_date)
+            if time.monotonic() + interval > deadline:
+                return sorted(self.events, key=lambda event: event['offset'])
+            sleep(interval)
+
+
+class VirtualClock:
+    """Wall clock running ``speed`` times faster from ``anchor``."""
+
+    def __init__(self, speed, anchor=None):
+        self.speed = speed
+        self.anchor = time.time() if anchor is None else anchor
+        self.started = time.monotonic()
+
+    def now(self):
+        return self.anchor + (time.monotonic() - self.started) * self.speed
+
+
+class ReplayPracticumAPI(StubPracticumAPI):
+    """Practicum API stand-in answering from a trace in virtual time.
+
+    A response holds the latest state of every homework of the token
+    changed since ``from_date``; ``payload_size`` pads each homework's
+    reviewer comment to mimic heavy responses.
+    """
+
+    def __init__(self, events, clock, payload_size=0, **kwargs):
+        super().__init__(**kwargs)
+        self.clock = clock
+        self.payload_size = payload_size
+        self.timeline = defaultdict(lambda: defaultdict(list))
+        for event in sorted(events, key=lambda event: event['offset']):
+            self.timeline[event['token']][event['homework_name']].append(
+                (clock.anchor + event['offset'], event['status'])
+            )
+
+    def homeworks_for(self, token, from_date, now):
+        homeworks = []
+        for number, (name, changes) in enumerate(
+            sorted(self.timeline.get(token, {}).items())
+        ):
+            past = [change for change in changes if change[0] <= now]
+            if not past or past[-1][0] < from_date:
+                continue
+            moment, status = past[-1]
+            homeworks.append({
+                'id': number,
+                'status': status,
+                'homework_name': name,
+                'reviewer_comment': 'x' * self.payload_size,
+                'date_updated': format_date(moment),
+                'lesson_name': name,
+            })
+        return homeworks
+
+    def response_body(self, query, headers):
+        token = headers.get('Authorization', '').replace('OAuth ', '', 1)
+        from_date = int(query['from_date'][0])
+        now = self.clock.now()
+        return json.dumps({
+            'homeworks': self.homeworks_for(token, from_date, now),
+            'current_date': int(now),
+        }).encode()
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile; None for an empty sample."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def process_usage(pid):
+    """CPU seconds and peak RSS in KiB of a running process."""
+    with open(f'/proc/{pid}/stat') as file:
+        fields = file.read().rsplit(')', 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    peak = 0
+    with open(f'/proc/{pid}/status') as file:
+        for line in file:
+            if line.startswith('VmHWM:'):
+                peak = int(line.split()[1])
+    return cpu, peak
+
+
+def match_notifications(events, received, chats, deadline):
+    """Latencies of delivered events and the number of missed ones.
+
+    Only events older than ``deadline`` are expected to be delivered.
+    Notifications sent together are folded into one message, so each
+    message delivers the earliest pending event of every text it holds.
+    A state replaced by the next one before any poll saw it counts as
+    missed: a polling client cannot observe it.
+    """
+    pending = defaultdict(lambda: defaultdict(list))
+    for event in events:
+        text = (f'{MESSAGE_PREFIX}{event["homework_name"]}'
+                f'{VERDICTS[event["status"]]}')
+        pending[chats[event['token']]][text].append(event['time'])
+    latencies = []
+    for message in sorted(received, key=lambda message: message['time']):
+        for text, times in pending[str(message['chat_id'])].items():
+            if times and times[0] <= message['time'] and (
+                text in message['text']
+            ):
+                latencies.append(message['time'] - times.pop(0))
+    missed = sum(
+        1 for texts in pending.values() for times in texts.values()
+        for moment in times if moment <= deadline
+    )
+    return latencies, missed
+
+
+class ReplayReport:
+    """Outcome of one replay run."""
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+    def as_dict(self):
+        return dict(self.__dict__)
+
+    def format(self):
+        p = {name: self.latency.get(name) for name in ('p50', 'p95', 'p99')}
+        latency = ', '.join(
+            f'{name} {value:.0f} s' if value is not None else f'{name} -'
+            for name, value in p.items()
+        )
+        return (
+            f'{self.subscriptions} subscriptions, speed x{self.speed:g}: '
+            f'{self.polls_per_second:.1f} polls/s, '
+            f'{self.delivered}/{self.events} events delivered, '
+            f'{self.missed} missed\n'
+            f'  notification latency (virtual): {latency}\n'
+            f'  cpu {self.cpu_seconds:.2f} s, '
+            f'{self.cpu_ms_per_poll:.2f} ms/poll, '
+            f'peak rss {self.peak_rss_kib / 1024:.1f} MiB, '
+            f'{self.rss_kib_per_subscription:.1f} KiB/subscription'
+        )
+
+
+def run_replay(events, tokens, speed=300.0, duration=20.0, latency=0.0,
+               error_rate=0.0, payload_size=0, workers=4, seed=0,
+               extra_env=None):
+    """Plays ``events`` to a ``homework.py`` process for ``duration`` s."""
+    chats = {token: str(1000 + number) for number, token in enumerate(tokens)}
+    clock = VirtualClock(speed)
+    for event in events:
+        event['time'] = clock.anchor + event['offset']
+    with tempfile.TemporaryDirectory() as directory, \
+            ReplayPracticumAPI(events, clock, payload_size=payload_size,
+                               delay=latency, error_rate=error_rate,
+                               seed=seed) as api, \
+            StubTelegramAPI(clock=clock.now) as telegram:
+        subscriptions = os.path.join(directory, 'subscriptions.txt')
+        with open(subscriptions, 'w') as file:
+            for token in tokens[1:]:
+                file.write(f'{token} {chats[token]}\n')
+        env = dict(
+            os.environ,
+            PRACTICUM_TOKEN=tokens[0],
+            TELEGRAM_CHAT_ID=chats[tokens[0]],
+            TELEGRAM_TOKEN='123456:replay',
+            PRACTICUM_ENDPOINT=api.url,
+            TELEGRAM_API_URL=telegram.base_url,
+            SUBSCRIPTIONS_FILE=subscriptions,
+            RETRY_TIME=str(RETRY_TIME / speed),
+            POLLING_WORKERS=str(workers),
+            STATE_DB='',
+            METRICS_PORT='',
+            WEBHOOK_PORT='',
+            **(extra_env or {}),
+        )
+        process = subprocess.Popen(
+            [sys.executable, HOMEWORK], cwd=directory, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            time.sleep(duration)
+            cpu, peak = process_usage(process.pid)
+        finally:
+            process.terminate()
+            try:
+                process.wait(5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        end = clock.now()
+        polls = len(api.requests)
+        received = list(telegram.received)
+    played = [event for event in events if event['time'] <= end]
+    latencies, missed = match_notifications(
+        played, received, chats, end - RETRY_TIME * 2
+    )
+    return ReplayReport(
+        subscriptions=len(tokens),
+        speed=speed,
+        polls=polls,
+        polls_per_second=polls / duration,
+        events=len(played),
+        delivered=len(latencies),
+        missed=missed,
+        latency={
+            'p50': percentile(latencies, 0.5),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+        },
+        cpu_seconds=cpu,
+        cpu_ms_per_poll=cpu * 1000 / max(polls, 1),
+        peak_rss_kib=peak,
+        rss_kib_per_subscription=peak / len(tokens),
+    )
+
+
+def record_main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    record = commands.add_parser('record')
+    record.add_argument('output')
+    record.add_argument('--duration', type=float, default=3600)
+    record.add_argument('--interval', type=float, default=RETRY_TIME)
+    record.add_argument('--from-date', type=int, default=0)
+    args = parser.parse_args(argv)
+    from practicum import PracticumClient
+
+    token = os.environ['PRACTICUM_TOKEN']
+    with PracticumClient() as client:
+        events = TraceRecorder(token).record(
+            client, args.from_date, args.duration, args.interval
+        )
+    save_trace(events, args.output)
+    print(f'{len(events)} events written to {args.output}')
+
+
+if __name__ == '__main__':
+    record_main()
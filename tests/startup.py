@@ -0,0 +1,63 @@
+"""Cold start measurements of the bot process."""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOMEWORK = os.path.join(ROOT, 'homework.py')
+TELEGRAM_STACK = ('telegram', 'requests', 'urllib3', 'certifi', 'tornado')
+# Peak RSS is read from /proc in the child itself: ``ru_maxrss`` of a
+# forked child also counts the memory of the parent before ``exec``.
+RUNNER = """
+import atexit, sys
+def report():
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmHWM:'):
+                sys.stderr.write('peak_rss_kib ' + line.split()[1] + chr(10))
+atexit.register(report)
+if sys.argv[1] == '-c':
+    exec(sys.argv[2])
+else:
+    import runpy
+    sys.argv = sys.argv[1:]
+    runpy.run_path(sys.argv[0], run_name='__main__')
+"""
+
+
+def measure_startup(args, env=None):
+    """Runs ``python -X importtime *args`` and returns its startup costs.
+
+    Import times come from ``-X importtime`` (microseconds, without modules
+    imported by ``site``), peak RSS in KiB from ``VmHWM``.
+    """
+    process = subprocess.Popen(
+        [sys.executable, '-X', 'importtime', '-c', RUNNER, *args],
+        cwd=ROOT, env=dict(os.environ, **(env or {})),
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    stderr = process.stderr.read().decode()
+    process.stderr.close()
+    exit_code = process.wait()
+    rows = []
+    peak = 0
+    for line in stderr.splitlines():
+        if line.startswith('peak_rss_kib '):
+            peak = int(line.split()[1])
+        if not line.startswith('import time:'):
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        if own.strip().isdigit():
+            rows.append((int(own), int(cumulative), name.rstrip()))
+    # `-X importtime` logs a module after everything it imported, so the
+    # rows up to `site` are the interpreter's own start-up
+    names = [name for _, _, name in rows]
+    if ' site' in names:
+        rows = rows[names.index(' site') + 1:]
+    return {
+        'exit_code': exit_code,
+        'import_us': sum(own for own, _, _ in rows),
+        'modules': {name.strip() for _, _, name in rows},
+        'slowest': sorted(rows, reverse=True)[:10],
+        'peak_rss_kib': peak,
+    }
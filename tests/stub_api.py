@@ -0,0 +1,100 @@
+import json
+import random
+import threading
+import time
+
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class StubPracticumAPI:
+    """Local stand-in for the Practicum homework statuses API."""
+
+    def __init__(self, delay=0.0, homeworks=None,
+                 status=HTTPStatus.OK, current_date=1000198000,
+                 error_rate=0.0, seed=None):
+        self.delay = delay
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.homeworks = homeworks or []
+        self.status = status
+        self.current_date = current_date
+        self.requests = []
+        self.connections = set()
+        self.etag = None
+        self.response_headers = {}
+        self._lock = threading.Lock()
+        self.server = StubServer(('127.0.0.1', 0), self._handler())
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        )
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f'http://{host}:{port}/api/user_api/homework_statuses/'
+
+    def body(self, query):
+        return json.dumps({
+            'homeworks': self.homeworks,
+            'current_date': self.current_date,
+        }).encode()
+
+    def response_body(self, query, headers):
+        return self.body(query)
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                with stub._lock:
+                    stub.requests.append({
+                        'query': query, 'headers': dict(self.headers),
+                    })
+                    stub.connections.add(self.client_address)
+                if stub.delay:
+                    time.sleep(stub.delay)
+                if stub.etag and self.headers.get('If-None-Match') == stub.etag:
+                    self.send_response(HTTPStatus.NOT_MODIFIED)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                status = stub.status
+                if stub.error_rate and stub.random.random() < stub.error_rate:
+                    status = HTTPStatus.INTERNAL_SERVER_ERROR
+                    body = b'{"error": "stub failure"}'
+                else:
+                    body = stub.response_body(query, self.headers)
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                if stub.etag:
+                    self.send_header('ETag', stub.etag)
+                for name, value in stub.response_headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
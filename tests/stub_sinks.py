@@ -0,0 +1,125 @@
+import json
+import socketserver
+import threading
+import time
+
+from email import message_from_bytes, policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubServer:
+
+    def __enter__(self):
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def wait_for(self, count, timeout=5):
+        deadline = time.monotonic() + timeout
+        while len(self.received) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.received
+
+
+class StubSMTPServer(StubServer):
+    """Local SMTP stand-in that keeps every accepted message."""
+
+    def __init__(self):
+        self.received = []
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+
+            def reply(self, line):
+                self.wfile.write(line.encode() + b'\r\n')
+
+            def handle(self):
+                self.reply('220 stub ESMTP')
+                envelope = {}
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line.decode().strip()
+                    verb = command.split(' ', 1)[0].upper()
+                    if verb == 'EHLO':
+                        self.reply('250 stub')
+                    elif verb in ('HELO', 'RSET', 'NOOP'):
+                        self.reply('250 OK')
+                    elif verb == 'MAIL':
+                        envelope = {'from': command, 'to': []}
+                        self.reply('250 OK')
+                    elif verb == 'RCPT':
+                        envelope['to'].append(command)
+                        self.reply('250 OK')
+                    elif verb == 'DATA':
+                        self.reply('354 End data with <CR><LF>.<CR><LF>')
+                        stub.received.append(self.read_data())
+                        self.reply('250 OK')
+                    elif verb == 'QUIT':
+                        self.reply('221 Bye')
+                        return
+                    else:
+                        self.reply('502 Not implemented')
+
+            def read_data(self):
+                lines = []
+                for line in self.rfile:
+                    if line in (b'.\r\n', b'.\n'):
+                        break
+                    lines.append(line[1:] if line.startswith(b'..') else line)
+                return message_from_bytes(
+                    b''.join(lines), policy=policy.default
+                )
+
+        self.server = socketserver.ThreadingTCPServer(
+            ('127.0.0.1', 0), Handler
+        )
+        self.server.daemon_threads = True
+
+    @property
+    def address(self):
+        return self.server.server_address
+
+
+class StubWebhookReceiver(StubServer):
+    """Local HTTP endpoint that records JSON notifications."""
+
+    def __init__(self, status=200, delay=0.0):
+        self.received = []
+        self.status = status
+        self.delay = delay
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                payload = json.loads(self.rfile.read(length))
+                if stub.delay:
+                    time.sleep(stub.delay)
+                if stub.status == 200:
+                    stub.received.append(payload)
+                self.send_response(stub.status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.server.request_queue_size = 128
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f'http://{host}:{port}/notify'
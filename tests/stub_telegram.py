@@ -0,0 +1,93 @@
+import json
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler
+
+from stub_api import StubServer
+
+
+class StubTelegramAPI:
+    """Local stand-in for the Bot API ``sendMessage`` method."""
+
+    def __init__(self, delay=0.0, clock=time.monotonic):
+        self.delay = delay
+        self.clock = clock
+        self.received = []
+        self.errors = []
+        self.connections = set()
+        self._lock = threading.Lock()
+        self.server = StubServer(('127.0.0.1', 0), self._handler())
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        )
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address
+        return f'http://{host}:{port}/bot'
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                if stub.delay:
+                    time.sleep(stub.delay)
+                with stub._lock:
+                    stub.connections.add(self.client_address)
+                    error = stub.errors.pop(0) if stub.errors else None
+                if error is not None:
+                    self.reply(error, error['error_code'])
+                    return
+                if not self.path.endswith('/sendMessage'):
+                    self.reply({'ok': False, 'error_code': 404,
+                                'description': 'Not Found'}, 404)
+                    return
+                with stub._lock:
+                    stub.received.append({
+                        'time': stub.clock(),
+                        'chat_id': payload.get('chat_id'),
+                        'text': payload.get('text'),
+                        'payload': payload,
+                    })
+                    message_id = len(stub.received)
+                self.reply({'ok': True, 'result': {
+                    'message_id': message_id,
+                    'date': int(time.time()),
+                    'chat': {'id': int(payload.get('chat_id', 0)),
+                             'type': 'private'},
+                    'text': payload.get('text'),
+                }})
+
+            def reply(self, data, status=200):
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def wait_for(self, count, timeout=5):
+        deadline = time.monotonic() + timeout
+        while len(self.received) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.received
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
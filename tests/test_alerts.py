@@ -0,0 +1,114 @@
+import json
+
+import pytest
+import requests
+
+import clock
+import constants
+import homework
+
+from alerts import ErrorDigest, error_category
+from clock import VirtualClock
+from exceptions import (
+    CircuitBreakerOpen, ResponseIsNotJSON, ResponseStatusIsNotOK,
+)
+from subscriptions import Subscription
+
+HOUR = 3600
+
+
+@pytest.fixture
+def virtual_clock(monkeypatch):
+    virtual = VirtualClock(start=1_600_000_000)
+    monkeypatch.setattr(clock, '_clock', virtual)
+    return virtual
+
+
+@pytest.mark.parametrize('error, category', [
+    (ResponseStatusIsNotOK('Статус код ответа от API 502'), 'status'),
+    (ResponseStatusIsNotOK('Статус код ответа от API 503'), 'status'),
+    (requests.exceptions.ConnectionError('refused'), 'network'),
+    (requests.exceptions.ReadTimeout('timeout'), 'timeout'),
+    (ResponseIsNotJSON('Не удалось декодировать в json.'), 'json'),
+    (json.JSONDecodeError('Expecting value', '', 0), 'json'),
+    (CircuitBreakerOpen('API недоступно'), 'breaker'),
+    (KeyError('homework_name'), 'response'),
+    (RuntimeError('boom'), 'RuntimeError'),
+])
+def test_error_category(error, category):
+    assert error_category(error) == category
+
+
+class TestErrorDigest:
+
+    def test_varying_errors_are_digested(self):
+        digest = ErrorDigest(window=HOUR, interval=HOUR)
+        sent = []
+        for minute in range(0, 180, 10):
+            error = ResponseStatusIsNotOK(
+                f'Статус код ответа от API {500 + minute % 4}'
+            ) if minute % 20 else requests.exceptions.ConnectionError('x')
+            message = digest.record(error, minute * 60)
+            if message:
+                sent.append(message)
+        assert len(sent) == 3, 'Первый сбой и сводки раз в час'
+        assert sent[0].startswith('Сбой в работе программы')
+        assert 'Сбой продолжается 2.0 ч' in sent[2]
+        assert 'статус ответа API не 200 ×3' in sent[2]
+        assert 'эндпоинт недоступен ×3' in sent[2], (
+            'Сводка считает ошибки только за скользящее окно'
+        )
+        recovered = digest.recover(180 * 60)
+        assert recovered.startswith('Работа восстановлена')
+        assert 'ошибок: 18' in recovered
+        assert digest.recover(190 * 60) is None
+
+    def test_flapping_does_not_spam(self):
+        digest = ErrorDigest(window=HOUR, interval=HOUR)
+        sent = []
+        for minute in range(0, 120, 10):
+            now = minute * 60
+            message = (
+                digest.record(RuntimeError('boom'), now) if minute % 20 == 0
+                else digest.recover(now)
+            )
+            if message:
+                sent.append(message)
+        assert [text.split()[0] for text in sent] == [
+            'Сбой', 'Работа', 'Сбой', 'Работа',
+        ], 'Новый сбой вскоре после сообщения ждёт следующего интервала'
+
+    def test_unreported_outage_recovers_silently(self):
+        digest = ErrorDigest(window=HOUR, interval=HOUR)
+        digest.record(RuntimeError('boom'), 0)
+        digest.recover(60)
+        assert digest.record(RuntimeError('boom'), 120) is None
+        assert digest.recover(180) is None
+
+
+class TestPollErrors:
+
+    def test_outage_sends_first_error_and_recovery(
+        self, monkeypatch, virtual_clock, bot
+    ):
+        monkeypatch.setattr(constants, 'RETRY_TIME', 600)
+        response = {'homeworks': [], 'current_date': 200}
+        codes = iter([502, 503, 504, 500, None])
+
+        def request(token, current_timestamp):
+            code = next(codes)
+            if code:
+                raise ResponseStatusIsNotOK(f'Статус код ответа от API {code}')
+            return response
+
+        monkeypatch.setattr(homework, 'request_homework_statuses', request)
+        subscription = Subscription('token', '1', 100)
+        for _ in range(5):
+            homework.poll_subscription(bot, subscription)
+            virtual_clock.advance(constants.RETRY_TIME)
+        assert [text for _, text in bot.sent] == [
+            'Сбой в работе программы: Статус код ответа от API 502',
+            'Работа восстановлена после сбоя длительностью 40 мин, '
+            'ошибок: 4',
+        ]
+        assert subscription.current_date == 200
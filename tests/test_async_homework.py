@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+import pytest
+
+from stub_api import StubPracticumAPI
+
+
+@pytest.fixture
+def stub_api(monkeypatch):
+    import constants
+
+    with StubPracticumAPI(delay=0.2) as stub:
+        monkeypatch.setattr(constants, 'ENDPOINT', stub.url)
+        yield stub
+
+
+class TestAsyncHomework:
+
+    def test_concurrent_polls_take_one_round_trip(self, stub_api):
+        import async_homework
+
+        polls = 20
+
+        async def poll_all():
+            return await asyncio.gather(*(
+                async_homework.request_homework_statuses(f'token-{n}', 1)
+                for n in range(polls)
+            ))
+
+        started = time.monotonic()
+        answers = asyncio.run(poll_all())
+        elapsed = time.monotonic() - started
+
+        assert len(stub_api.requests) == polls
+        assert all(answer['homeworks'] == [] for answer in answers)
+        assert elapsed < 2 * stub_api.delay, (
+            f'{polls} конкурентных опросов должны занимать порядка одного '
+            f'обращения к API, а заняли {elapsed:.2f} с'
+        )
+
+    def test_poll_subscription_sends_status(self, stub_api, monkeypatch, bot):
+        import async_homework
+        import metrics
+        from subscriptions import Subscription
+
+        monkeypatch.setattr(metrics, '_last_success', None)
+
+        stub_api.homeworks = [
+            {'homework_name': 'hw123', 'status': 'approved'},
+        ]
+        subscription = Subscription('token', '42', 1)
+
+        asyncio.run(async_homework.poll_subscription(bot, subscription))
+
+        assert bot.sent == [(
+            '42',
+            'Изменился статус проверки работы "hw123". '
+            'Работа проверена: ревьюеру всё понравилось. Ура!',
+        )]
+        assert subscription.current_date == stub_api.current_date
+        assert metrics._last_success is not None
@@ -0,0 +1,185 @@
+import json
+import threading
+import time
+
+import pytest
+
+from streaming import HomeworkStream
+from subscriptions import SubscriptionRegistry
+
+
+def make_history(token, count):
+    return [
+        {'homework_name': f'{token}-{number}',
+         'status': ('approved', 'reviewing', 'rejected')[number % 3],
+         'date_updated': f'2022-01-01T{number // 60:04d}:{number % 60:02d}'}
+        for number in range(count)
+    ]
+
+
+class Histories(dict):
+    """Истории работ по токенам и пик одновременных запросов."""
+
+    peak = 0
+
+
+@pytest.fixture
+def histories(monkeypatch):
+    import homework
+
+    histories = Histories()
+    active = []
+    lock = threading.Lock()
+
+    def stream(token, current_timestamp, client=None):
+        with lock:
+            active.append(token)
+            histories.peak = max(histories.peak, len(active))
+        time.sleep(0.01)
+        with lock:
+            active.remove(token)
+        if token not in histories:
+            raise homework.ResponseStatusIsNotOK('Статус код 500')
+        body = json.dumps({
+            'homeworks': histories[token], 'current_date': 5000,
+        }).encode()
+        return HomeworkStream(
+            body[start:start + 1024] for start in range(0, len(body), 1024)
+        )
+
+    monkeypatch.setattr(homework, 'stream_homework_statuses', stream)
+    return histories
+
+
+@pytest.fixture
+def registry():
+    registry = SubscriptionRegistry()
+    registry.add('token-a', 1, 100)
+    registry.add('token-b', 1, 100)
+    registry.add('token-c', 2, 100)
+    return registry
+
+
+class TestBackfill:
+
+    def test_one_batched_send_per_chat(self, histories, registry, bot):
+        import homework
+
+        histories['token-a'] = make_history('a', 10)
+        histories['token-b'] = make_history('b', 10)
+        histories['token-c'] = make_history('c', 3000)
+        sent = homework.backfill(bot, registry, 0, workers=2)
+
+        assert sent == 3020
+        chat_1 = [text for chat, text in bot.sent if chat == '1']
+        assert len(chat_1) == 1, 'Уведомления чата должны уходить одной пачкой'
+        assert '"a-9"' in chat_1[0] and '"b-0"' in chat_1[0]
+        chat_2 = [text for chat, text in bot.sent if chat == '2']
+        assert all(len(text) <= 4096 for text in chat_2)
+        assert sum(text.count('Изменился статус') for text in chat_2) == 3000
+        assert all(
+            subscription.current_date == 5000 for subscription in registry
+        )
+        statuses = registry.get(('token-a', '1')).statuses
+        assert len(statuses) == 10
+        assert statuses.status('a-9') == 'approved'
+
+        bot.sent.clear()
+        assert homework.backfill(bot, registry, 0, workers=2) == 0
+        assert bot.sent == [], 'Повторная догрузка не должна дублировать'
+
+    def test_failed_token_does_not_block_others(
+        self, histories, registry, bot
+    ):
+        import homework
+
+        histories['token-c'] = make_history('c', 5)
+
+        assert homework.backfill(bot, registry, 0, workers=2) == 5
+        assert [chat for chat, _ in bot.sent] == ['2']
+        assert registry.get(('token-a', '1')).current_date == 100
+
+    def test_parallelism_is_bounded(self, histories, bot):
+        import homework
+
+        registry = SubscriptionRegistry()
+        for number in range(12):
+            registry.add(f'token-{number}', number, 100)
+            histories[f'token-{number}'] = make_history(str(number), 2)
+
+        assert homework.backfill(bot, registry, 0, workers=3) == 24
+        assert histories.peak <= 3
+
+    def test_send_failure_keeps_cursor(
+        self, monkeypatch, histories, registry, bot
+    ):
+        import homework
+
+        histories['token-c'] = make_history('c', 5)
+        monkeypatch.setattr(
+            homework, 'send_chat_message', lambda *args: False
+        )
+        assert homework.backfill(bot, registry, 0) == 0
+        assert registry.get(('token-c', '2')).current_date == 100
+
+
+class TestBackfillCommand:
+
+    def test_from_date_formats(self):
+        import homework
+
+        args = homework.parse_args(['backfill', '--from-date', '1549962000'])
+        assert args.command == 'backfill'
+        assert args.from_date == 1549962000
+        args = homework.parse_args(
+            ['backfill', '--from-date', '2019-02-12T12:00:00+03:00',
+             '--workers', '8']
+        )
+        assert args.from_date == 1549962000
+        assert args.workers == 8
+
+    def test_naive_date_without_timezone(self, monkeypatch):
+        import datetime
+
+        import constants
+        import homework
+
+        monkeypatch.setattr(constants, 'TIMEZONE', None)
+        args = homework.parse_args(['backfill', '--from-date', '2022-01-01'])
+        assert args.from_date == int(
+            datetime.datetime(2022, 1, 1).timestamp()
+        )
+        monkeypatch.setattr(constants, 'TIMEZONE', 'UTC')
+        args = homework.parse_args(['backfill', '--from-date', '2022-01-01'])
+        assert args.from_date == 1640995200
+
+    def test_unknown_timezone_is_usage_error(self, monkeypatch, capsys):
+        import constants
+        import homework
+
+        monkeypatch.setattr(constants, 'TIMEZONE', 'Nowhere/City')
+        with pytest.raises(SystemExit) as exit_info:
+            homework.parse_args(['backfill', '--from-date', '2022-01-01'])
+        assert exit_info.value.code == 2
+        assert 'Nowhere/City' in capsys.readouterr().err
+
+    def test_no_command_runs_bot(self):
+        import homework
+
+        assert homework.parse_args([]).command is None
+
+    def test_streams_from_stub_api(self, bot):
+        import homework
+        from practicum import PracticumClient
+        from stub_api import StubPracticumAPI
+
+        registry = SubscriptionRegistry()
+        registry.add('token', 1, 100)
+        with StubPracticumAPI(homeworks=make_history('s', 50)) as stub:
+            with PracticumClient(endpoint=stub.url) as client:
+                assert homework.backfill(
+                    bot, registry, 42, client=client
+                ) == 50
+        assert stub.requests[0]['query'] == {'from_date': ['42']}
+        assert len(stub.requests) == 1
+        assert sum(text.count('"s-') for _, text in bot.sent) == 50
@@ -0,0 +1,145 @@
+import pytest
+import telegram
+
+import constants
+
+from botapi import BotApiClient, make_bot
+from exceptions import BotApiUnavailable, TelegramAPIError, TelegramRetryAfter
+from outbox import Outbox
+from stub_telegram import StubTelegramAPI
+
+
+def retry_after(seconds):
+    return {'ok': False, 'error_code': 429,
+            'description': 'Too Many Requests',
+            'parameters': {'retry_after': seconds}}
+
+
+class TestBotApiClient:
+
+    def test_send_message(self):
+        with StubTelegramAPI() as stub:
+            client = BotApiClient('123:token', base_url=stub.base_url)
+            message = client.send_message(chat_id='42', text='Привет')
+            client.send_message(42, '*жирный*', parse_mode='MarkdownV2')
+            client.close()
+        assert message['message_id'] == 1
+        assert message['chat']['id'] == 42
+        assert stub.received[0]['payload'] == {
+            'chat_id': '42', 'text': 'Привет',
+        }
+        assert stub.received[1]['payload']['parse_mode'] == 'MarkdownV2'
+
+    def test_errors(self):
+        with StubTelegramAPI() as stub:
+            client = BotApiClient('123:token', base_url=stub.base_url)
+            stub.errors = [
+                retry_after(7),
+                {'ok': False, 'error_code': 400,
+                 'description': 'Bad Request: chat not found'},
+            ]
+            with pytest.raises(TelegramRetryAfter) as retry:
+                client.send_message(1, 'text')
+            with pytest.raises(TelegramAPIError, match='chat not found'):
+                client.send_message(1, 'text')
+        assert retry.value.retry_after == 7
+
+    def test_connections_are_reused(self):
+        with StubTelegramAPI() as stub:
+            client = BotApiClient('123:token', base_url=stub.base_url)
+            for number in range(20):
+                client.send_message(1, f'message {number}')
+        assert len(stub.received) == 20
+        assert len(stub.connections) == 1, (
+            'Клиент должен переиспользовать соединение из пула'
+        )
+
+    def test_send_messages_folds_each_chat(self):
+        with StubTelegramAPI() as stub:
+            client = BotApiClient('123:token', base_url=stub.base_url)
+            client.send_messages([(1, 'a'), (2, 'b'), (1, 'c'), (1, 'd')])
+        assert [
+            (message['chat_id'], message['text'])
+            for message in stub.received
+        ] == [(1, 'a\n\nc\n\nd'), (2, 'b')]
+
+    def test_outbox_waits_retry_after(self):
+        with StubTelegramAPI() as stub:
+            stub.errors = [retry_after(0.1)]
+            outbox = Outbox(
+                BotApiClient('123:token', base_url=stub.base_url)
+            ).start()
+            outbox.send_message(chat_id=1, text='text')
+            outbox.stop(timeout=5)
+        assert [message['text'] for message in stub.received] == ['text']
+        assert outbox.retried == 1
+
+
+def test_make_bot(monkeypatch):
+    monkeypatch.setattr(constants, 'TELEGRAM_TOKEN', '123:token')
+    client = make_bot()
+    assert isinstance(client, BotApiClient)
+    assert isinstance(client.fallback(), telegram.Bot)
+    monkeypatch.setattr(constants, 'TELEGRAM_CLIENT', 'ptb')
+    assert isinstance(make_bot(), telegram.Bot)
+
+
+class RecordingBot:
+    """Stand-in fallback bot that records sent messages."""
+
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, **kwargs):
+        self.sent.append(kwargs)
+        return kwargs
+
+
+def test_falls_back_when_raw_client_fails():
+    fallback = RecordingBot()
+    created = []
+    client = BotApiClient(
+        '123:token', base_url='http://127.0.0.1:1/bot',
+        fallback=lambda: created.append(fallback) or fallback,
+    )
+    client.send_message(1, 'a', parse_mode='HTML')
+    client.send_message(2, 'b')
+    assert fallback.sent == [
+        {'chat_id': 1, 'text': 'a', 'parse_mode': 'HTML'},
+        {'chat_id': 2, 'text': 'b'},
+    ]
+    assert len(created) == 1
+
+
+def test_api_errors_do_not_fall_back():
+    fallback = RecordingBot()
+    with StubTelegramAPI() as stub:
+        client = BotApiClient(
+            '123:token', base_url=stub.base_url, fallback=lambda: fallback,
+        )
+        stub.errors = [{'ok': False, 'error_code': 400,
+                        'description': 'Bad Request: chat not found'}]
+        with pytest.raises(TelegramAPIError, match='chat not found'):
+            client.send_message(1, 'text')
+    assert fallback.sent == []
+
+
+def test_read_timeout_does_not_fall_back():
+    fallback = RecordingBot()
+    with StubTelegramAPI(delay=0.5) as stub:
+        client = BotApiClient(
+            '123:token', base_url=stub.base_url, timeout=(5.0, 0.1),
+            fallback=lambda: fallback,
+        )
+        with pytest.raises(TelegramAPIError) as error:
+            client.send_message(1, 'text')
+        assert not isinstance(error.value, BotApiUnavailable)
+    assert fallback.sent == [], (
+        'Сообщение могло дойти до Bot API, запасной бот его бы повторил'
+    )
+
+
+def test_without_fallback_raw_failure_is_raised():
+    client = BotApiClient('123:token', base_url='http://127.0.0.1:1/bot')
+    with pytest.raises(BotApiUnavailable):
+        client.send_message(1, 'text')
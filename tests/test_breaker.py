@@ -0,0 +1,145 @@
+from http import HTTPStatus
+
+import pytest
+
+from breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, get_breaker, get_token_breaker,
+    parse_retry_after,
+)
+from exceptions import CircuitBreakerOpen, ResponseStatusIsNotOK
+from practicum import PracticumClient
+from stub_api import StubPracticumAPI
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(
+        'test', failure_threshold=3, base_delay=60, max_delay=600,
+        clock=clock, random=lambda: 0.5,
+    )
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_threshold(self, breaker):
+        for _ in range(2):
+            breaker.record_failure()
+            assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert not breaker.allow()
+
+    def test_half_open_lets_one_probe(self, breaker, clock):
+        for _ in range(3):
+            breaker.record_failure()
+        clock.now = 60
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow(), 'Пробный запрос должен быть один'
+        breaker.record_success()
+        assert breaker.state == CLOSED
+        assert breaker.allow()
+
+    def test_transitions_reach_bot_log(self, breaker, clock, bot_log):
+        for _ in range(3):
+            breaker.record_failure()
+        clock.now = 60
+        breaker.allow()
+        breaker.record_success()
+        lines = [
+            line for line in bot_log().splitlines()
+            if 'Автомат test:' in line
+        ]
+        assert len(lines) == 3
+        for line, state in zip(lines, (OPEN, HALF_OPEN, CLOSED)):
+            assert f'Автомат test: {state}' in line
+
+    def test_exponential_backoff(self, breaker, clock):
+        for _ in range(3):
+            breaker.record_failure()
+        delays = [breaker.retry_in()]
+        for _ in range(4):
+            clock.now = breaker.open_until
+            assert breaker.allow()
+            breaker.record_failure()
+            delays.append(breaker.retry_in())
+        assert delays == [60, 120, 240, 480, 600]
+
+    def test_retry_after_opens_immediately(self, breaker):
+        breaker.record_failure(retry_after=900)
+        assert breaker.state == OPEN
+        assert breaker.retry_in() == 900
+
+
+class TestBreakerWithClient:
+
+    def test_shared_breaker_stops_all_subscriptions(self):
+        import homework
+
+        with StubPracticumAPI(
+            status=HTTPStatus.SERVICE_UNAVAILABLE
+        ) as stub, PracticumClient(endpoint=stub.url) as client:
+            stub.response_headers = {'Retry-After': '120'}
+            with pytest.raises(ResponseStatusIsNotOK):
+                homework.request_homework_statuses('token-1', 1, client)
+            for number in range(2, 10):
+                with pytest.raises(CircuitBreakerOpen):
+                    homework.request_homework_statuses(
+                        f'token-{number}', 1, client
+                    )
+        assert len(stub.requests) == 1
+        assert get_breaker(stub.url).retry_in() >= 119
+
+    def test_rate_limit_pauses_only_its_token(self):
+        import homework
+
+        with StubPracticumAPI(
+            status=HTTPStatus.TOO_MANY_REQUESTS
+        ) as stub, PracticumClient(endpoint=stub.url) as client:
+            stub.response_headers = {'Retry-After': '120'}
+            with pytest.raises(ResponseStatusIsNotOK):
+                homework.request_homework_statuses('token-1', 1, client)
+            with pytest.raises(CircuitBreakerOpen):
+                homework.request_homework_statuses('token-1', 1, client)
+            stub.status = HTTPStatus.OK
+            for number in range(2, 10):
+                homework.request_homework_statuses(
+                    f'token-{number}', 1, client
+                )
+        assert len(stub.requests) == 9
+        assert get_breaker(stub.url).state == CLOSED
+        assert get_token_breaker(stub.url, 'token-1').retry_in() >= 119
+
+    def test_client_errors_do_not_open_breaker(self):
+        import homework
+
+        with StubPracticumAPI(
+            status=HTTPStatus.UNAUTHORIZED
+        ) as stub, PracticumClient(endpoint=stub.url) as client:
+            for _ in range(5):
+                with pytest.raises(ResponseStatusIsNotOK):
+                    homework.request_homework_statuses('bad', 1, client)
+        assert get_breaker(stub.url).state == CLOSED
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('120') == 120
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('garbage') is None
+    assert parse_retry_after(
+        'Wed, 21 Oct 2015 07:28:00 GMT', now=1445412420
+    ) == 60
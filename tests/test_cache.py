@@ -0,0 +1,121 @@
+import pytest
+
+from cache import ResponseCache, parse_cache_control
+from practicum import PracticumClient
+from stub_api import StubPracticumAPI
+
+
+@pytest.fixture
+def stub():
+    with StubPracticumAPI() as stub:
+        yield stub
+
+
+def fetch(client, from_date=1):
+    import homework
+
+    return homework.request_homework_statuses('token', from_date, client)
+
+
+class TestResponseCache:
+
+    def test_etag_not_modified(self, stub):
+        stub.etag = '"v1"'
+        cache = ResponseCache()
+        with PracticumClient(endpoint=stub.url, cache=cache) as client:
+            first = fetch(client)
+            second = fetch(client)
+        assert first == second
+        assert stub.requests[1]['headers']['If-None-Match'] == '"v1"'
+        assert cache.stats()['not_modified'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_max_age_skips_request(self, stub):
+        stub.response_headers = {'Cache-Control': 'max-age=60'}
+        cache = ResponseCache()
+        with PracticumClient(endpoint=stub.url, cache=cache) as client:
+            fetch(client)
+            fetch(client)
+            fetch(client, from_date=2)
+        assert len(stub.requests) == 2, (
+            'Свежий ответ для того же курсора не должен запрашиваться снова'
+        )
+        assert cache.stats()['fresh'] == 1
+
+    def test_no_store(self, stub):
+        stub.response_headers = {'Cache-Control': 'no-store, max-age=60'}
+        cache = ResponseCache()
+        with PracticumClient(endpoint=stub.url, cache=cache) as client:
+            fetch(client)
+            fetch(client)
+        assert len(stub.requests) == 2
+        assert cache.stats()['entries'] == 0
+
+    def test_identical_body_is_not_parsed_again(self, stub):
+        cache = ResponseCache()
+        with PracticumClient(endpoint=stub.url, cache=cache) as client:
+            first = fetch(client, from_date=1)
+            second = fetch(client, from_date=2)
+        assert second is first
+        assert cache.stats()['identical'] == 1
+
+    def test_advancing_cursor_reuses_parsed_body(self, stub):
+        stub.homeworks = [{'homework_name': 'hw', 'status': 'reviewing'}]
+        cache = ResponseCache()
+        from_date = 1
+        with PracticumClient(endpoint=stub.url, cache=cache) as client:
+            for _ in range(10):
+                stub.current_date += 600
+                response = fetch(client, from_date)
+                assert response['current_date'] == stub.current_date
+                assert response['homeworks'] == stub.homeworks
+                from_date = response['current_date']
+        stats = cache.stats()
+        assert (stats['misses'], stats['identical']) == (1, 9)
+        stub.homeworks = [{'homework_name': 'hw', 'status': 'approved'}]
+        with PracticumClient(endpoint=stub.url, cache=cache) as client:
+            assert fetch(client, from_date)['homeworks'] == stub.homeworks
+        assert cache.stats()['misses'] == 2
+
+    def test_evicted_entry_falls_back_to_full_request(self, stub):
+        stub.etag = '"v1"'
+        cache = ResponseCache()
+        conditional = cache.request_headers
+
+        def evict_after_headers(token, from_date):
+            headers = conditional(token, from_date)
+            cache._entries.clear()
+            return headers
+
+        with PracticumClient(endpoint=stub.url, cache=cache) as client:
+            first = fetch(client)
+            cache.request_headers = evict_after_headers
+            second = fetch(client)
+        assert second == first
+        assert len(stub.requests) == 3
+        assert 'If-None-Match' not in stub.requests[2]['headers']
+
+    def test_validation_is_reused_on_hits(self, stub):
+        from validation import validate_response
+
+        stub.homeworks = [{'homework_name': 'hw', 'status': 'approved'}]
+        cache = ResponseCache()
+        with PracticumClient(endpoint=stub.url, cache=cache) as client:
+            first = validate_response(fetch(client))
+            second = validate_response(fetch(client))
+        assert second is first
+
+    def test_entries_are_bounded(self, stub):
+        cache = ResponseCache(max_entries=3)
+        with PracticumClient(endpoint=stub.url, cache=cache) as client:
+            import homework
+
+            for number in range(5):
+                homework.request_homework_statuses(f'token-{number}', 1, client)
+        assert cache.stats()['entries'] == 3
+
+
+def test_parse_cache_control():
+    assert parse_cache_control('no-cache, Max-Age="30"') == {
+        'no-cache': None, 'max-age': '30',
+    }
@@ -0,0 +1,133 @@
+import random
+
+import pytest
+
+import breaker
+import clock
+import constants
+import homework
+import practicum
+
+from clock import VirtualClock
+from exceptions import SimulationFinished
+from practicum import PracticumClient
+from subscriptions import SubscriptionRegistry
+
+START = 1_600_000_000
+HOUR = 3600
+
+
+class FakeResponse:
+
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self.data = data
+        self.headers = {}
+
+    def json(self):
+        return self.data
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    """Answers from virtual time; fails with 503 during the outage."""
+
+    def __init__(self, clock, outage):
+        self.clock = clock
+        self.outage = outage
+        self.requests = []
+
+    def get(self, endpoint, params=None, **kwargs):
+        now = self.clock.time()
+        self.requests.append(now)
+        if self.outage[0] <= now < self.outage[1]:
+            return FakeResponse(503, {})
+        return FakeResponse(200, {'homeworks': [], 'current_date': int(now)})
+
+
+@pytest.fixture
+def virtual_clock(monkeypatch):
+    virtual = VirtualClock(start=START, stop_at=START + 24 * HOUR)
+    monkeypatch.setattr(clock, '_clock', virtual)
+    return virtual
+
+
+def test_virtual_clock():
+    virtual = VirtualClock(start=100, stop_at=160)
+    virtual.sleep(30)
+    assert (virtual.time(), virtual.monotonic()) == (130, 30)
+    virtual.advance(-5)
+    assert virtual.time() == 130
+    with pytest.raises(SimulationFinished):
+        virtual.sleep(30)
+
+
+def test_simulates_a_day_of_polling_with_outage(
+    virtual_clock, monkeypatch, bot
+):
+    outage = (START + 6 * HOUR, START + 8 * HOUR)
+    session = FakeSession(virtual_clock, outage)
+    monkeypatch.setattr(
+        practicum, '_client', PracticumClient(endpoint='http://api/',
+                                              session=session)
+    )
+    monkeypatch.setattr(constants, 'RETRY_TIME', 600)
+    monkeypatch.setattr(constants, 'POLLING_POLICY', 'fixed')
+    breaker.set_breaker_random(random.Random(0).random)
+    registry = SubscriptionRegistry()
+    for number in range(200):
+        registry.add(f'token-{number}', str(number), START)
+
+    with pytest.raises(SimulationFinished):
+        homework.build_scheduler(bot, registry).run_forever()
+
+    polls_per_window = len(registry)
+    during_outage = [
+        moment for moment in session.requests
+        if outage[0] <= moment < outage[1]
+    ]
+    assert len(session.requests) > polls_per_window * (24 - 2) * 6 * 0.95
+    assert len(during_outage) < polls_per_window * 2 * 6 * 0.1, (
+        'Во время сбоя автомат защиты должен отсекать почти все запросы'
+    )
+    assert all(
+        subscription.current_date >= outage[1] for subscription in registry
+    ), 'После сбоя курсоры всех подписок должны догнать время'
+    by_chat = {}
+    for chat_id, text in bot.sent:
+        by_chat.setdefault(chat_id, []).append(text)
+    assert len(by_chat) == len(registry)
+    for texts in by_chat.values():
+        assert texts[0].startswith('Сбой в работе программы')
+        assert texts[-1].startswith('Работа восстановлена')
+        assert len(texts) <= 2 + 2 * HOUR / constants.ERROR_DIGEST_INTERVAL, (
+            'Во время сбоя должны уходить только сводки'
+        )
+
+
+def test_queues_store_and_metrics_use_process_clock(
+    virtual_clock, monkeypatch, tmp_path, bot
+):
+    import metrics
+    from outbox import Outbox
+    from sinks import SinkPool, SinkQueue
+    from storage import SQLiteStateStore
+
+    monkeypatch.setattr(metrics, '_last_success', None)
+    metrics.mark_success()
+    virtual_clock.advance(30)
+    assert list(metrics.SINCE_LAST_SUCCESS.samples()) == [('', '', 30)]
+
+    store = SQLiteStateStore(str(tmp_path / 'state.sqlite3'))
+    queue = SinkQueue(sink=None)
+    components = [
+        Outbox(bot), Outbox(bot).bucket, queue, SinkPool([queue]),
+        store,
+    ]
+    virtual_clock.advance(HOUR)
+    assert {component.clock() for component in components} == {
+        virtual_clock.monotonic()
+    }
+    store.close()
@@ -0,0 +1,211 @@
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import time
+
+import pytest
+
+import constants
+import homework
+import lifecycle
+
+from lifecycle import apply_settings, read_settings
+from scheduler import PollingScheduler
+from storage import subscription_id
+from stub_api import StubPracticumAPI
+from stub_telegram import StubTelegramAPI
+from subscriptions import Subscription, SubscriptionRegistry
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def restore_constants():
+    settings = {
+        name: value for name, value in vars(constants).items()
+        if name.isupper()
+    }
+    yield
+    vars(constants).update(settings)
+
+
+def wait_until(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'Условие не выполнилось вовремя'
+        time.sleep(0.05)
+
+
+class TestReload:
+
+    def test_settings_are_applied_and_rolled_back(
+        self, monkeypatch, restore_constants
+    ):
+        monkeypatch.setenv('RETRY_TIME', '30')
+        settings = read_settings()
+        assert settings['RETRY_TIME'] == 30.0
+        assert constants.RETRY_TIME != 30.0, (
+            'read_settings не должен менять constants'
+        )
+        original = constants.RETRY_TIME
+        previous = apply_settings(settings)
+        assert constants.RETRY_TIME == 30.0
+        assert 'RETRY_TIME' in previous
+        apply_settings(previous)
+        assert constants.RETRY_TIME == original
+
+    def test_sync_keeps_state_of_remaining_subscriptions(self):
+        registry = SubscriptionRegistry()
+        kept = registry.add('b', '2', 100)
+        kept.errors = 3
+        registry.add('a', '1', 100)
+        added, removed = registry.sync([('b', 2), ('c', '3')], 500)
+        assert [sub.key for sub in added] == [('c', '3')]
+        assert [sub.key for sub in removed] == [('a', '1')]
+        assert registry.get(('b', '2')) is kept
+        assert (kept.current_date, kept.errors) == (100, 3)
+        assert registry.get(('c', '3')).current_date == 500
+
+    def test_reload_config(
+        self, tmp_path, monkeypatch, restore_constants, bot
+    ):
+        subscriptions = tmp_path / 'subscriptions.txt'
+        subscriptions.write_text('token-b 2\ntoken-c 3\n')
+        monkeypatch.setenv('PRACTICUM_TOKEN', 'token-a')
+        monkeypatch.setenv('TELEGRAM_CHAT_ID', '1')
+        monkeypatch.setenv('SUBSCRIPTIONS_FILE', str(subscriptions))
+        monkeypatch.setenv('RETRY_TIME', '60')
+        monkeypatch.setenv('SHARD_COUNT', '1')
+        monkeypatch.setenv('ERROR_WINDOW', '120')
+        monkeypatch.setenv('ERROR_DIGEST_INTERVAL', '240')
+        registry = SubscriptionRegistry()
+        kept = registry.add('token-b', '2', 100)
+        kept.errors = 3
+        registry.add('token-old', '9', 100)
+        scheduler = homework.build_scheduler(bot, registry)
+
+        homework.reload_config(registry, scheduler)
+
+        assert {sub.key for sub in registry} == {
+            ('token-a', '1'), ('token-b', '2'), ('token-c', '3'),
+        }
+        assert registry.get(('token-b', '2')) is kept
+        assert kept.errors == 3
+        assert scheduler.interval == constants.RETRY_TIME == 60.0
+        assert len(scheduler._queue) == 2, (
+            'Новые подписки должны попасть в очередь'
+        )
+        for subscription in (kept, registry.get(('token-c', '3'))):
+            assert subscription.digest.window == 120
+            assert subscription.digest.interval == 240
+
+        subscriptions.write_text('broken line with three\n')
+        monkeypatch.setenv('RETRY_TIME', '90')
+        homework.reload_config(registry, scheduler)
+        assert constants.RETRY_TIME == 60.0, (
+            'При ошибке чтения подписок настройки должны откатиться'
+        )
+        assert len(registry) == 3
+
+    def test_reload_replaces_bot(self, monkeypatch, restore_constants, bot):
+        from outbox import Outbox
+        from sinks import FanOut
+
+        monkeypatch.setenv('PRACTICUM_TOKEN', 'token-a')
+        monkeypatch.setenv('TELEGRAM_CHAT_ID', '1')
+        monkeypatch.setenv('SHARD_COUNT', '1')
+        monkeypatch.setenv('TELEGRAM_TOKEN', 'new-token')
+        monkeypatch.setattr(homework, 'make_bot', lambda: 'new-bot')
+        outbox = Outbox(bot)
+        registry = SubscriptionRegistry()
+        scheduler = homework.build_scheduler(outbox, registry)
+
+        homework.reload_config(registry, scheduler, FanOut([outbox]))
+
+        assert constants.TELEGRAM_TOKEN == 'new-token'
+        assert outbox.bot == 'new-bot'
+
+    def test_keys_removed_from_dotenv_are_cleared(
+        self, tmp_path, monkeypatch
+    ):
+        dotenv = tmp_path / '.env'
+        dotenv.write_text('HOMEWORK_TEST_SETTING=1\n')
+        monkeypatch.setattr(lifecycle, 'find_dotenv', lambda: str(dotenv))
+        monkeypatch.setattr(lifecycle, '_dotenv_keys', set())
+        monkeypatch.delenv('HOMEWORK_TEST_SETTING', raising=False)
+
+        read_settings()
+        assert os.environ['HOMEWORK_TEST_SETTING'] == '1'
+        dotenv.write_text('')
+        read_settings()
+        assert 'HOMEWORK_TEST_SETTING' not in os.environ
+
+
+def test_stop_finishes_current_polls():
+    registry = SubscriptionRegistry()
+    for number in range(5):
+        registry.add(f'token-{number}', str(number))
+    polled = []
+
+    def poll(subscription):
+        polled.append(subscription)
+        scheduler.stop()
+
+    scheduler = PollingScheduler(
+        registry, poll, interval=0, clock=lambda: 0.0, sleep=lambda _: None,
+    )
+    scheduler.run_forever()
+    scheduler.close()
+    assert len(polled) == len(registry), (
+        'После stop начатая итерация опроса должна завершиться'
+    )
+
+
+@pytest.mark.parametrize('script', ['homework.py', 'async_homework.py'])
+def test_signals_in_bot_process(tmp_path, script):
+    subscriptions = tmp_path / 'subscriptions.txt'
+    subscriptions.write_text('token-b 2\n')
+    database = tmp_path / 'state.sqlite3'
+    with StubPracticumAPI() as api, StubTelegramAPI() as telegram:
+        env = dict(
+            os.environ,
+            PRACTICUM_TOKEN='token-a', TELEGRAM_CHAT_ID='1',
+            TELEGRAM_TOKEN='123456:test', PRACTICUM_ENDPOINT=api.url,
+            TELEGRAM_API_URL=telegram.base_url,
+            SUBSCRIPTIONS_FILE=str(subscriptions), STATE_DB=str(database),
+            RETRY_TIME='0.5', METRICS_PORT='', WEBHOOK_PORT='',
+        )
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, script)],
+            cwd=tmp_path, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+        def polled(token):
+            return any(
+                request['headers'].get('Authorization') == f'OAuth {token}'
+                for request in list(api.requests)
+            )
+
+        try:
+            wait_until(lambda: polled('token-b'))
+            subscriptions.write_text('token-b 2\ntoken-c 3\n')
+            process.send_signal(signal.SIGHUP)
+            wait_until(lambda: polled('token-c') and polled('token-a'))
+            process.send_signal(signal.SIGTERM)
+            assert process.wait(10) == 0
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+    with sqlite3.connect(database) as connection:
+        cursors = dict(connection.execute(
+            'SELECT subscription, from_date FROM cursors'
+        ))
+    for token, chat_id in (('token-a', '1'), ('token-c', '3')):
+        assert cursors.get(
+            subscription_id(Subscription(token, chat_id))
+        ) == api.current_date, 'Курсоры должны сохраниться при остановке'
@@ -0,0 +1,137 @@
+import io
+import json
+import logging
+import threading
+
+from logs import (
+    ContextFilter, JsonFormatter, TimezoneFormatter, attach_queue_handler,
+    detach_queue_handler, log_context,
+)
+
+
+def make_record(message='Статус не обновился', created=1549962000.0):
+    record = logging.LogRecord(
+        'homework', logging.INFO, __file__, 1, message, None, None
+    )
+    record.created = created
+    record.msecs = 0
+    return record
+
+
+class BlockingHandler(logging.Handler):
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.records = []
+
+    def emit(self, record):
+        self.gate.wait(5)
+        self.records.append(record)
+
+
+class TestFormatters:
+
+    def test_timezone(self):
+        formatter = TimezoneFormatter('%(asctime)s', timezone='Europe/Moscow')
+        formatted = formatter.format(make_record())
+        assert formatted.startswith('2019-02-12 12:00:00')
+
+    def test_timezone_does_not_leak_to_other_formatters(self):
+        TimezoneFormatter(timezone='Asia/Tokyo')
+        assert logging.Formatter.converter is not TimezoneFormatter.converter
+
+    def test_json_lines_with_context(self):
+        formatter = JsonFormatter(timezone='UTC')
+        record = make_record()
+        record.context = {'subscription': 'abc', 'chat_id': '1'}
+        entry = json.loads(formatter.format(record))
+        assert entry == {
+            'time': '2019-02-12 09:00:00,000',
+            'level': 'INFO',
+            'logger': 'homework',
+            'message': 'Статус не обновился',
+            'subscription': 'abc',
+            'chat_id': '1',
+        }
+
+
+class TestQueueLogging:
+
+    def test_records_are_written_by_listener(self):
+        logger = logging.getLogger('test_logs.listener')
+        logger.propagate = False
+        handler = BlockingHandler()
+        listener = attach_queue_handler(logger, handler)
+        try:
+            logger.warning('не ждёт вывода')
+            assert handler.records == [], (
+                'Запись должна выводиться в потоке QueueListener'
+            )
+            handler.gate.set()
+        finally:
+            detach_queue_handler(logger, listener)
+        assert [record.getMessage() for record in handler.records] == [
+            'не ждёт вывода'
+        ]
+
+    def test_context_is_captured_in_calling_thread(self):
+        logger = logging.getLogger('test_logs.context')
+        logger.propagate = False
+        logger.setLevel(logging.DEBUG)
+        stream = io.StringIO()
+        output = logging.StreamHandler(stream)
+        output.setFormatter(JsonFormatter())
+        listener = attach_queue_handler(logger, output)
+        try:
+            with log_context(subscription='abc'):
+                with log_context(chat_id='1'):
+                    logger.info('внутри')
+            logger.info('снаружи')
+        finally:
+            detach_queue_handler(logger, listener)
+        inside, outside = map(json.loads, stream.getvalue().splitlines())
+        assert inside['subscription'] == 'abc'
+        assert inside['chat_id'] == '1'
+        assert 'subscription' not in outside
+
+
+class TestSubscriptionContext:
+
+    def test_poll_logs_carry_subscription_without_token(self, monkeypatch):
+        import homework
+        from subscriptions import Subscription
+
+        captured = []
+
+        class Capture(logging.Handler):
+            def emit(self, record):
+                captured.append(record)
+
+        handler = Capture()
+        handler.addFilter(ContextFilter())
+        homework.logger.addHandler(handler)
+        monkeypatch.setattr(
+            homework, 'request_homework_statuses',
+            lambda token, current_timestamp: {
+                'homeworks': [], 'current_date': 200,
+            },
+        )
+        try:
+            homework.poll_subscription(
+                None, Subscription('secret-token', '42', 100)
+            )
+        finally:
+            homework.logger.removeHandler(handler)
+        assert captured
+        context = captured[0].context
+        assert context['chat_id'] == '42'
+        assert 'secret-token' not in json.dumps(context)
+
+
+def test_module_loggers_reach_bot_log(bot_log):
+    logging.getLogger('breaker').info('автомат из breaker')
+    logging.getLogger('outbox').warning('очередь из outbox')
+    output = bot_log()
+    assert 'автомат из breaker' in output
+    assert 'очередь из outbox' in output
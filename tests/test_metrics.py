@@ -0,0 +1,160 @@
+import pytest
+import requests
+
+import metrics
+
+from metrics import Counter, Gauge, Histogram, MetricsRegistry, MetricsServer
+from practicum import PracticumClient
+from stub_api import StubPracticumAPI
+from subscriptions import Subscription
+
+
+class BrokenBot:
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        raise ConnectionError('Telegram недоступен')
+
+
+class TestExposition:
+
+    def test_render(self):
+        registry = MetricsRegistry()
+        counter = registry.register(
+            Counter('requests', 'Запросы', ('status',))
+        )
+        histogram = registry.register(
+            Histogram('latency_seconds', 'Задержка', buckets=(0.1, 1))
+        )
+        gauge = registry.register(Gauge('lag_seconds', 'Отставание'))
+        counter.inc(status=200)
+        counter.inc(2, status='a"b')
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+        gauge.set_function(lambda: 1.5)
+
+        lines = registry.render().splitlines()
+        assert '# TYPE requests counter' in lines
+        assert 'requests_total{status="200"} 1' in lines
+        assert 'requests_total{status="a\\"b"} 2' in lines
+        start = lines.index('# TYPE latency_seconds histogram') + 1
+        assert lines[start:start + 5] == [
+            'latency_seconds_bucket{le="0.1"} 1',
+            'latency_seconds_bucket{le="1"} 2',
+            'latency_seconds_bucket{le="+Inf"} 3',
+            'latency_seconds_sum 5.55',
+            'latency_seconds_count 3',
+        ]
+        assert 'lag_seconds 1.5' in lines
+
+    def test_labels_are_checked(self):
+        counter = Counter('requests', 'Запросы', ('status',))
+        with pytest.raises(ValueError):
+            counter.inc(code=200)
+
+    def test_duplicate_names_are_rejected(self):
+        registry = MetricsRegistry()
+        registry.register(Counter('requests', 'Запросы'))
+        with pytest.raises(ValueError):
+            registry.register(Counter('requests', 'Запросы'))
+
+    def test_server(self):
+        server = MetricsServer(('127.0.0.1', 0)).start(poll_interval=0.05)
+        host, port = server.server_address
+        try:
+            response = requests.get(f'http://{host}:{port}/metrics')
+            missing = requests.get(f'http://{host}:{port}/')
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert response.status_code == 200
+        assert response.headers['Content-Type'].startswith('text/plain')
+        assert '# TYPE homework_api_request_seconds histogram' in response.text
+        assert missing.status_code == 404
+
+
+class TestInstrumentation:
+
+    def test_api_requests(self):
+        before = metrics.API_RESPONSES.value(status=500)
+        count = metrics.API_REQUEST_SECONDS.count()
+        with StubPracticumAPI(status=500) as stub:
+            with PracticumClient(endpoint=stub.url) as client:
+                client.get('token', 1)
+        assert metrics.API_RESPONSES.value(status=500) == before + 1
+        assert metrics.API_REQUEST_SECONDS.count() == count + 1
+
+    def test_connection_errors(self):
+        before = metrics.API_RESPONSES.value(status='error')
+        client = PracticumClient(endpoint='http://127.0.0.1:9/')
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.get('token', 1)
+        assert metrics.API_RESPONSES.value(status='error') == before + 1
+
+    def test_validation_failures(self):
+        import homework
+
+        invalid = metrics.RESPONSE_INVALID.value()
+        unknown = metrics.UNKNOWN_STATUSES.value()
+        missing = metrics.MISSING_NAMES.value()
+        with pytest.raises(TypeError):
+            homework.check_response([])
+        with pytest.raises(KeyError):
+            homework.parse_status({'homework_name': 'hw', 'status': 'lost'})
+        with pytest.raises(KeyError):
+            homework.parse_status({'status': 'approved'})
+        assert metrics.RESPONSE_INVALID.value() == invalid + 1
+        assert metrics.UNKNOWN_STATUSES.value() == unknown + 1
+        assert metrics.MISSING_NAMES.value() == missing + 1
+
+    def test_telegram_sends(self, bot):
+        import homework
+
+        failures = metrics.TELEGRAM_SEND_FAILURES.value()
+        sends = metrics.TELEGRAM_SEND_SECONDS.count()
+        homework.send_chat_message(BrokenBot(), 1, 'текст')
+        homework.send_chat_message(bot, 1, 'текст')
+        assert metrics.TELEGRAM_SEND_FAILURES.value() == failures + 1
+        assert metrics.TELEGRAM_SEND_SECONDS.count() == sends + 1
+
+    def test_time_since_last_successful_poll(self, monkeypatch, bot):
+        import homework
+
+        def since_last_success():
+            return [
+                line for line in metrics.REGISTRY.render().splitlines()
+                if line.startswith('homework_seconds_since_last_success ')
+            ]
+
+        monkeypatch.setattr(metrics, '_last_success', None)
+        assert since_last_success() == []
+        monkeypatch.setattr(
+            homework, 'request_homework_statuses',
+            lambda token, current_timestamp: {
+                'homeworks': [], 'current_date': 200,
+            },
+        )
+        homework.poll_subscription(bot, Subscription('token', '1', 100))
+        since = since_last_success()
+        assert len(since) == 1
+        assert 0 <= float(since[0].split()[1]) < 5
+
+    def test_loop_duration(self):
+        from scheduler import PollingScheduler
+        from subscriptions import SubscriptionRegistry
+
+        now = [1000.0]
+        registry = SubscriptionRegistry()
+        registry.add('token', '1', 100)
+        scheduler = PollingScheduler(
+            registry, poll=lambda subscription: None, interval=10,
+            clock=lambda: now[0],
+        )
+        scheduler.start()
+        before = metrics.LOOP_SECONDS.count()
+        now[0] += 10
+        assert scheduler.run_pending() == 1
+        assert scheduler.run_pending() == 0
+        assert metrics.LOOP_SECONDS.count() == before + 1, (
+            'Итерации без опросов не должны учитываться'
+        )
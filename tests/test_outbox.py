@@ -0,0 +1,115 @@
+import threading
+import time
+
+import telegram
+
+from outbox import Outbox, Receipt, TokenBucket, fold_messages, leading_fit
+
+
+class RecordingBot:
+
+    def __init__(self, failures=(), broken_chats=()):
+        self.failures = list(failures)
+        self.broken_chats = broken_chats
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        with self.lock:
+            if chat_id in self.broken_chats:
+                raise RuntimeError('chat is broken')
+            if self.failures:
+                raise self.failures.pop(0)
+            self.sent.append((chat_id, text, time.monotonic()))
+
+
+class TestOutbox:
+
+    def test_pending_messages_are_coalesced(self):
+        bot = RecordingBot()
+        outbox = Outbox(bot)
+        for number in range(3):
+            outbox.send_message(chat_id=1, text=f'message {number}')
+        assert outbox.depth == 3
+        outbox.start()
+        outbox.stop(timeout=5)
+        assert len(bot.sent) == 1, (
+            'Накопившиеся сообщения одного чата должны уйти одним сообщением'
+        )
+        assert bot.sent[0][1] == 'message 0\n\nmessage 1\n\nmessage 2'
+        assert outbox.stats()['coalesced'] == 2
+        assert outbox.depth == 0
+
+    def test_per_chat_rate(self):
+        bot = RecordingBot()
+        outbox = Outbox(bot, chat_rate=10).start()
+        outbox.send_message(chat_id=1, text='first')
+        while not bot.sent:
+            time.sleep(0.01)
+        outbox.send_message(chat_id=1, text='second')
+        outbox.send_message(chat_id=2, text='other chat')
+        outbox.stop(timeout=5)
+        first, second = [sent for sent in bot.sent if sent[0] == 1]
+        assert second[2] - first[2] >= 0.09
+        assert len(bot.sent) == 3
+
+    def test_retry_after(self):
+        bot = RecordingBot(failures=[telegram.error.RetryAfter(0.1)])
+        outbox = Outbox(bot).start()
+        started = time.monotonic()
+        outbox.send_message(chat_id=1, text='hello')
+        outbox.stop(timeout=5)
+        assert [text for _, text, _ in bot.sent] == ['hello']
+        assert bot.sent[0][2] - started >= 0.1
+        assert outbox.stats()['retried'] == 1
+
+    def test_gives_up_after_retries(self):
+        bot = RecordingBot(broken_chats={1})
+        outbox = Outbox(bot, max_retries=2, retry_delay=0.01).start()
+        failed = threading.Event()
+        outbox.send_message(
+            chat_id=1, text='lost', receipt=Receipt(1, on_failed=failed.set)
+        )
+        outbox.send_message(chat_id=2, text='delivered')
+        outbox.stop(timeout=5)
+        assert outbox.stats()['failed'] == 1
+        assert failed.is_set()
+        assert [text for _, text, _ in bot.sent] == ['delivered']
+
+    def test_keeps_retrying_while_running(self):
+        bot = RecordingBot(failures=[RuntimeError('down')] * 3)
+        outbox = Outbox(bot, max_retries=1, retry_delay=0.01).start()
+        delivered = threading.Event()
+        outbox.send_message(
+            chat_id=1, text='kept', receipt=Receipt(1, delivered.set)
+        )
+        assert delivered.wait(5)
+        outbox.stop(timeout=5)
+        assert outbox.stats()['failed'] == 0
+        assert [text for _, text, _ in bot.sent] == ['kept']
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket():
+    clock = FakeClock()
+    bucket = TokenBucket(30, clock=clock)
+    for _ in range(30):
+        assert bucket.delay() == 0
+        bucket.take()
+    assert bucket.delay() == 1 / 30
+    clock.now = 1
+    assert bucket.delay() == 0
+
+
+def test_folding():
+    assert fold_messages(['a', 'b', 'c'], limit=4) == ['a\n\nb', 'c']
+    assert leading_fit(['a', 'b', 'c'], limit=4) == 2
+    assert leading_fit(['x' * 10, 'y'], limit=4) == 1
@@ -0,0 +1,111 @@
+import datetime
+
+import pytest
+
+from policy import AdaptivePollingPolicy, FixedPollingPolicy
+from subscriptions import Subscription
+
+HOUR = 3600
+DAY = 24 * HOUR
+START = datetime.datetime(
+    2022, 1, 10, tzinfo=datetime.timezone.utc
+).timestamp()
+
+# Recorded status changes of one student: (seconds since START, status).
+TRACE = [
+    (10 * HOUR + 421, 'reviewing'),
+    (13 * HOUR + 1337, 'rejected'),
+    (DAY + 11 * HOUR + 95, 'reviewing'),
+    (DAY + 12 * HOUR + 2710, 'approved'),
+    (3 * DAY + 15 * HOUR + 1802, 'reviewing'),
+    (3 * DAY + 19 * HOUR + 599, 'rejected'),
+    (4 * DAY + 9 * HOUR + 3100, 'reviewing'),
+    (4 * DAY + 10 * HOUR + 1201, 'approved'),
+]
+
+
+def simulate(policy, trace=TRACE, days=7):
+    subscription = Subscription('token', '1')
+    now = START
+    polls = 0
+    seen = 0
+    latencies = []
+    while now < START + days * DAY:
+        polls += 1
+        while seen < len(trace) and START + trace[seen][0] <= now:
+            latencies.append(now - START - trace[seen][0])
+            subscription.last_status = trace[seen][1]
+            seen += 1
+        now += policy.next_delay(subscription, now)
+    return polls, latencies
+
+
+class TestAdaptivePollingPolicy:
+
+    @pytest.fixture
+    def policy(self):
+        return AdaptivePollingPolicy(600, timezone='UTC', random=lambda: 0.5)
+
+    def test_faster_while_reviewing(self, policy):
+        subscription = Subscription('token', '1')
+        noon = START + 12 * HOUR
+        subscription.last_status = 'reviewing'
+        reviewing = policy.next_delay(subscription, noon)
+        subscription.last_status = 'approved'
+        approved = policy.next_delay(subscription, noon)
+        assert reviewing < 600 < approved
+
+    def test_slower_at_night(self, policy):
+        subscription = Subscription('token', '1')
+        night = policy.next_delay(subscription, START + 3 * HOUR)
+        day = policy.next_delay(subscription, START + 12 * HOUR)
+        assert night > day
+
+    def test_backs_off_after_errors(self, policy):
+        subscription = Subscription('token', '1')
+        noon = START + 12 * HOUR
+        delays = []
+        for errors in range(4):
+            subscription.errors = errors
+            delays.append(policy.next_delay(subscription, noon))
+        assert delays == sorted(delays)
+        subscription.errors = 100
+        assert policy.next_delay(subscription, noon) == policy.max_delay
+
+    def test_jitter_bounds(self):
+        subscription = Subscription('token', '1')
+        noon = START + 12 * HOUR
+        low = AdaptivePollingPolicy(600, timezone='UTC', random=lambda: 0)
+        high = AdaptivePollingPolicy(600, timezone='UTC', random=lambda: 1)
+        assert low.next_delay(subscription, noon) == pytest.approx(540)
+        assert high.next_delay(subscription, noon) == pytest.approx(660)
+
+    def test_fewer_requests_per_notification_on_trace(self, policy):
+        fixed_polls, fixed_latencies = simulate(FixedPollingPolicy(600))
+        polls, latencies = simulate(policy)
+
+        assert len(latencies) == len(fixed_latencies) == len(TRACE)
+        fixed_ratio = fixed_polls / len(TRACE)
+        ratio = polls / len(TRACE)
+        print(
+            f'\nfixed: {fixed_ratio:.1f} req/notification, '
+            f'max latency {max(fixed_latencies) / 60:.0f} min'
+            f'\nadaptive: {ratio:.1f} req/notification, '
+            f'max latency {max(latencies) / 60:.0f} min'
+        )
+        assert ratio < fixed_ratio, (
+            'Адаптивная политика должна тратить меньше запросов '
+            'на одно уведомление'
+        )
+        verdicts = [
+            latency for latency, (_, status) in zip(latencies, TRACE)
+            if status != 'reviewing'
+        ]
+        fixed_verdicts = [
+            latency for latency, (_, status) in zip(fixed_latencies, TRACE)
+            if status != 'reviewing'
+        ]
+        assert max(verdicts) <= max(fixed_verdicts), (
+            'Вердикт ревьюера должен приходить не позже, чем при '
+            'постоянном интервале'
+        )
@@ -0,0 +1,75 @@
+import pytest
+
+from subscriptions import Subscription
+
+
+@pytest.fixture
+def api(monkeypatch):
+    import homework
+
+    response = {'homeworks': [], 'current_date': 200}
+    monkeypatch.setattr(
+        homework, 'request_homework_statuses',
+        lambda token, current_timestamp: response,
+    )
+    return response
+
+
+class TestPollSubscription:
+
+    def test_all_homeworks_in_one_message(self, api, bot):
+        import homework
+
+        api['homeworks'] = [
+            {'homework_name': 'second', 'status': 'rejected',
+             'date_updated': '2022-01-02T10:00:00Z'},
+            {'homework_name': 'first', 'status': 'approved',
+             'date_updated': '2022-01-01T10:00:00Z'},
+            {'homework_name': 'third', 'status': 'reviewing',
+             'date_updated': '2022-01-03T10:00:00Z'},
+        ]
+        homework.poll_subscription(bot, Subscription('token', '1', 100))
+
+        assert len(bot.sent) == 1, (
+            'Несколько изменений за один опрос должны уходить одним сообщением'
+        )
+        text = bot.sent[0][1]
+        positions = [text.index(f'"{name}"')
+                     for name in ('first', 'second', 'third')]
+        assert positions == sorted(positions), (
+            'Работы должны идти в порядке `date_updated`'
+        )
+
+    def test_unknown_status_does_not_block_others(self, api, bot):
+        import homework
+
+        api['homeworks'] = [
+            {'homework_name': 'good', 'status': 'approved'},
+            {'homework_name': 'bad', 'status': 'unknown'},
+        ]
+        subscription = Subscription('token', '1', 100)
+        homework.poll_subscription(bot, subscription)
+
+        assert len(bot.sent) == 1
+        assert '"good"' in bot.sent[0][1]
+        assert subscription.current_date == 200
+
+    def test_only_unknown_statuses_report_error(self, api, bot):
+        import homework
+
+        api['homeworks'] = [{'homework_name': 'bad', 'status': 'unknown'}]
+        subscription = Subscription('token', '1', 100)
+        homework.poll_subscription(bot, subscription)
+
+        assert bot.sent[0][1].startswith('Сбой в работе программы')
+        assert subscription.current_date == 100
+
+
+def test_fold_messages_respects_limit():
+    import homework
+
+    messages = ['x' * 40] * 5
+    folded = homework.fold_messages(messages, limit=100)
+    assert len(folded) == 3
+    assert all(len(message) <= 100 for message in folded)
+    assert homework.fold_messages([]) == []
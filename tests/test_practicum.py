@@ -0,0 +1,42 @@
+import pytest
+import requests
+
+from practicum import PracticumClient
+from stub_api import StubPracticumAPI
+
+
+class TestPracticumClient:
+
+    def test_connection_is_reused_across_tokens(self):
+        with StubPracticumAPI() as stub:
+            with PracticumClient(endpoint=stub.url) as client:
+                for number in range(10):
+                    response = client.get(f'token-{number}', number)
+                    assert response.status_code == 200
+        assert len(stub.requests) == 10
+        assert len(stub.connections) == 1, (
+            'Клиент должен переиспользовать соединение между запросами'
+        )
+        assert stub.requests[3]['headers']['Authorization'] == 'OAuth token-3'
+        assert stub.requests[3]['query'] == {'from_date': ['3']}
+
+    def test_read_timeout(self):
+        import homework
+
+        with StubPracticumAPI(delay=0.5) as stub:
+            client = PracticumClient(endpoint=stub.url, timeout=(1, 0.1))
+            with pytest.raises(requests.exceptions.Timeout):
+                homework.request_homework_statuses('token', 1, client=client)
+            client.close()
+
+    def test_invalid_json(self):
+        import homework
+        from exceptions import ResponseIsNotJSON
+
+        with StubPracticumAPI() as stub:
+            stub.body = lambda query: b'not json'
+            with PracticumClient(endpoint=stub.url) as client:
+                with pytest.raises(ResponseIsNotJSON):
+                    homework.request_homework_statuses(
+                        'token', 1, client=client
+                    )
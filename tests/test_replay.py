@@ -0,0 +1,101 @@
+import json
+
+from replay import (
+    ReplayPracticumAPI, TraceRecorder, format_date, load_trace,
+    match_notifications, percentile, run_replay, save_trace,
+    synthetic_trace,
+)
+from validation import MESSAGE_PREFIX, VERDICTS
+
+
+class FixedClock:
+    speed = 1
+    anchor = 1_000_000
+
+    def __init__(self):
+        self.current = self.anchor
+
+    def now(self):
+        return self.current
+
+
+def message(name, status):
+    return f'{MESSAGE_PREFIX}{name}{VERDICTS[status]}'
+
+
+class TestReplay:
+    events = [
+        {'offset': 10, 'token': 'a', 'homework_name': 'hw',
+         'status': 'reviewing'},
+        {'offset': 50, 'token': 'a', 'homework_name': 'hw',
+         'status': 'approved'},
+        {'offset': 20, 'token': 'b', 'homework_name': 'other',
+         'status': 'rejected'},
+    ]
+
+    def test_api_answers_latest_state_since_from_date(self):
+        clock = FixedClock()
+        with ReplayPracticumAPI(self.events, clock, payload_size=5) as api:
+            clock.current = clock.anchor + 30
+            first = api.homeworks_for('a', clock.anchor, clock.now())
+            clock.current = clock.anchor + 60
+            second = api.homeworks_for('a', clock.anchor + 30, clock.now())
+            assert api.homeworks_for('a', clock.anchor + 55, clock.now()) == []
+            body = json.loads(api.response_body(
+                {'from_date': [str(clock.anchor)]},
+                {'Authorization': 'OAuth b'},
+            ))
+        assert [item['status'] for item in first] == ['reviewing']
+        assert first[0]['reviewer_comment'] == 'xxxxx'
+        assert [item['status'] for item in second] == ['approved']
+        assert second[0]['date_updated'] == format_date(clock.anchor + 50)
+        assert [item['homework_name'] for item in body['homeworks']] == [
+            'other'
+        ]
+        assert body['current_date'] == clock.anchor + 60
+
+    def test_folded_messages_deliver_every_event(self):
+        events = [dict(event, time=event['offset']) for event in self.events]
+        chats = {'a': '1', 'b': '2'}
+        received = [
+            {'time': 60, 'chat_id': '1',
+             'text': message('hw', 'reviewing') + '\n\n'
+             + message('hw', 'approved')},
+        ]
+        latencies, missed = match_notifications(
+            events, received, chats, deadline=100
+        )
+        assert sorted(latencies) == [10, 50]
+        assert missed == 1
+
+    def test_trace_round_trip_and_recorder(self, tmp_path):
+        trace = synthetic_trace(['a', 'b'], homeworks=3, seed=1)
+        path = tmp_path / 'trace.jsonl'
+        save_trace(trace, path)
+        assert load_trace(path) == trace
+        assert len(trace) == 12
+
+        recorder = TraceRecorder('secret', label='token-0')
+        for status, moment in (('reviewing', 100), ('reviewing', 100),
+                               ('approved', 400)):
+            recorder.observe({'homeworks': [{
+                'homework_name': 'hw', 'status': status,
+                'date_updated': format_date(moment),
+            }]})
+        assert [(event['offset'], event['status'], event['token'])
+                for event in recorder.events] == [
+            (0, 'reviewing', 'token-0'), (300, 'approved', 'token-0'),
+        ]
+
+    def test_percentile(self):
+        assert percentile([], 0.5) is None
+        assert percentile(list(range(1, 101)), 0.95) == 95
+
+
+def test_replay_against_bot_process():
+    tokens = ['token-0', 'token-1']
+    events = synthetic_trace(tokens, homeworks=1, duration=3600, start=1200)
+    report = run_replay(events, tokens, speed=1200, duration=4)
+    assert report.polls >= len(tokens)
+    assert report.delivered > 0
+    assert report.missed == 0
@@ -0,0 +1,123 @@
+from scheduler import PollingScheduler
+from subscriptions import SubscriptionRegistry, read_subscriptions
+
+
+class FakeClock:
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def make_registry(size):
+    registry = SubscriptionRegistry()
+    for number in range(size):
+        registry.add(f'token-{number}', number)
+    return registry
+
+
+class TestPollingScheduler:
+
+    def test_polls_every_subscription_once_per_interval(self):
+        clock = FakeClock()
+        registry = make_registry(1000)
+        polled = []
+        scheduler = PollingScheduler(
+            registry, polled.append, interval=600, clock=clock,
+            sleep=clock.sleep,
+        )
+        scheduler.start()
+        while clock.now <= 600:
+            scheduler.run_pending()
+            clock.sleep(1)
+        assert len(polled) == len(registry), (
+            'Каждая подписка должна быть опрошена ровно один раз за окно'
+        )
+        assert len({sub.key for sub in polled}) == len(registry)
+        assert len(scheduler._queue) == len(registry), (
+            'В очереди должно быть по одной записи на подписку'
+        )
+
+    def test_polls_are_spread_across_interval(self):
+        clock = FakeClock()
+        registry = make_registry(10000)
+        polls_per_minute = [0] * 11
+
+        def poll(subscription):
+            polls_per_minute[int(clock.now // 60)] += 1
+
+        scheduler = PollingScheduler(
+            registry, poll, interval=600, clock=clock, sleep=clock.sleep,
+        )
+        scheduler.start()
+        while clock.now <= 600:
+            scheduler.run_pending()
+            clock.sleep(1)
+        assert sum(polls_per_minute) == len(registry)
+        assert max(polls_per_minute) < 1.2 * len(registry) / 10, (
+            'Опросы должны быть равномерно распределены по окну'
+        )
+
+    def test_removed_subscription_is_not_polled(self):
+        clock = FakeClock()
+        registry = make_registry(10)
+        polled = []
+        scheduler = PollingScheduler(
+            registry, polled.append, interval=600, clock=clock,
+            sleep=clock.sleep,
+        )
+        scheduler.start()
+        registry.remove('token-3', 3)
+        clock.sleep(600)
+        scheduler.run_pending()
+        assert len(polled) == 9
+        assert ('token-3', '3') not in {sub.key for sub in polled}
+
+    def test_readded_subscription_is_polled_once_per_interval(self):
+        clock = FakeClock()
+        registry = make_registry(1)
+        polled = []
+        scheduler = PollingScheduler(
+            registry, polled.append, interval=600, clock=clock,
+            sleep=clock.sleep,
+        )
+        scheduler.start()
+        registry.remove('token-0', 0)
+        clock.sleep(1)
+        scheduler.add(registry.add('token-0', 0))
+        while clock.now <= 1800:
+            scheduler.run_pending()
+            clock.sleep(1)
+        assert len(polled) == 3, (
+            'Прежняя запись удалённой подписки не должна давать лишних опросов'
+        )
+
+    def test_poll_error_does_not_stop_others(self):
+        clock = FakeClock()
+        registry = make_registry(5)
+        polled = []
+
+        def poll(subscription):
+            if subscription.token == 'token-0':
+                raise RuntimeError('boom')
+            polled.append(subscription)
+
+        scheduler = PollingScheduler(
+            registry, poll, interval=600, clock=clock, sleep=clock.sleep,
+            workers=2,
+        )
+        scheduler.start()
+        clock.sleep(600)
+        assert scheduler.run_pending() == 5
+        assert len(polled) == 4
+
+
+def test_read_subscriptions(tmp_path):
+    path = tmp_path / 'subscriptions.txt'
+    path.write_text('# comment\ntoken-a 1\n\ntoken-b 2\n', encoding='utf-8')
+    assert read_subscriptions(str(path)) == [('token-a', '1'), ('token-b', '2')]
@@ -0,0 +1,193 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import shards
+
+from shards import HashRing, Supervisor, make_ring, select_shard, shard_name
+
+TOKENS = [f'token-{number}' for number in range(10000)]
+
+
+class FakeProcess:
+
+    def __init__(self, command, env):
+        self.env = env
+        self.pid = len(env)
+        self.returncode = None
+        self.terminated = False
+
+    def poll(self):
+        return self.returncode
+
+    def terminate(self):
+        self.terminated = True
+        self.returncode = -15
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+    def kill(self):
+        self.returncode = -9
+
+
+class TestHashRing:
+
+    def test_balanced(self):
+        ring = make_ring(4)
+        counts = {}
+        for token in TOKENS:
+            shard = ring.shard_for(token)
+            counts[shard] = counts.get(shard, 0) + 1
+        assert sorted(counts) == [shard_name(index) for index in range(4)]
+        assert max(counts.values()) < 1.25 * len(TOKENS) / 4
+
+    def test_adding_shard_moves_few_tokens(self):
+        before, after = make_ring(4), make_ring(5)
+        moved = [
+            token for token in TOKENS
+            if before.shard_for(token) != after.shard_for(token)
+        ]
+        assert len(moved) < 0.3 * len(TOKENS), (
+            'При добавлении шарда должна переезжать примерно 1/5 токенов'
+        )
+        assert {after.shard_for(token) for token in moved} == {'shard-4'}, (
+            'Токены должны переезжать только на новый шард'
+        )
+
+    def test_stable_between_processes(self):
+        code = (
+            'from shards import make_ring; '
+            'print(make_ring(3).shard_for("token-42"))'
+        )
+        output = subprocess.check_output(
+            [sys.executable, '-c', code],
+            cwd=os.path.dirname(shards.__file__), text=True,
+        )
+        assert output.strip() == make_ring(3).shard_for('token-42')
+
+    def test_needs_shards(self):
+        with pytest.raises(ValueError):
+            HashRing([])
+
+    def test_select_shard_partitions_subscriptions(self):
+        pairs = [(token, chat) for token in TOKENS[:500] for chat in '12']
+        shards = [select_shard(pairs, index, 3) for index in range(3)]
+        assert sorted(pair for shard in shards for pair in shard) == (
+            sorted(pairs)
+        )
+        for shard in shards:
+            tokens = {token for token, _ in shard}
+            assert len(shard) == 2 * len(tokens), (
+                'Все чаты одного токена должны попадать в один шард'
+            )
+        assert select_shard(pairs, 0, 1) == pairs
+
+
+class TestLoadRegistry:
+
+    def test_only_own_shard(self, monkeypatch, tmp_path):
+        import constants
+        import homework
+
+        path = tmp_path / 'subscriptions.txt'
+        path.write_text(''.join(f'{token} 1\n' for token in TOKENS[:300]))
+        monkeypatch.setattr(constants, 'SUBSCRIPTIONS_FILE', str(path))
+        monkeypatch.setattr(constants, 'PRACTICUM_TOKEN', 'env-token')
+        monkeypatch.setattr(constants, 'TELEGRAM_CHAT_ID', '2')
+        monkeypatch.setattr(constants, 'SHARD_COUNT', 3)
+        registries = []
+        for index in range(3):
+            monkeypatch.setattr(constants, 'SHARD_INDEX', index)
+            registries.append(homework.load_registry(100))
+        keys = [
+            subscription.key
+            for registry in registries for subscription in registry
+        ]
+        assert len(keys) == len(set(keys)) == 301
+        assert all(len(registry) > 50 for registry in registries)
+
+
+class TestSupervisor:
+
+    def test_spawns_shards_with_environment(self, tmp_path):
+        code = (
+            'import os, sys; '
+            f'open(os.path.join({str(tmp_path)!r}, os.environ["SHARD_INDEX"]),'
+            ' "w").write(os.environ["SHARD_COUNT"])'
+        )
+        supervisor = Supervisor(3, [sys.executable, '-c', code], env={})
+        supervisor.start()
+        for process in supervisor.processes.values():
+            assert process.wait(10) == 0
+        supervisor.stop()
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            '0', '1', '2'
+        ]
+        assert (tmp_path / '2').read_text() == '3'
+
+    def test_restarts_with_backoff(self):
+        now = [0.0]
+        supervisor = Supervisor(
+            2, ['worker'], env={}, restart_delay=1, max_restart_delay=8,
+            popen=FakeProcess, clock=lambda: now[0],
+        ).start()
+        first = supervisor.processes[1]
+        first.returncode = 1
+        supervisor.check()
+        assert supervisor.processes[1] is first, 'Перезапуск не сразу'
+        now[0] = 1
+        supervisor.check()
+        second = supervisor.processes[1]
+        assert second is not first
+        assert second.env['SHARD_INDEX'] == '1'
+        second.returncode = 1
+        supervisor.check()
+        now[0] = 2.5
+        supervisor.check()
+        assert supervisor.processes[1] is second, 'Задержка должна расти'
+        now[0] = 3
+        supervisor.check()
+        assert supervisor.processes[1] is not second
+        assert supervisor.processes[0].returncode is None
+
+    def test_backoff_resets_after_long_run(self):
+        now = [0.0]
+        supervisor = Supervisor(
+            1, ['worker'], env={}, restart_delay=1, max_restart_delay=8,
+            popen=FakeProcess, clock=lambda: now[0],
+        ).start()
+        supervisor.restarts[0] = 5
+        now[0] = 100
+        supervisor.processes[0].returncode = 1
+        supervisor.check()
+        now[0] = 101
+        supervisor.check()
+        assert supervisor.restarts[0] == 1
+
+    def test_stop_terminates(self):
+        supervisor = Supervisor(
+            2, ['worker'], env={}, popen=FakeProcess
+        ).start()
+        supervisor.stop()
+        assert all(
+            process.terminated for process in supervisor.processes.values()
+        )
+
+    def test_missing_subscriptions_file(self, monkeypatch, tmp_path):
+        import constants
+        import homework
+
+        monkeypatch.setattr(
+            constants, 'SUBSCRIPTIONS_FILE', str(tmp_path / 'missing.txt')
+        )
+        monkeypatch.setattr(constants, 'PRACTICUM_TOKEN', 'env-token')
+        monkeypatch.setattr(constants, 'TELEGRAM_CHAT_ID', '2')
+        monkeypatch.setattr(constants, 'SHARD_COUNT', 1)
+        monkeypatch.setattr(constants, 'SHARD_INDEX', 0)
+        registry = homework.load_registry(100)
+        assert [subscription.key for subscription in registry] == [
+            ('env-token', '2')
+        ]
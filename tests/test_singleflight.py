@@ -0,0 +1,97 @@
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from scheduler import poll_offset
+from singleflight import SingleFlight
+from stub_api import StubPracticumAPI
+from subscriptions import Subscription
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSingleFlight:
+
+    def test_concurrent_calls_share_one_result(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            release.wait(5)
+            return {'homeworks': []}
+
+        with ThreadPoolExecutor(8) as executor:
+            futures = [
+                executor.submit(flight.do, ('token', 1), slow)
+                for _ in range(8)
+            ]
+            while flight.shared < 7:
+                threading.Event().wait(0.01)
+            release.set()
+            results = [future.result() for future in futures]
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+        assert (flight.calls, flight.shared) == (1, 7)
+
+    def test_error_is_shared_but_not_remembered(self):
+        flight = SingleFlight(ttl=10)
+        with pytest.raises(ValueError):
+            flight.do('key', lambda: int('x'))
+        assert flight.do('key', lambda: 42) == 42
+
+    def test_result_is_remembered_for_ttl(self):
+        clock = FakeClock()
+        flight = SingleFlight(ttl=5, clock=clock)
+        assert flight.do('key', lambda: 1) == 1
+        clock.now = 4
+        assert flight.do('key', lambda: 2) == 1
+        assert flight.do('other', lambda: 3) == 3
+        clock.now = 5
+        assert flight.do('key', lambda: 4) == 4
+        assert flight.calls == 3
+
+
+def test_subscriptions_of_one_token_share_offset():
+    offsets = {
+        poll_offset(Subscription('token', str(chat)), 600)
+        for chat in range(10)
+    }
+    assert len(offsets) == 1
+
+
+@pytest.mark.parametrize('subscribers', [1, 4, 16])
+def test_upstream_requests_do_not_grow_with_subscribers(
+    monkeypatch, subscribers, bot
+):
+    import constants
+    import homework
+
+    with StubPracticumAPI(delay=0.2, homeworks=[
+        {'homework_name': 'hw', 'status': 'approved'},
+    ]) as stub:
+        monkeypatch.setattr(constants, 'ENDPOINT', stub.url)
+        subscriptions = [
+            Subscription('token', str(chat), 1) for chat in range(subscribers)
+        ]
+        with ThreadPoolExecutor(subscribers) as executor:
+            list(executor.map(
+                lambda subscription: homework.poll_subscription(
+                    bot, subscription
+                ),
+                subscriptions,
+            ))
+    assert len(stub.requests) == 1
+    assert sorted(chat for chat, _ in bot.sent) == sorted(
+        subscription.chat_id for subscription in subscriptions
+    ), 'Ответ должен дойти до каждого чата'
@@ -0,0 +1,194 @@
+import json
+import time
+
+import pytest
+
+from sinks import (
+    FanOut, FileSink, Sink, SinkPool, SinkQueue, SmtpSink, WebhookSink,
+    build_notifier, parse_recipients,
+)
+from stub_sinks import StubSMTPServer, StubWebhookReceiver
+
+
+class RecordingSink(Sink):
+
+    name = 'recording'
+
+    def __init__(self, delay=0.0, failures=0):
+        self.delay = delay
+        self.failures = failures
+        self.sent = []
+
+    def send(self, chat_id, text):
+        if self.delay:
+            time.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('sink is down')
+        self.sent.append((chat_id, text, time.monotonic()))
+
+
+class TestSinks:
+
+    def test_smtp(self):
+        with StubSMTPServer() as server:
+            host, port = server.address
+            sink = SmtpSink(
+                'bot@localhost',
+                {'1': ['student@example.com'], '2': ['other@example.com']},
+                host=host, port=port,
+            )
+            sink.send(1, 'Изменился статус проверки работы "hw"')
+            sink.send(3, 'Чату без адреса письмо не уходит')
+            message, = server.wait_for(1)
+        assert message['To'] == 'student@example.com'
+        assert message['Subject'] == 'Статус домашней работы'
+        assert 'Изменился статус' in message.get_content()
+
+    def test_smtp_recipients_by_chat(self):
+        assert parse_recipients(
+            'a@example.com, 7:b@example.com,7:c@example.com', default_chat=1
+        ) == {'1': ['a@example.com'], '7': ['b@example.com', 'c@example.com']}
+        with pytest.raises(ValueError):
+            parse_recipients('a@example.com')
+
+    def test_webhook(self):
+        with StubWebhookReceiver() as receiver:
+            sink = WebhookSink(receiver.url)
+            sink.send('42', 'текст')
+            sink.close()
+        assert receiver.received == [{'chat_id': '42', 'text': 'текст'}]
+
+    def test_webhook_error_status_raises(self):
+        with StubWebhookReceiver(status=500) as receiver:
+            with pytest.raises(Exception):
+                WebhookSink(receiver.url).send('42', 'текст')
+
+    def test_file(self, tmp_path):
+        path = tmp_path / 'notifications.jsonl'
+        sink = FileSink(str(path))
+        sink.send(1, 'первое\nвторое')
+        sink.close()
+        assert json.loads(path.read_text(encoding='utf-8')) == {
+            'chat_id': 1, 'text': 'первое\nвторое',
+        }
+
+
+class TestSinkPool:
+
+    def test_send_does_not_wait_for_sink(self):
+        sink = RecordingSink(delay=0.2)
+        pool = SinkPool([SinkQueue(sink, rate=100)]).start()
+        started = time.monotonic()
+        pool.send_message(chat_id=1, text='hello')
+        assert time.monotonic() - started < 0.05
+        pool.stop(timeout=5)
+        assert [text for _, text, _ in sink.sent] == ['hello']
+
+    def test_rate_limit(self):
+        sink = RecordingSink()
+        pool = SinkPool([SinkQueue(sink, rate=20)], workers=4)
+        for number in range(25):
+            pool.send_message(chat_id=1, text=str(number))
+        pool.start().stop(timeout=5)
+        times = [sent for _, _, sent in sink.sent]
+        assert len(times) == 25
+        assert times[-1] - times[0] >= 0.2
+
+    def test_retries_then_gives_up(self):
+        sink = RecordingSink(failures=2)
+        queue = SinkQueue(sink, rate=100, max_retries=1, retry_delay=0.01)
+        pool = SinkPool([queue])
+        pool.send_message(chat_id=1, text='lost')
+        pool.send_message(chat_id=1, text='delivered')
+        pool.start().stop(timeout=5)
+        assert [text for _, text, _ in sink.sent] == ['delivered']
+        assert queue.stats()['failed'] == 1
+
+    def test_overflow_drops_oldest(self):
+        sink = RecordingSink()
+        pool = SinkPool([SinkQueue(sink, rate=100, max_queue=2)])
+        for text in ('a', 'b', 'c'):
+            pool.send_message(chat_id=1, text=text)
+        pool.start().stop(timeout=5)
+        assert [text for _, text, _ in sink.sent] == ['b', 'c']
+        assert pool.stats()['dropped'] == 1
+
+    def test_order_is_kept_per_sink(self):
+        sinks = [RecordingSink(delay=0.001) for _ in range(5)]
+        pool = SinkPool([SinkQueue(sink, rate=1000) for sink in sinks])
+        pool.start()
+        for number in range(20):
+            pool.send_message(chat_id=1, text=str(number))
+        pool.stop(timeout=5)
+        for sink in sinks:
+            assert [text for _, text, _ in sink.sent] == [
+                str(number) for number in range(20)
+            ]
+
+
+class TestFanOut:
+
+    def test_stop_shares_one_deadline(self):
+        class SlowToStop:
+            def stop(self, timeout=None):
+                time.sleep(timeout)
+
+        started = time.monotonic()
+        FanOut([SlowToStop(), SlowToStop(), SlowToStop()]).stop(0.2)
+        assert time.monotonic() - started < 0.35
+
+    def test_slow_sink_does_not_delay_others(self):
+        slow, fast = RecordingSink(delay=0.5), RecordingSink()
+        fanout = FanOut([
+            SinkPool([SinkQueue(slow, rate=100), SinkQueue(fast, rate=100)]),
+        ]).start()
+        fanout.send_message(chat_id=1, text='hello')
+        deadline = time.monotonic() + 2
+        while not fast.sent and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert fast.sent and not slow.sent
+        fanout.stop(timeout=5)
+        assert slow.sent
+
+    def test_poll_notifies_every_sink(self, monkeypatch, tmp_path):
+        import constants
+        import homework
+        from subscriptions import Subscription
+
+        class Bot:
+            def __init__(self):
+                self.sent = []
+
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                self.sent.append((chat_id, text))
+
+        path = tmp_path / 'notifications.jsonl'
+        monkeypatch.setattr(constants, 'NOTIFY_SINKS', 'telegram, file, smtp')
+        monkeypatch.setattr(constants, 'NOTIFY_FILE', str(path))
+        monkeypatch.setattr(
+            homework, 'request_homework_statuses',
+            lambda token, current_timestamp: {
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 200,
+            },
+        )
+        bot = Bot()
+        with StubSMTPServer() as server:
+            monkeypatch.setattr(constants, 'SMTP_HOST', server.address[0])
+            monkeypatch.setattr(constants, 'SMTP_PORT', server.address[1])
+            monkeypatch.setattr(constants, 'SMTP_TO', '7:student@example.com')
+            notifier = build_notifier(bot).start()
+            homework.poll_subscription(notifier, Subscription('t', '7', 100))
+            notifier.stop(timeout=5)
+            emails = server.wait_for(1)
+        assert [chat for chat, _ in bot.sent] == ['7']
+        assert json.loads(path.read_text(encoding='utf-8'))['chat_id'] == '7'
+        assert '"hw"' in emails[0].get_content()
+
+    def test_unknown_sink(self, monkeypatch):
+        import constants
+
+        monkeypatch.setattr(constants, 'NOTIFY_SINKS', 'telegram,pigeon')
+        with pytest.raises(ValueError):
+            build_notifier(None)
@@ -0,0 +1,26 @@
+from startup import HOMEWORK, TELEGRAM_STACK, measure_startup
+
+TOKENS = {
+    'PRACTICUM_TOKEN': 'token', 'TELEGRAM_TOKEN': '123:token',
+    'TELEGRAM_CHAT_ID': '1',
+}
+
+
+def loaded_stack(modules):
+    return sorted(
+        name for name in modules if name.split('.')[0] in TELEGRAM_STACK
+    )
+
+
+def test_check_exits_with_token_status():
+    assert measure_startup([HOMEWORK, '--check'], TOKENS)['exit_code'] == 0
+    missing = dict(TOKENS, TELEGRAM_TOKEN='')
+    assert measure_startup([HOMEWORK, '--check'], missing)['exit_code'] == 1
+
+
+def test_check_starts_without_telegram_stack():
+    check = measure_startup([HOMEWORK, '--check'], TOKENS)
+    assert check['exit_code'] == 0
+    assert loaded_stack(check['modules']) == [], (
+        '`--check` не должен загружать Telegram и requests'
+    )
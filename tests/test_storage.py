@@ -0,0 +1,147 @@
+import sqlite3
+import time
+
+import pytest
+
+from storage import MemoryStateStore, SQLiteStateStore, sent_key
+from subscriptions import Subscription
+
+HOMEWORK = {
+    'homework_name': 'hw123',
+    'status': 'approved',
+    'date_updated': '2020-02-13T14:40:57Z',
+}
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        yield MemoryStateStore()
+    else:
+        store = SQLiteStateStore(str(tmp_path / 'state.sqlite3'))
+        yield store
+        store.close()
+
+
+class TestStateStore:
+
+    def test_cursor_and_sent(self, store):
+        subscription = Subscription('token', '1', 100)
+        assert store.load_cursor(subscription) is None
+        store.save_cursor(subscription)
+        assert store.load_cursor(subscription) == 100
+        assert not store.is_sent(subscription, sent_key(HOMEWORK))
+        store.mark_sent(subscription, sent_key(HOMEWORK))
+        assert store.is_sent(subscription, sent_key(HOMEWORK))
+        other_chat = Subscription('token', '2', 100)
+        assert not store.is_sent(other_chat, sent_key(HOMEWORK))
+
+    def test_sqlite_commits_in_batches(self, tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        store = SQLiteStateStore(path, commit_interval=3600)
+        subscription = Subscription('token', '1', 100)
+        store.save_cursor(subscription)
+
+        def committed_rows():
+            with sqlite3.connect(path) as connection:
+                return connection.execute(
+                    'SELECT count(*) FROM cursors'
+                ).fetchone()[0]
+
+        assert committed_rows() == 0
+        store.flush()
+        assert committed_rows() == 1
+        store.close()
+
+    def test_sqlite_commits_when_window_closes(self, tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        first = SQLiteStateStore(path, commit_interval=0.2)
+        second = SQLiteStateStore(path, commit_interval=0.2)
+        subscription = Subscription('token', '1', 100)
+        first.save_cursor(subscription)
+        first.mark_sent(subscription, sent_key(HOMEWORK))
+        second.save_cursor(Subscription('token', '2', 200))
+        second.flush()
+        assert second.is_sent(subscription, sent_key(HOMEWORK)), (
+            'Открытая транзакция первой базы должна закоммититься сама'
+        )
+        assert second.load_cursor(subscription) == 100
+        first.close()
+        second.close()
+
+    def test_sqlite_survives_restart(self, tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        store = SQLiteStateStore(path)
+        subscription = Subscription('secret-token', '1', 100)
+        store.save_cursor(subscription)
+        store.mark_sent(subscription, sent_key(HOMEWORK))
+        store.close()
+
+        store = SQLiteStateStore(path)
+        assert store.load_cursor(subscription) == 100
+        assert store.is_sent(subscription, sent_key(HOMEWORK))
+        store.close()
+        with open(path, 'rb') as file:
+            assert b'secret-token' not in file.read()
+
+
+class TestPollWithStore:
+
+    @pytest.fixture
+    def api(self, monkeypatch):
+        import homework
+
+        response = {'homeworks': [HOMEWORK], 'current_date': 200}
+        monkeypatch.setattr(
+            homework, 'request_homework_statuses',
+            lambda token, current_timestamp: response,
+        )
+        return response
+
+    def test_restart_does_not_notify_twice(
+        self, api, memory_state_store, bot
+    ):
+        import homework
+
+        homework.poll_subscription(bot, Subscription('token', '1', 100))
+        restarted = Subscription('token', '1', 0)
+        restarted.current_date = memory_state_store.load_cursor(restarted)
+        homework.poll_subscription(bot, restarted)
+
+        assert len(bot.sent) == 1
+        assert restarted.current_date == 200
+
+    def test_failed_send_keeps_cursor(self, api, bot):
+        import homework
+
+        subscription = Subscription('token', '1', 100)
+        bot.fail = True
+        homework.poll_subscription(bot, subscription)
+        assert subscription.current_date == 100, (
+            'Курсор не должен сдвигаться, если уведомление не отправлено'
+        )
+        bot.fail = False
+        homework.poll_subscription(bot, subscription)
+        assert len(bot.sent) == 1
+        assert subscription.current_date == 200
+
+    def test_queued_send_commits_after_delivery(
+        self, api, memory_state_store, bot
+    ):
+        import homework
+        from outbox import Outbox
+
+        bot.fail = True
+        outbox = Outbox(bot, max_retries=1, retry_delay=0.01).start()
+        subscription = Subscription('token', '1', 100)
+        homework.poll_subscription(outbox, subscription)
+        homework.poll_subscription(outbox, subscription)
+        time.sleep(0.1)
+        assert subscription.current_date == 100
+        assert not memory_state_store.is_sent(
+            subscription, sent_key(HOMEWORK)
+        )
+        bot.fail = False
+        outbox.stop(timeout=5)
+        assert len(bot.sent) == 1
+        assert subscription.current_date == 200
@@ -0,0 +1,133 @@
+import json
+import tracemalloc
+
+import pytest
+
+from exceptions import ResponseIsNotJSON
+from practicum import PracticumClient
+from streaming import HomeworkStream
+from stub_api import StubPracticumAPI
+from validation import parse_homeworks
+
+HOMEWORKS = [
+    {'homework_name': 'Итоговый проект', 'status': 'approved',
+     'date_updated': '2022-01-02T10:00:00Z'},
+    {'homework_name': 'hw 1', 'status': 'rejected', 'id': 12345678901234},
+]
+
+
+def chunked(data, size):
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+
+def make_history(count):
+    return [
+        {
+            'id': number,
+            'homework_name': f'student__hw{number:06d}.zip',
+            'status': ('approved', 'reviewing', 'rejected')[number % 3],
+            'reviewer_comment': 'Всё отлично, работа принята. ' * 2,
+            'date_updated': '2022-01-02T10:00:00Z',
+            'lesson_name': f'Спринт {number % 20}',
+        }
+        for number in range(count)
+    ]
+
+
+class TestHomeworkStream:
+
+    @pytest.mark.parametrize('size', [1, 2, 7, 4096])
+    def test_any_chunk_boundaries(self, size):
+        body = json.dumps(
+            {'homeworks': HOMEWORKS, 'current_date': 1000198000},
+            ensure_ascii=False,
+        ).encode()
+        stream = HomeworkStream(chunked(body, size))
+        assert list(stream) == HOMEWORKS
+        assert stream.current_date == 1000198000
+
+    def test_key_order_and_extra_keys(self):
+        body = json.dumps({
+            'current_date': 7, 'next': None, 'homeworks': [], 'count': 0,
+        }).encode()
+        stream = HomeworkStream(chunked(body, 3))
+        assert list(stream) == []
+        assert stream.current_date == 7
+        assert stream.extra == {'next': None, 'count': 0}
+
+    def test_entries_are_yielded_before_body_ends(self):
+        def chunks():
+            yield b'{"homeworks": [{"homework_name": "a", "status": "ok"},'
+            raise AssertionError('Прочитано больше, чем нужно')
+
+        assert next(iter(HomeworkStream(chunks())))['homework_name'] == 'a'
+
+    @pytest.mark.parametrize('body, error', [
+        (b'[]', TypeError),
+        (b'{"homeworks": []}', TypeError),
+        (b'{"homeworks": {}, "current_date": 1}', TypeError),
+        (b'{"homeworks": [], "current_date": "1"}', TypeError),
+        (b'{"homeworks": [{"a": 1}', ResponseIsNotJSON),
+        (b'{"homeworks": [] "current_date": 1}', ResponseIsNotJSON),
+        (b'not json', TypeError),
+        (b'', ResponseIsNotJSON),
+    ])
+    def test_invalid_body(self, body, error):
+        with pytest.raises(error):
+            list(HomeworkStream(chunked(body, 4)))
+
+
+class TestStreamingRequest:
+
+    def test_stream_homework_statuses(self):
+        import homework
+
+        with StubPracticumAPI(homeworks=HOMEWORKS) as stub:
+            with PracticumClient(endpoint=stub.url) as client:
+                stream = homework.stream_homework_statuses(
+                    'token', 5, client=client
+                )
+                names = [
+                    item.homework_name
+                    for item in parse_homeworks(stream)
+                ]
+        assert names == ['Итоговый проект', 'hw 1']
+        assert stream.current_date == stub.current_date
+        assert stub.requests[0]['query'] == {'from_date': ['5']}
+
+    def test_parse_homeworks_reports_invalid_entries(self):
+        invalid = []
+        items = [{'homework_name': 'x', 'status': 'lost'}, HOMEWORKS[0]]
+        parsed = list(parse_homeworks(
+            items, on_invalid=lambda item, error: invalid.append(item)
+        ))
+        assert [item.raw for item in parsed] == [HOMEWORKS[0]]
+        assert invalid == [items[0]]
+
+    def test_peak_memory_does_not_grow_with_history(self):
+        import homework
+
+        history = make_history(20000)
+        with StubPracticumAPI(homeworks=history) as stub:
+            body = stub.body({})
+            stub.body = lambda query: body
+            assert len(body) > 4 * 1024 * 1024
+            with PracticumClient(endpoint=stub.url) as client:
+                tracemalloc.start()
+                try:
+                    count = sum(1 for _ in parse_homeworks(
+                        homework.stream_homework_statuses(
+                            'token', 1, client=client
+                        )
+                    ))
+                    _, streamed_peak = tracemalloc.get_traced_memory()
+                    tracemalloc.reset_peak()
+                    response = client.get('token', 1).json()
+                    _, buffered_peak = tracemalloc.get_traced_memory()
+                finally:
+                    tracemalloc.stop()
+        assert count == len(response['homeworks']) == 20000
+        assert streamed_peak < 1024 * 1024, (
+            f'Пиковая память потокового разбора {streamed_peak} байт'
+        )
+        assert streamed_peak * 10 < buffered_peak
@@ -0,0 +1,131 @@
+import pytest
+
+from storage import get_store
+from subscriptions import Subscription
+from transitions import (
+    SKIPPED, STATUS_CODES, StatusTable, Transition, homework_time,
+    missed_statuses,
+)
+
+
+@pytest.mark.parametrize('old, new, missed', [
+    (None, 'reviewing', ()),
+    ('reviewing', 'approved', ()),
+    ('rejected', 'reviewing', ()),
+    ('rejected', 'approved', ('reviewing',)),
+    ('rejected', 'rejected', ('reviewing',)),
+    ('reviewing', 'reviewing', ('rejected',)),
+    ('approved', 'reviewing', ()),
+])
+def test_missed_statuses(old, new, missed):
+    assert missed_statuses(old, new) == missed
+
+
+def test_unknown_past_has_no_skips():
+    assert SKIPPED[STATUS_CODES[None], STATUS_CODES['approved']] == ()
+
+
+def test_homework_time():
+    assert homework_time({'date_updated': '2022-01-01T10:00:00Z'}) == (
+        1641031200
+    )
+    assert homework_time({}) == 0
+    assert homework_time({'date_updated': 'вчера'}) == 0
+
+
+class TestStatusTable:
+
+    def test_only_genuine_changes(self):
+        table = StatusTable()
+        assert table.observe('hw', 'reviewing', 10) == Transition(
+            'hw', None, 'reviewing', 10, ()
+        )
+        assert table.observe('hw', 'reviewing', 10) is None, 'Повтор'
+        assert table.observe('hw', 'rejected', 20).new == 'rejected'
+        assert table.observe('hw', 'reviewing', 15) is None, (
+            'Запись старше известной не меняет состояние'
+        )
+        assert table.observe('hw', 'approved', 40) == Transition(
+            'hw', 'rejected', 'approved', 40, ('reviewing',)
+        )
+        assert table.status('hw') == 'approved'
+        assert table.status('other') is None
+        assert (len(table), table.transitions) == (1, 3)
+
+    def test_diff_does_not_change_table(self):
+        table = StatusTable()
+        table.observe(1, 'reviewing', 10)
+        assert table.diff(1, 'approved', 20).old == 'reviewing'
+        assert table.diff(1, 'reviewing', 10) is None
+        assert table.status(1) == 'reviewing'
+        assert table.transitions == 1
+
+    def test_history(self):
+        table = StatusTable()
+        table.update([
+            {'id': 2, 'homework_name': 'b', 'status': 'reviewing',
+             'date_updated': '2022-01-01T00:00:00Z'},
+            {'id': 1, 'homework_name': 'a', 'status': 'rejected',
+             'date_updated': '2022-01-02T00:00:00Z'},
+            {'id': 1, 'homework_name': 'a', 'status': 'reviewing',
+             'date_updated': '2022-01-01T00:00:00Z'},
+            {'id': 3, 'homework_name': 'c', 'status': 'unknown'},
+            {'id': 4, 'status': 'approved'},
+        ])
+        table.observe(1, 'approved', homework_time(
+            {'date_updated': '2022-01-03T00:00:00Z'}
+        ))
+        assert [
+            (transition.old, transition.new) for transition in table.history(1)
+        ] == [(None, 'reviewing'), ('reviewing', 'rejected'),
+              ('rejected', 'approved')]
+        assert table.history(1)[-1].skipped == ('reviewing',)
+        assert [transition.new for transition in table.history(2)] == [
+            'reviewing'
+        ]
+        assert table.history(3) == []
+
+
+class TestPollTransitions:
+
+    def test_stale_record_is_not_notified(self, monkeypatch, bot):
+        import homework
+
+        responses = iter([
+            [{'id': 1, 'homework_name': 'hw', 'status': 'approved',
+              'date_updated': '2022-01-02T10:00:00Z'}],
+            [{'id': 1, 'homework_name': 'hw', 'status': 'reviewing',
+              'date_updated': '2022-01-01T10:00:00Z'}],
+        ])
+        monkeypatch.setattr(
+            homework, 'request_homework_statuses',
+            lambda token, current_timestamp: {
+                'homeworks': next(responses), 'current_date': 200,
+            },
+        )
+        subscription = Subscription('token', '1', 100)
+        homework.poll_subscription(bot, subscription)
+        homework.poll_subscription(bot, subscription)
+        assert len(bot.sent) == 1
+        assert subscription.statuses.status(1) == 'approved'
+        assert get_store().is_sent(
+            subscription, ('hw', 'reviewing', '2022-01-01T10:00:00Z')
+        ), 'Устаревшая запись отмечается обработанной'
+
+    def test_skipped_status_is_logged(self, monkeypatch, caplog, bot):
+        import homework
+
+        subscription = Subscription('token', '1', 100)
+        subscription.statuses.observe(1, 'rejected', 0)
+        monkeypatch.setattr(
+            homework, 'request_homework_statuses',
+            lambda token, current_timestamp: {
+                'homeworks': [{'id': 1, 'homework_name': 'hw',
+                               'status': 'approved',
+                               'date_updated': '2022-01-02T10:00:00Z'}],
+                'current_date': 200,
+            },
+        )
+        homework.poll_subscription(bot, subscription)
+        assert len(bot.sent) == 1
+        assert 'пропущен статус reviewing' in caplog.text
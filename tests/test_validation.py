@@ -0,0 +1,85 @@
+import pytest
+
+from validation import (
+    Homework, compile_verdicts, homework_message, parse_homework,
+    validate_response,
+)
+
+
+class TestValidateResponse:
+
+    def test_valid_response(self):
+        response = {
+            'homeworks': [
+                {'homework_name': 'hw1', 'status': 'approved',
+                 'date_updated': '2022-01-01T10:00:00Z'},
+                {'homework_name': 'hw2', 'status': 'rejected'},
+            ],
+            'current_date': 100,
+        }
+        validated = validate_response(response)
+        assert validated.current_date == 100
+        assert not validated.invalid
+        assert [hw.homework_name for hw in validated.homeworks] == [
+            'hw1', 'hw2'
+        ]
+        assert validated.homeworks[0].message == (
+            'Изменился статус проверки работы "hw1". '
+            'Работа проверена: ревьюеру всё понравилось. Ура!'
+        )
+        assert validated.homeworks[0].sent_key == (
+            'hw1', 'approved', '2022-01-01T10:00:00Z'
+        )
+
+    @pytest.mark.parametrize('response', [
+        None, {}, [], {'homeworks': []}, {'current_date': 1},
+        {'homeworks': {}, 'current_date': 1},
+        {'homeworks': [], 'current_date': '1'},
+    ])
+    def test_bad_shape(self, response):
+        with pytest.raises(TypeError):
+            validate_response(response)
+
+    def test_invalid_entries_are_collected(self):
+        response = {
+            'homeworks': [
+                {'homework_name': 'hw1', 'status': 'unknown'},
+                {'status': 'approved'},
+                'not a dict',
+                {'homework_name': 'hw2', 'status': ['approved']},
+                {'homework_name': 'hw3', 'status': 'reviewing'},
+            ],
+            'current_date': 100,
+        }
+        validated = validate_response(response)
+        assert [hw.homework_name for hw in validated.homeworks] == ['hw3']
+        assert len(validated.invalid) == 4
+        assert all(
+            isinstance(error, KeyError) for _, error in validated.invalid
+        )
+
+    @pytest.mark.parametrize('homework', [
+        {'homework_name': 'hw1', 'status': 'unknown'},
+        {'status': 'approved'},
+        'not a dict',
+        {'homework_name': 'hw2', 'status': ['approved']},
+    ])
+    def test_message_rejects_invalid_entries(self, homework):
+        with pytest.raises(KeyError):
+            homework_message(homework)
+
+    def test_message_matches_record(self):
+        homework = {'homework_name': 'hw', 'status': 'reviewing'}
+        assert homework_message(homework) == parse_homework(homework).message
+
+    def test_homework_has_slots(self):
+        homework = parse_homework({'homework_name': 'hw', 'status': 'approved'})
+        assert isinstance(homework, Homework)
+        assert not hasattr(homework, '__dict__')
+
+    def test_custom_verdicts(self):
+        verdicts = compile_verdicts({'done': 'Готово'})
+        homework = parse_homework(
+            {'homework_name': 'hw', 'status': 'done'}, verdicts
+        )
+        assert homework.message.endswith('"hw". Готово')
@@ -0,0 +1,151 @@
+import http.client
+
+import pytest
+import requests
+
+from subscriptions import SubscriptionRegistry
+from webhook import WebhookServer
+
+SECRET = 'webhook-secret'
+
+
+@pytest.fixture
+def server(bot):
+    import homework
+
+    registry = SubscriptionRegistry()
+    registry.add('student', '1', 100)
+    registry.add('student', '2', 100)
+    server = WebhookServer(
+        ('127.0.0.1', 0),
+        ingest=lambda token, response: homework.ingest_push(
+            bot, registry, token, response
+        ),
+        secret=SECRET,
+    ).start(poll_interval=0.05)
+    host, port = server.server_address
+    server.url = f'http://{host}:{port}/homework_statuses'
+    server.registry = registry
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def push(server, payload, token='student', secret=SECRET):
+    return requests.post(
+        server.url,
+        json=payload,
+        headers={
+            'Authorization': f'OAuth {token}',
+            'X-Webhook-Secret': secret,
+        },
+        timeout=5,
+    )
+
+
+PAYLOAD = {
+    'homeworks': [{'homework_name': 'hw123', 'status': 'approved'}],
+    'current_date': 200,
+}
+
+
+class TestWebhook:
+
+    def test_push_notifies_all_subscribers(self, server, bot):
+        response = push(server, PAYLOAD)
+        assert response.status_code == 200
+        assert response.json() == {'notified': 2}
+        assert sorted(chat for chat, _ in bot.sent) == ['1', '2']
+        assert all(
+            subscription.current_date == 200
+            for subscription in server.registry
+        )
+
+    def test_repeated_push_is_deduplicated(self, server, bot):
+        push(server, PAYLOAD)
+        response = push(server, PAYLOAD)
+        assert response.json() == {'notified': 0}
+        assert len(bot.sent) == 2
+
+    def test_bad_secret(self, server, bot):
+        response = push(server, PAYLOAD, secret='wrong')
+        assert response.status_code == 401
+        assert not bot.sent
+
+    def test_unknown_token(self, server):
+        assert push(server, PAYLOAD, token='stranger').status_code == 404
+
+    @pytest.mark.parametrize('payload', [
+        {'current_date': 200},
+        [PAYLOAD],
+        {'homeworks': [{'homework_name': 'hw', 'status': 'unknown'}],
+         'current_date': 200},
+    ])
+    def test_invalid_payload(self, server, bot, payload):
+        assert push(server, payload).status_code == 400
+        assert not bot.sent
+
+    def test_not_json(self, server):
+        response = requests.post(
+            server.url, data=b'nope',
+            headers={'Authorization': 'OAuth student',
+                     'X-Webhook-Secret': SECRET},
+            timeout=5,
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize('length', ['abc', '-1', '0'])
+    def test_bad_content_length(self, server, bot, length):
+        host, port = server.server_address
+        connection = http.client.HTTPConnection(host, port, timeout=5)
+        connection.putrequest('POST', '/homework_statuses')
+        connection.putheader('Authorization', 'OAuth student')
+        connection.putheader('X-Webhook-Secret', SECRET)
+        connection.putheader('Content-Length', length)
+        connection.endheaders()
+        assert connection.getresponse().status == 400
+        connection.close()
+        assert not bot.sent
+
+    def test_push_does_not_move_cursor_back(self, server, bot):
+        push(server, PAYLOAD)
+        stale = {
+            'homeworks': [{'homework_name': 'hw124', 'status': 'reviewing'}],
+            'current_date': 150,
+        }
+        assert push(server, stale).json() == {'notified': 2}
+        assert all(
+            subscription.current_date == 200
+            for subscription in server.registry
+        )
+
+    def test_push_is_forwarded_to_owner_shard(
+        self, server, bot, monkeypatch
+    ):
+        import constants
+        import homework
+        from shards import shard_index
+
+        owner = shard_index('student', 2)
+        host, port = server.server_address
+        monkeypatch.setattr(constants, 'SHARD_COUNT', 2)
+        monkeypatch.setattr(constants, 'SHARD_INDEX', 1 - owner)
+        monkeypatch.setattr(constants, 'WEBHOOK_HOST', host)
+        monkeypatch.setattr(constants, 'WEBHOOK_PORT', str(port - owner))
+        monkeypatch.setattr(constants, 'WEBHOOK_SECRET', SECRET)
+        notified = homework.route_push(
+            bot, SubscriptionRegistry(), 'student', PAYLOAD
+        )
+        assert notified == 2
+        assert len(bot.sent) == 2
+
+
+def test_placeholder_secret_is_refused(monkeypatch, bot):
+    import constants
+    import homework
+    from exceptions import MissingEnvironmentVariable
+
+    monkeypatch.setattr(constants, 'WEBHOOK_SECRET', 'change-me')
+    monkeypatch.setattr(constants, 'WEBHOOK_PORT', '0')
+    with pytest.raises(MissingEnvironmentVariable):
+        homework.start_webhook(bot, SubscriptionRegistry())
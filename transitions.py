@@ -0,0 +1,217 @@
+import datetime
+
+from array import array
+from collections import deque
+from typing import (
+    Any, Dict, Hashable, List, NamedTuple, Optional, Tuple,
+)
+
+import constants
+
+# Жизненный цикл работы: какие статусы API может сообщить следующими.
+# `None` — работа ещё не встречалась.
+LIFECYCLE: Dict[Optional[str], Tuple[str, ...]] = {
+    None: ('reviewing',),
+    'reviewing': ('approved', 'rejected'),
+    'rejected': ('reviewing',),
+    'approved': (),
+}
+STATUSES: Tuple[Optional[str], ...] = tuple(LIFECYCLE) + tuple(
+    status for status in constants.HOMEWORK_STATUSES
+    if status not in LIFECYCLE
+)
+STATUS_CODES: Dict[Optional[str], int] = {
+    status: code for code, status in enumerate(STATUSES)
+}
+UNSEEN = STATUS_CODES[None]
+# Код статуса занимает младшие биты упакованного состояния работы
+CODE_BITS = (len(STATUSES) - 1).bit_length()
+CODE_MASK = (1 << CODE_BITS) - 1
+
+
+def missed_statuses(old: Optional[str], new: str) -> Tuple[str, ...]:
+    """Статусы, которые работа прошла между `old` и `new` незамеченной.
+    Кратчайший путь по `LIFECYCLE` без концов; для повтора статуса —
+    кратчайший цикл. Пусто, если `new` следует сразу за `old` или пути
+    нет.
+    """
+    paths = deque((status, ()) for status in LIFECYCLE.get(old, ()))
+    seen = set()
+    while paths:
+        status, path = paths.popleft()
+        if status == new:
+            return path
+        if status in seen:
+            continue
+        seen.add(status)
+        paths.extend(
+            (following, path + (status,))
+            for following in LIFECYCLE.get(status, ())
+        )
+    return ()
+
+
+# Пропущенные статусы для каждой пары кодов; после неизвестного прошлого
+# состояния пропуски не определить.
+SKIPPED: Dict[Tuple[int, int], Tuple[str, ...]] = {
+    (STATUS_CODES[old], STATUS_CODES[new]): (
+        missed_statuses(old, new) if old is not None else ()
+    )
+    for old in STATUSES for new in STATUSES if new is not None
+}
+
+
+def homework_key(homework: Dict[str, Any]) -> Hashable:
+    """Ключ работы в таблице: `id`, а без него — название."""
+    return homework.get('id', homework.get('homework_name'))
+
+
+def homework_time(homework: Dict[str, Any]) -> int:
+    """`date_updated` записи в секундах Unix; без даты или с неверной — 0."""
+    value = homework.get('date_updated')
+    if not value:
+        return 0
+    try:
+        return int(datetime.datetime.fromisoformat(
+            str(value).replace('Z', '+00:00')
+        ).timestamp())
+    except ValueError:
+        return 0
+
+
+def is_known(homework: Any) -> bool:
+    """Запись с названием и статусом из таблицы статусов."""
+    return (
+        isinstance(homework, dict) and 'homework_name' in homework
+        and isinstance(homework.get('status'), str)
+        and homework['status'] in STATUS_CODES
+    )
+
+
+class Transition(NamedTuple):
+    """Смена статуса работы."""
+
+    key: Hashable
+    old: Optional[str]
+    new: str
+    date: int
+    skipped: Tuple[str, ...]
+
+
+make_transition = Transition._make
+
+
+class StatusTable:
+    """Последние статусы работ и история их смены.
+    Состояние работы — время `date_updated` и код статуса, упакованные в
+    одно число массива по номеру работы; словарь хранит только номер.
+    История — плоские массивы переходов, связанные в список по каждой
+    работе, поэтому переход обрабатывается за O(1), а история работы
+    читается без обхода чужих переходов.
+    Сменой считается другой статус или тот же статус с более поздней
+    датой (повторная проверка, промежуточный статус пропущен). Повтор и
+    запись старше известной сменой не считаются.
+    """
+
+    __slots__ = ('_index', '_state', '_last', '_moves', '_when', '_previous')
+
+    def __init__(self) -> None:
+        self._index: Dict[Hashable, int] = {}
+        self._state = array('q')
+        self._last = array('i')
+        self._moves = array('B')
+        self._when = array('q')
+        self._previous = array('i')
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+    @property
+    def transitions(self) -> int:
+        """Число записанных переходов."""
+        return len(self._previous)
+
+    def status(self, key: Hashable) -> Optional[str]:
+        """Последний известный статус работы."""
+        index = self._index.get(key)
+        return None if index is None else STATUSES[
+            self._state[index] & CODE_MASK
+        ]
+
+    def diff(
+        self, key: Hashable, status: str, date: int
+    ) -> Optional[Transition]:
+        """Переход, который даст запись, без изменения таблицы.
+        Возвращает None, если запись не меняет состояние работы.
+        """
+        code = STATUS_CODES[status]
+        index = self._index.get(key)
+        old = UNSEEN
+        if index is not None:
+            state = self._state[index]
+            if date << CODE_BITS | code == state or date < state >> CODE_BITS:
+                return None
+            old = state & CODE_MASK
+        return make_transition(
+            (key, STATUSES[old], status, date, SKIPPED[old, code])
+        )
+
+    def observe(
+        self, key: Hashable, status: str, date: int
+    ) -> Optional[Transition]:
+        """Учитывает запись о работе; возвращает переход, если он был."""
+        code = STATUS_CODES[status]
+        packed = date << CODE_BITS | code
+        index = self._index.get(key)
+        if index is None:
+            index = self._index[key] = len(self._state)
+            self._state.append(packed)
+            self._last.append(-1)
+            old = UNSEEN
+        else:
+            state = self._state[index]
+            if packed == state or date < state >> CODE_BITS:
+                return None
+            old = state & CODE_MASK
+            self._state[index] = packed
+        self._moves.append(old << CODE_BITS | code)
+        self._when.append(date)
+        self._previous.append(self._last[index])
+        self._last[index] = len(self._previous) - 1
+        return make_transition(
+            (key, STATUSES[old], status, date, SKIPPED[old, code])
+        )
+
+    def update(self, homeworks: List[Any]) -> List[Transition]:
+        """Учитывает записи ответа API в порядке `date_updated`.
+        Записи с недокументированным статусом или без названия
+        пропускаются.
+        """
+        records = sorted(
+            (
+                (homework_time(homework), homework_key(homework), homework)
+                for homework in homeworks if is_known(homework)
+            ),
+            key=lambda record: record[0],
+        )
+        transitions = (
+            self.observe(key, homework['status'], date)
+            for date, key, homework in records
+        )
+        return [transition for transition in transitions if transition]
+
+    def history(self, key: Hashable) -> List[Transition]:
+        """Переходы работы от первого к последнему."""
+        index = self._index.get(key)
+        position = -1 if index is None else self._last[index]
+        history = []
+        while position >= 0:
+            move = self._moves[position]
+            old, new = move >> CODE_BITS, move & CODE_MASK
+            history.append(Transition(
+                key, STATUSES[old], STATUSES[new], self._when[position],
+                SKIPPED[old, new],
+            ))
+            position = self._previous[position]
+        history.reverse()
+        return history
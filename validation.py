@@ -0,0 +1,181 @@
+from typing import (
+    Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional,
+    Tuple,
+)
+
+import constants
+import metrics
+
+MESSAGE_PREFIX = 'Изменился статус проверки работы "'
+
+
+def compile_verdicts(statuses: Dict[str, str]) -> Dict[str, str]:
+    """Готовит хвосты уведомлений для каждого документированного статуса."""
+    return {status: f'". {verdict}' for status, verdict in statuses.items()}
+
+
+VERDICTS: Dict[str, str] = compile_verdicts(constants.HOMEWORK_STATUSES)
+
+
+class Homework(NamedTuple):
+    """Проверенная запись о домашней работе из ответа API.
+    Поля и текст уведомления вычисляются один раз при проверке.
+    """
+
+    raw: Dict[str, Any]
+    homework_name: str
+    status: str
+    date_updated: str
+    message: str
+
+    @property
+    def sent_key(self) -> Tuple[str, str, str]:
+        """Ключ уведомления, как `storage.sent_key` для исходного словаря."""
+        return str(self.homework_name), self.status, self.date_updated
+
+
+make_homework = Homework._make
+
+
+class ValidatedResponse:
+    """Ответ API, проверенный за один проход."""
+
+    __slots__ = ('homeworks', 'current_date', 'invalid')
+
+    def __init__(
+        self,
+        homeworks: List[Homework],
+        current_date: int,
+        invalid: List[Tuple[Any, KeyError]],
+    ) -> None:
+        self.homeworks = homeworks
+        self.current_date = current_date
+        self.invalid = invalid
+
+
+def check_shape(response: Any) -> Tuple[list, int]:
+    """Проверяет ответ API на корректность и возвращает его поля."""
+    try:
+        return shape_fields(response)
+    except TypeError:
+        metrics.RESPONSE_INVALID.inc()
+        raise
+
+
+def shape_fields(response: Any) -> Tuple[list, int]:
+    """Поля ответа API; ошибки формы не учитываются в метриках."""
+    if not response or not isinstance(response, dict):
+        raise TypeError('В ответе API ничего нет или это не словарь')
+    homeworks = response.get('homeworks')
+    current_date = response.get('current_date')
+    if homeworks is None or current_date is None:
+        raise TypeError('В ответе API нет ключей `homeworks` и `current_date`')
+    if not isinstance(homeworks, list) or not isinstance(current_date, int):
+        raise TypeError(
+            'В ответе API не ожидаемые типы значений '
+            'ключей `homeworks` и `current_date`'
+        )
+    return homeworks, current_date
+
+
+def status_error(status: Optional[str]) -> KeyError:
+    """Ошибка недокументированного статуса."""
+    return KeyError(
+        f'{status} - недокументированный или отсутствует '
+        'статус домашней работы '
+    )
+
+
+def homework_verdict(
+    homework: Dict[str, Any], verdicts: Dict[str, str] = VERDICTS
+) -> str:
+    """Проверяет одну запись и возвращает хвост её уведомления."""
+    status = homework.get('status') if isinstance(homework, dict) else None
+    verdict = verdicts.get(status) if isinstance(status, str) else None
+    if verdict is None:
+        metrics.UNKNOWN_STATUSES.inc()
+        raise status_error(status)
+    if 'homework_name' not in homework:
+        metrics.MISSING_NAMES.inc()
+        raise KeyError('В ответе API нет названия домашней работы')
+    return verdict
+
+
+def homework_message(
+    homework: Dict[str, Any], verdicts: Dict[str, str] = VERDICTS
+) -> str:
+    """Проверяет одну запись и возвращает только текст уведомления.
+    Корректная запись проверяется двумя обращениями по ключу; ошибку и
+    метрику для некорректной даёт `homework_verdict`.
+    """
+    try:
+        verdict = verdicts[homework['status']]
+        name = homework['homework_name']
+    except (KeyError, TypeError):
+        homework_verdict(homework, verdicts)
+        raise
+    return f'{MESSAGE_PREFIX}{name}{verdict}'
+
+
+def parse_homework(
+    homework: Dict[str, Any], verdicts: Dict[str, str] = VERDICTS
+) -> Homework:
+    """Проверяет одну запись о домашней работе."""
+    try:
+        status = homework['status']
+        verdict = verdicts[status]
+        name = homework['homework_name']
+    except (KeyError, TypeError):
+        homework_verdict(homework, verdicts)
+        raise
+    return make_homework((
+        homework, name, status,
+        str(homework.get('date_updated', '')),
+        f'{MESSAGE_PREFIX}{name}{verdict}',
+    ))
+
+
+def validate_response(
+    response: Any, verdicts: Dict[str, str] = VERDICTS
+) -> ValidatedResponse:
+    """Проверяет ответ API и разбирает все работы за один проход.
+    Ошибки формы ответа выбрасываются как `TypeError`, записи с
+    недокументированным статусом или без названия собираются в `invalid`.
+    Результат запоминается в ответе из кеша (`cache.ResponseData`) и при
+    повторной проверке того же ответа берётся оттуда.
+    """
+    validated = getattr(response, 'validated', None)
+    if validated is not None and verdicts is VERDICTS:
+        return validated
+    items, current_date = check_shape(response)
+    homeworks: List[Homework] = []
+    invalid: List[Tuple[Any, KeyError]] = []
+    for item in items:
+        try:
+            homeworks.append(parse_homework(item, verdicts))
+        except KeyError as error:
+            invalid.append((item, error))
+    validated = ValidatedResponse(homeworks, current_date, invalid)
+    if verdicts is VERDICTS:
+        try:
+            response.validated = validated
+        except AttributeError:
+            pass
+    return validated
+
+
+def parse_homeworks(
+    items: Iterable[Any],
+    verdicts: Dict[str, str] = VERDICTS,
+    on_invalid: Optional[Callable[[Any, KeyError], None]] = None,
+) -> Iterator[Homework]:
+    """Проверяет записи по одной по мере их поступления.
+    Подходит для `streaming.HomeworkStream`: записи не собираются в
+    список. Некорректные записи передаются в `on_invalid` и пропускаются.
+    """
+    for item in items:
+        try:
+            yield parse_homework(item, verdicts)
+        except KeyError as error:
+            if on_invalid is not None:
+                on_invalid(item, error)
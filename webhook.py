@@ -0,0 +1,116 @@
+import hmac
+import json
+import logging
+import threading
+
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from exceptions import ShardUnavailable, UnknownSubscription
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_SIZE = 1024 * 1024
+# Секреты-заглушки из примеров настроек; с ними webhook не запускается
+PLACEHOLDER_SECRETS = frozenset({'change-me'})
+
+Ingest = Callable[[str, Dict[str, Any]], int]
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Принимает `POST` с ответом API в формате Практикум.Домашки.
+    Токен студента передаётся так же, как в API, — заголовком
+    `Authorization: OAuth <token>`, общий секрет — заголовком
+    `X-Webhook-Secret`.
+    """
+
+    server: 'WebhookServer'
+    protocol_version = 'HTTP/1.1'
+
+    def reply(self, status: HTTPStatus, payload: Dict[str, Any]) -> None:
+        """Отвечает JSON с кодом `status`."""
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        """Принимает ответ API и передаёт его обработчику."""
+        status, payload = self.handle_push()
+        self.reply(status, payload)
+
+    def content_length(self) -> int:
+        """Длина тела из `Content-Length`; -1, если заголовок неверный."""
+        try:
+            return int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            return -1
+
+    def handle_push(self) -> Tuple[HTTPStatus, Dict[str, Any]]:
+        """Проверяет запрос и передаёт ответ API на обработку."""
+        if self.path.split('?')[0] != self.server.path:
+            return HTTPStatus.NOT_FOUND, {'error': 'unknown path'}
+        secret = self.headers.get('X-Webhook-Secret', '')
+        if not hmac.compare_digest(secret, self.server.secret):
+            return HTTPStatus.UNAUTHORIZED, {'error': 'bad secret'}
+        scheme, _, token = self.headers.get('Authorization', '').partition(' ')
+        if scheme != 'OAuth' or not token:
+            return HTTPStatus.UNAUTHORIZED, {'error': 'no OAuth token'}
+        length = self.content_length()
+        if not 0 < length <= MAX_BODY_SIZE:
+            # Тело не прочитано, соединение дальше не разобрать
+            self.close_connection = True
+            if length > MAX_BODY_SIZE:
+                return (
+                    HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'error': 'too large'}
+                )
+            return HTTPStatus.BAD_REQUEST, {'error': 'bad Content-Length'}
+        try:
+            response = json.loads(self.rfile.read(length))
+            notified = self.server.ingest(token, response)
+        except UnknownSubscription as error:
+            return HTTPStatus.NOT_FOUND, {'error': str(error)}
+        except ShardUnavailable as error:
+            logger.error(f'Не удалось переслать статус шарду: {error}')
+            return HTTPStatus.BAD_GATEWAY, {'error': str(error)}
+        except (ValueError, TypeError, KeyError) as error:
+            logger.error(f'Некорректный ответ в webhook: {error}')
+            return HTTPStatus.BAD_REQUEST, {'error': str(error)}
+        return HTTPStatus.OK, {'notified': notified}
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Запросы пишутся в лог бота, а не в stderr."""
+        logger.debug(format % args)
+
+
+class WebhookServer(ThreadingHTTPServer):
+    """HTTP-сервер приёма статусов домашних работ."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        ingest: Ingest,
+        secret: str,
+        path: str = '/homework_statuses',
+    ) -> None:
+        super().__init__(address, WebhookHandler)
+        self.ingest = ingest
+        self.secret = secret
+        self.path = path
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self, poll_interval: float = 0.5) -> 'WebhookServer':
+        """Запускает сервер в фоновом потоке."""
+        self.thread = threading.Thread(
+            target=self.serve_forever, args=(poll_interval,),
+            name='webhook', daemon=True,
+        )
+        self.thread.start()
+        host, port = self.server_address[:2]
+        logger.info(f'Webhook принимает статусы на {host}:{port}{self.path}')
+        return self